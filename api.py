@@ -1,26 +1,159 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import FileResponse, JSONResponse
+import time
+# api modülünün yüklenme süresi ölçülür (STARTUP_TIMINGS)
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from pathlib import Path
-import yt_dlp
 import uuid
+import base64
+import hashlib
 import os
 import json
-import time
+import copy
+import re
+import shutil
 import asyncio
 import threading
-from typing import Optional, Dict, Any
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any, Iterable, List, Tuple, Callable, Set
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import logging
+from job_store import SharedJobStore, create_job_store
+from job_records import JobRecord, JobTable
+from metrics import (
+    ACTIVE_WORKERS, CACHE_LOOKUPS, EVENT_LOOP_LAG, JOBS_FINISHED, RequestLatencyMiddleware,
+    mark_process_dead, observe_completed_job, render_metrics,
+)
+from media_response import (
+    GrowingFileAborted, MediaFileResponse, content_disposition, iter_growing_file, iter_zip, media_type_for,
+)
+from fair_queue import DEFAULT_PRIORITY, PRIORITIES, FairQueue
+from platform_limits import PlatformGuard, PlatformUnavailable, backoff_delay, classify_error, parse_limits
+from audio_pipeline import AUDIO_FORMATS, AudioConverter, audio_extension, audio_format_selector
+# yt-dlp'ye bağlı modüller (segmented_download, extractor_pool, http_pools)
+# açılışta değil, load_engine ile arka planda yüklenir
+
+def env_bytes(name: str, default: str) -> int:
+    """'10GB', '512MB', '1048576' gibi ortam değişkenlerini bayta çevir"""
+    value = os.getenv(name, default).strip().upper()
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMGT]?)B?", value)
+    if not match:
+        raise ValueError(f"{name} geçersiz boyut: {value}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " KMGT".index(unit or " "))
 
 # --- Ayarlar ---
 API_KEY = os.getenv("API_KEY", "45541d717524a99df5f994bb9f6cbce825269852be079594b8e35f7752d6f1bd")
+
+def parse_api_clients(value: str) -> Dict[str, Tuple[str, float]]:
+    """API anahtarı -> (istemci etiketi, kuyruk ağırlığı)"""
+    clients = {API_KEY: ("default", 1.0)}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        label, _, rest = entry.partition(":")
+        key, _, weight = rest.partition(":")
+        if not label or not key:
+            raise ValueError(f"API_KEYS geçersiz kayıt: {label or entry[:8]}")
+        clients[key] = (label, float(weight or 1))
+    return clients
+
+# Ek istemci anahtarları: "etiket:anahtar[:ağırlık]" virgülle ayrılmış. İndirme
+# kuyruğu istemciler (anahtar, varsa X-Client-Id başlığı) arasında ağırlıkla paylaştırılır
+API_CLIENTS = parse_api_clients(os.getenv("API_KEYS", ""))
 DOWNLOAD_DIR = Path("downloads")
 DOWNLOAD_DIR.mkdir(exist_ok=True)
+# İş kayıtlarının saklandığı yer: "sqlite" (yeniden başlatmada korunur) veya "memory"
+JOB_STORE = os.getenv("JOB_STORE", "sqlite")
+JOB_DB_PATH = Path(os.getenv("JOB_DB_PATH", str(DOWNLOAD_DIR / "jobs.db")))
+JOB_STORE_FLUSH_INTERVAL = float(os.getenv("JOB_STORE_FLUSH_INTERVAL", "1.0"))
+# Birden fazla API süreci (uvicorn --workers N) iş durumunu ve kuyruğu SQLite
+# deposu üzerinden paylaşır. WEB_CONCURRENCY > 1 ise varsayılan olarak açıktır.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+SHARED_JOB_STATE = os.getenv("SHARED_JOB_STATE", "1" if WEB_CONCURRENCY > 1 else "0") == "1"
+WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "2"))
+SHARED_QUEUE_POLL_INTERVAL = float(os.getenv("SHARED_QUEUE_POLL_INTERVAL", "0.25"))
+# Aynı anda çalışabilecek yt-dlp indirme sayısı (worker havuzu boyutu)
+MAX_CONCURRENT_DOWNLOADS = max(1, int(os.getenv("MAX_CONCURRENT_DOWNLOADS", "3")))
+# Metadata (thumbnail, başlık...) önbelleği: kayıt sayısı, geçerlilik süresi (sn) ve çıkarma thread'leri
+METADATA_CACHE_SIZE = max(1, int(os.getenv("METADATA_CACHE_SIZE", "256")))
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "600"))
+METADATA_WORKERS = max(1, int(os.getenv("METADATA_WORKERS", "4")))
+# Toplu thumbnail isteğinde URL sınırı ve aynı anda çalışan çıkarma sayısı
+THUMBNAIL_BATCH_MAX_URLS = int(os.getenv("THUMBNAIL_BATCH_MAX_URLS", "100"))
+THUMBNAIL_BATCH_CONCURRENCY = max(1, int(os.getenv("THUMBNAIL_BATCH_CONCURRENCY", str(METADATA_WORKERS))))
+# Toplu indirmede (liste / URL listesi) öğe sınırı ve bir toplu işin aynı anda kuyruğa verdiği öğe sayısı
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_CONCURRENCY = max(1, int(os.getenv("BATCH_CONCURRENCY", str(MAX_CONCURRENT_DOWNLOADS))))
+# POST /download Idempotency-Key: aynı anahtarla gelen tekrar istek ilk işi
+# döndürür. Anahtarın saklanma süresi (sn) ve aynı anahtarla süren ilk isteğin
+# sonucunun en fazla beklenme süresi (sn)
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "10"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# POST /status ile tek istekte sorgulanabilecek iş sayısı ve
+# GET /status/{job_id}?since_version= uzun yoklamasında en uzun bekleme (sn)
+STATUS_BATCH_MAX_IDS = int(os.getenv("STATUS_BATCH_MAX_IDS", "200"))
+STATUS_LONG_POLL_MAX = float(os.getenv("STATUS_LONG_POLL_MAX", "30"))
+# /jobs sayfa boyutu: varsayılan ve en fazla
+JOBS_PAGE_SIZE = int(os.getenv("JOBS_PAGE_SIZE", "100"))
+JOBS_PAGE_MAX = int(os.getenv("JOBS_PAGE_MAX", "1000"))
+# İlerleme olayları en fazla bu aralıkla (sn) ve bu kadar % değişimle gönderilir
+EVENT_MIN_INTERVAL = float(os.getenv("EVENT_MIN_INTERVAL", "0.5"))
+EVENT_MIN_PROGRESS_DELTA = float(os.getenv("EVENT_MIN_PROGRESS_DELTA", "1.0"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+# Disk yönetimi: downloads/ için kota (0 = sınırsız), tamamlanan işlerin en uzun
+# saklanma süresi (sn, 0 = sınırsız), yeni iş kabulü için en az boş alan ve tarama aralığı
+DISK_QUOTA_BYTES = env_bytes("DISK_QUOTA_BYTES", "0")
+DOWNLOAD_MAX_AGE = float(os.getenv("DOWNLOAD_MAX_AGE", "0"))
+DISK_MIN_FREE_BYTES = env_bytes("DISK_MIN_FREE_BYTES", "512MB")
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "60"))
+# Dosyaları nginx sunsun (sendfile, Range): downloads/ klasörünü bu önekle
+# "internal" location olarak tanımlayın, örn. "/_downloads/"
+DOWNLOAD_ACCEL_REDIRECT = os.getenv("DOWNLOAD_ACCEL_REDIRECT", "")
+# Platform başına çıkarma limitleri: "platform=dakikada/eşzamanlı", örn. "instagram=10/2"
+PLATFORM_LIMITS = parse_limits(os.getenv("PLATFORM_LIMITS", ""))
+# Devre kesici: pencere (sn) içindeki son isteklerin bu oranı hata ise platform
+# COOLDOWN sn boyunca devre dışı kalır (en az MIN_REQUESTS istekten sonra)
+BREAKER_ERROR_THRESHOLD = float(os.getenv("BREAKER_ERROR_THRESHOLD", "0.5"))
+BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", "5"))
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", "300"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))
+# Geçici hatalarda (429, 5xx, zaman aşımı) iş bu kadar kez, üstel bekleme ile yeniden denenir
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "60"))
+# Worker thread'i çıkarma izni için en fazla bu kadar bekler; sonra iş ertelenir
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+# Paylaşımlı modda başka süreçte silinen işin indirmesi bu aralıkla (sn) kontrol edilip durdurulur
+CANCEL_CHECK_INTERVAL = float(os.getenv("CANCEL_CHECK_INTERVAL", "2"))
+# Tek dosyalık büyük medyada paralel bağlantı (aralık) sayısı üst sınırı ve
+# segmentli indirmenin devreye girdiği en küçük boyut; HLS/DASH parçaları da
+# en fazla bu kadar paralel iner (1 = kapalı)
+DOWNLOAD_CONNECTIONS = max(1, int(os.getenv("DOWNLOAD_CONNECTIONS", "4")))
+SEGMENTED_MIN_SIZE = env_bytes("SEGMENTED_MIN_SIZE", "8MB")
+# Ses dönüştürme (ffmpeg) havuzu: aynı anda çalışan ffmpeg süreci ve süreç başına thread
+FFMPEG_WORKERS = max(1, int(os.getenv("FFMPEG_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))))
+FFMPEG_THREADS = max(1, int(os.getenv("FFMPEG_THREADS", "1")))
+# Sayfa çıkarma süreç havuzu (0 = çıkarma API sürecinde yapılır): süreç sayısı,
+# süreç yenilenmeden önceki çıkarma sayısı, bellek tavanı ve çıkarma zaman aşımı (sn)
+EXTRACTOR_PROCESSES = max(0, int(os.getenv("EXTRACTOR_PROCESSES", "2")))
+EXTRACTOR_MAX_JOBS = max(1, int(os.getenv("EXTRACTOR_MAX_JOBS", "200")))
+EXTRACTOR_MAX_RSS = env_bytes("EXTRACTOR_MAX_RSS", "768MB")
+EXTRACTOR_TIMEOUT = float(os.getenv("EXTRACTOR_TIMEOUT", "120"))
+# İşler arasında paylaşılan HTTP bağlantı havuzları: platform başına sunucu
+# başına tutulan bağlantı ("youtube=16,tiktok=8"), boşta kalan sunucu
+# havuzunun kapanma süresi (sn) ve platform başına açık tutulan sunucu sayısı
+HTTP_POOL_SIZES = os.getenv("HTTP_POOL_SIZES", "")
+HTTP_POOL_IDLE_TIMEOUT = float(os.getenv("HTTP_POOL_IDLE_TIMEOUT", "30"))
+HTTP_POOL_MAX_HOSTS = max(1, int(os.getenv("HTTP_POOL_MAX_HOSTS", "64")))
 
 app = FastAPI(title="🎬 Linkcim Video Download API", version="2.0.0")
 security = HTTPBearer()
+START_TIME = time.time()
 
 # CORS ayarları
 app.add_middleware(
@@ -30,9 +163,39 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Rota başına gecikme (/metrics)
+app.add_middleware(RequestLatencyMiddleware)
+
+# Global job storage (kalıcı kopyası job_store'da, toplu yazılır). Kayıtlar
+# tiplidir (JobRecord); tablo durum/platform indekslerini ve oluşturma sırasını tutar
+jobs = JobTable()
+job_store = create_job_store(JOB_STORE, JOB_DB_PATH, JOB_STORE_FLUSH_INTERVAL)
+if SHARED_JOB_STATE and not isinstance(job_store, SharedJobStore):
+    raise RuntimeError("SHARED_JOB_STATE için JOB_STORE=sqlite gerekli")
+# Paylaşımlı modda bu sürecin kimliği (claim edilen işlerin sahibi)
+PROCESS_ID = uuid.uuid4().hex
 
-# Global job storage
-jobs: Dict[str, Dict[str, Any]] = {}
+# yt-dlp engelleyici (blocking) çağrıları event loop dışında bu havuzda çalışır
+download_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_DOWNLOADS,
+    thread_name_prefix="ytdlp-download",
+)
+# Thumbnail/metadata çıkarma işleri indirmelerden ayrı bir havuzda çalışır
+metadata_executor = ThreadPoolExecutor(
+    max_workers=METADATA_WORKERS,
+    thread_name_prefix="ytdlp-metadata",
+)
+# Ses dönüştürmeleri (ffmpeg) indirme worker'larını tutmadan bu havuzda çalışır
+audio_converter = AudioConverter(FFMPEG_WORKERS, FFMPEG_THREADS)
+
+# Platform başına hız sınırı ve devre kesici (süreç başına)
+platform_guard = PlatformGuard(
+    PLATFORM_LIMITS,
+    error_threshold=BREAKER_ERROR_THRESHOLD,
+    min_requests=BREAKER_MIN_REQUESTS,
+    window=BREAKER_WINDOW,
+    cooldown=BREAKER_COOLDOWN,
+)
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +207,27 @@ class DownloadRequest(BaseModel):
     format: str = "mp4"
     quality: str = "best"
     platform: Optional[str] = None
+    # "high", "normal" veya "low"; verilmezse formata göre seçilir
+    priority: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    # Oynatma listesi / çoklu video sayfası ya da URL listesi (yalnızca biri)
+    url: Optional[str] = None
+    urls: List[str] = []
+    format: str = "mp4"
+    quality: str = "best"
+    priority: Optional[str] = None
+    # Aynı anda kuyruğa verilen öğe sayısı (en fazla BATCH_CONCURRENCY)
+    concurrency: Optional[int] = None
+
+class StatusBatchRequest(BaseModel):
+    job_ids: List[str]
+    # job_id -> istemcideki son sürüm; sürümü değişmeyen işler yalnızca "unchanged" listesinde döner
+    versions: Dict[str, int] = {}
+
+class ThumbnailBatchRequest(BaseModel):
+    urls: List[str]
+    stream: bool = False
 
 class DownloadResponse(BaseModel):
     job_id: str
@@ -52,9 +236,31 @@ class DownloadResponse(BaseModel):
 
 # --- Yardımcı Fonksiyonlar ---
 def check_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    if credentials.credentials != API_KEY:
+    if credentials.credentials not in API_CLIENTS:
         raise HTTPException(status_code=401, detail="🔐 API anahtarı hatalı!")
 
+def get_api_client(http_request: Request,
+                   credentials: HTTPAuthorizationCredentials = Depends(security)) -> Tuple[str, float]:
+    """Adil sıralama için istemci kimliği ve ağırlığı.
+
+    Aynı anahtarı paylaşan uygulamalar X-Client-Id ile ayrı istemci sayılır.
+    """
+    check_api_key(credentials)
+    label, weight = API_CLIENTS[credentials.credentials]
+    return client_label(label, http_request.headers.get("x-client-id", "")), weight
+
+def client_label(label: str, client_id: str) -> str:
+    client_id = client_id.strip()[:64]
+    return f"{label}/{client_id}" if client_id else label
+
+def default_priority(format_type: str, quality: str) -> str:
+    """Ses işleri öne, en yüksek kalite (4K olabilir) videolar arkaya"""
+    if format_type in AUDIO_FORMATS:
+        return "high"
+    if quality == "best":
+        return "low"
+    return DEFAULT_PRIORITY
+
 def get_platform_from_url(url: str) -> str:
     """URL'den platform tespit et"""
     url_lower = url.lower()
@@ -71,15 +277,37 @@ def get_platform_from_url(url: str) -> str:
     else:
         return 'unknown'
 
-def get_ydl_options(job_id: str, format_type: str, quality: str) -> dict:
+# Platform başına paralellik: (tek dosya bağlantı sayısı, HLS/DASH parça sayısı).
+# TikTok CDN'i aynı dosyaya çok bağlantıda 403 verebildiği için daha temkinli.
+PLATFORM_CONNECTIONS = {
+    'youtube': (4, 4),
+    'instagram': (3, 3),
+    'tiktok': (2, 2),
+    'twitter': (4, 4),
+    'facebook': (4, 4),
+    'unknown': (4, 3),
+}
+
+# İş dosyaları iş başına klasörde durur: downloads/<id[:2]>/<id>/<id>.<ext>. Tek
+# düz klasörde on binlerce dosya varken her arama tüm klasörü tarıyordu; böylece
+# bir işin dosyalarını bulmak, silmek ve boyutunu ölçmek yalnızca kendi klasörüne bakar
+def job_dir(job_id: str) -> Path:
+    return DOWNLOAD_DIR / job_id[:2] / job_id
+
+def get_ydl_options(job_id: str, format_type: str, quality: str, platform: str = "unknown") -> dict:
     """Platform ve kaliteye göre yt-dlp seçenekleri"""
+    connections, fragments = PLATFORM_CONNECTIONS.get(platform, PLATFORM_CONNECTIONS['unknown'])
     base_opts = {
-        'outtmpl': str(DOWNLOAD_DIR / f"{job_id}.%(ext)s"),
+        'outtmpl': str(job_dir(job_id) / f"{job_id}.%(ext)s"),
         'writethumbnail': True,
         'writeinfojson': True,
-        'extractaudio': False,
         'ignoreerrors': False,
         'no_warnings': False,
+        # Büyük tek dosyalar aralıklara bölünüp paralel iner (SegmentedYoutubeDL)
+        'segmented_connections': min(connections, DOWNLOAD_CONNECTIONS),
+        'segmented_min_size': SEGMENTED_MIN_SIZE,
+        # HLS/DASH parçaları paralel iner
+        'concurrent_fragment_downloads': min(fragments, DOWNLOAD_CONNECTIONS),
     }
     
     # Format seçenekleri - daha esnek ve uyumlu
@@ -93,12 +321,12 @@ def get_ydl_options(job_id: str, format_type: str, quality: str) -> dict:
             base_opts['format'] = 'best[height<=480]/best[height<=360]/best/mp4'
         else:
             base_opts['format'] = 'best[ext=mp4]/best'
-    elif format_type == "mp3":
+    elif format_type in AUDIO_FORMATS:
+        # Yalnızca ses akışı; kopyalama/dönüştürme indirmeden sonra yapılır (audio_pipeline).
+        # final_ext: son dosya zaten varsa yt-dlp tekrar indirmez
         base_opts.update({
-            'format': 'bestaudio[ext=m4a]/bestaudio/best',
-            'extractaudio': True,
-            'audioformat': 'mp3',
-            'audioquality': '192K',
+            'format': audio_format_selector(format_type, quality),
+            'final_ext': audio_extension(format_type),
         })
     else:
         # Genel format - en uyumlu seçenekler
@@ -113,110 +341,1762 @@ def get_ydl_options(job_id: str, format_type: str, quality: str) -> dict:
     
     return base_opts
 
-async def download_worker(job_id: str, url: str, format_type: str, quality: str):
-    """Async video indirme worker'ı"""
+# Metadata çıkarmak için yt-dlp seçenekleri (indirme yok)
+METADATA_YDL_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': False,
+    'writethumbnail': False,
+    'writeinfojson': False,
+}
+
+# --- yt-dlp Motoru ---
+# yt-dlp'yi ve ona bağlı modülleri içe aktarmak, çıkarma süreçlerini başlatmak
+# soğuk başlangıcın büyük kısmıdır. Bunlar sunucu dinlemeye başladıktan sonra
+# arka planda yüklenir (load_engine). Çıkarma ve indirme yapan thread'ler
+# require_engine ile yüklenmeyi bekler. /health yt-dlp'ye dokunmaz; /ready
+# motor yüklenip çıkarma süreçleri ısınınca 200 döner.
+engine_loaded = threading.Event()
+engine_error: Optional[BaseException] = None
+# Bu süreçteki tüm YoutubeDL örnekleri (indirme, ses) bağlantıları ve platform
+# çerezlerini buradan paylaşır (http_pools.HttpPools)
+http_pools = None
+# Çıkarmalar (indirme, thumbnail, liste açma) yt-dlp'si hazır süreçlerde yapılır
+# (extractor_pool.ExtractorPool; EXTRACTOR_PROCESSES=0 ise None kalır)
+extractor_pool = None
+engine_ready = False
+# Başlangıç aşamalarının süreleri (sn): import, startup, serving (süreç
+# başlangıcından dinlemeye), engine_load, extractor_warm, ready
+STARTUP_TIMINGS: Dict[str, float] = {}
+
+def process_age() -> Optional[float]:
+    """Süreç başlangıcından bu yana geçen süre (Linux dışında None)"""
     try:
-        jobs[job_id] = {
-            "status": "starting",
-            "progress": 0,
-            "url": url,
-            "platform": get_platform_from_url(url),
-            "format": format_type,
-            "quality": quality,
-            "created_at": time.time(),
-            "file_path": None,
-            "file_size": 0,
-            "duration": None,
-            "title": None,
-            "thumbnail": None,
-            "error": None
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return round(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 3)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def load_engine():
+    """yt-dlp'yi ve havuzları yükle, çıkarma süreçlerini başlatıp ısınmalarını bekle (thread'de)"""
+    global http_pools, extractor_pool, engine_error, engine_ready
+    started = time.perf_counter()
+    try:
+        from http_pools import HttpPools, install, parse_pool_sizes
+        # İlk indirme modül yüklemesini beklemesin
+        import segmented_download  # noqa: F401
+        http_settings = {
+            "pool_sizes": parse_pool_sizes(HTTP_POOL_SIZES),
+            "idle_timeout": HTTP_POOL_IDLE_TIMEOUT,
+            "max_hosts": HTTP_POOL_MAX_HOSTS,
         }
+        http_pools = install(HttpPools(**http_settings))
+        if not audio_converter.available:
+            logger.warning("⚠️ ffmpeg bulunamadı, ses dönüştürme yapılamayacak")
+        if EXTRACTOR_PROCESSES:
+            from extractor_pool import ExtractorPool
+            extractor_pool = ExtractorPool(
+                EXTRACTOR_PROCESSES, {"metadata": METADATA_YDL_OPTS},
+                max_jobs=EXTRACTOR_MAX_JOBS, max_rss=EXTRACTOR_MAX_RSS, timeout=EXTRACTOR_TIMEOUT,
+                http_settings=http_settings,
+            )
+            extractor_pool.start()
+    except Exception as e:
+        engine_error = e
+        logger.error(f"❌ yt-dlp yüklenemedi: {e}")
+        return
+    finally:
+        STARTUP_TIMINGS["engine_load"] = round(time.perf_counter() - started, 3)
+        engine_loaded.set()
+    if extractor_pool is not None:
+        warm_started = time.perf_counter()
+        extractor_pool.wait_warm()
+        STARTUP_TIMINGS["extractor_warm"] = round(time.perf_counter() - warm_started, 3)
+    engine_ready = True
+    age = process_age()
+    if age is not None:
+        STARTUP_TIMINGS["ready"] = age
+    logger.info(f"✅ yt-dlp hazır ({STARTUP_TIMINGS['engine_load']:.2f} sn yükleme, "
+                f"{STARTUP_TIMINGS.get('extractor_warm', 0):.2f} sn ısınma)")
+
+def require_engine():
+    """Motor yüklenene kadar bekle (indirme ve metadata thread'lerinde çağrılır)"""
+    engine_loaded.wait()
+    if engine_error is not None:
+        raise RuntimeError(f"yt-dlp yüklenemedi: {engine_error}")
+
+# Önbellek anahtarında yok sayılan takip parametreleri
+TRACKING_PARAMS = {
+    'si', 'feature', 'igshid', 'igsh', 'fbclid', 'gclid', 'is_from_webapp',
+    'sender_device', 'share_id', 'ref', 'ref_src', 't', 'pp',
+}
+
+def normalize_url(url: str) -> str:
+    """Aynı videoyu gösteren URL'leri tek bir önbellek anahtarına indirger"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    port = f":{parts.port}" if parts.port else ''
+    for prefix in ('www.', 'm.', 'mobile.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = parts.path.rstrip('/') or '/'
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith('utm_')
+    ]
+    
+    # youtu.be/ID ve /shorts/ID -> youtube.com/watch?v=ID
+    if host == 'youtu.be' and path != '/':
+        query.insert(0, ('v', path.lstrip('/')))
+        host, path = 'youtube.com', '/watch'
+    elif host == 'youtube.com' and path.startswith('/shorts/'):
+        query.insert(0, ('v', path[len('/shorts/'):]))
+        path = '/watch'
+    elif host in ('twitter.com', 'x.com'):
+        host = 'x.com'
+        query = [(k, v) for k, v in query if k != 's']
+    
+    return urlunsplit((scheme, host + port, path, urlencode(sorted(query)), ''))
+
+def pick_best_thumbnail(info: Dict[str, Any]) -> Optional[str]:
+    """En yüksek çözünürlüklü thumbnail URL'sini seç"""
+    thumbnails = [t for t in (info.get('thumbnails') or []) if t.get('url')]
+    if thumbnails:
+        # Width ve height'a göre sırala
+        thumbnails_sorted = sorted(thumbnails,
+                                   key=lambda x: (x.get('width') or 0) * (x.get('height') or 0),
+                                   reverse=True)
+        return thumbnails_sorted[0]['url']
+    return info.get('thumbnail')
+
+def extract_page(url: str, check: Optional[Callable[[], None]] = None) -> Tuple[Dict[str, Any], List[Any]]:
+    """Sayfayı çıkar (havuz açıksa ayrı süreçte): (ham bilgi, extractor çerezleri).
+
+    Liste öğeleri en fazla BATCH_MAX_ITEMS + 1 kadar okunur.
+    """
+    require_engine()
+    if extractor_pool is not None:
+        return extractor_pool.extract(url, "metadata", BATCH_MAX_ITEMS + 1, check)
+    import yt_dlp
+    from extractor_pool import extract_raw_info, read_entries
+    with yt_dlp.YoutubeDL(METADATA_YDL_OPTS) as ydl:
+        ydl.cookiejar = http_pools.cookiejar(get_platform_from_url(url))
+        info = read_entries(extract_raw_info(ydl, url), BATCH_MAX_ITEMS + 1)
+        return info, list(ydl.cookiejar)
+
+def build_metadata(info: Dict[str, Any], cookies: List[Any] = ()) -> Dict[str, Any]:
+    """Önbellekte tutulan kayıt: ham yt-dlp bilgisi, çerezler ve özet alanlar"""
+    return {
+        "info": info,
+        # Çıkarmada ayarlanan çerezler indirmeyi yapan YoutubeDL'e eklenir
+        "cookies": list(cookies),
+        "thumbnail_url": pick_best_thumbnail(info),
+        "title": info.get('title', 'Bilinmiyor'),
+        "duration": info.get('duration', 0),
+        "uploader": info.get('uploader', 'Bilinmiyor'),
+    }
+
+class ExtractionAbandoned(Exception):
+    """Çıkarmanın sahibi vazgeçti (ör. işi iptal edildi).
+
+    Sahibe özeldir: bekleyen diğer çağıranlara hata olarak geçmez, onlar
+    çıkarmayı yeniden ister.
+    """
+
+class MetadataCache:
+    """URL bazlı, TTL ve LRU ile sınırlı metadata önbelleği.
+
+    Aynı URL için eş zamanlı istekler tek bir çıkarma işini (Future) paylaşır.
+    Thread'lerden (indirme worker'ları) ve event loop'tan kullanılabilir.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        if time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """(future, sahip_mi): sahip olan çağıran çıkarma işini çalıştırmalıdır"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self.hits += 1
+                CACHE_LOOKUPS.labels("metadata", "hit").inc()
+                future: Future = Future()
+                future.set_result(value)
+                return future, False
+            if key in self._inflight:
+                self.coalesced += 1
+                CACHE_LOOKUPS.labels("metadata", "coalesced").inc()
+                return self._inflight[key], False
+            self.misses += 1
+            CACHE_LOOKUPS.labels("metadata", "miss").inc()
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _run(self, key: str, future: Future, extract: Callable[[], Tuple[Dict[str, Any], List[Any]]]):
+        try:
+            value = build_metadata(*extract())
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+        else:
+            self.put(key, value)
+            self._finish(key)
+            future.set_result(value)
+
+    def _finish(self, key: str):
+        # Sonuç bildirilmeden önce: uyanan bekleyen aynı Future'ı yeniden almasın
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def get_or_extract(self, url: str, extract: Callable[[], Tuple[Dict[str, Any], List[Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """Bloklayan sürüm (worker thread'leri için): (kayıt, önbellekten_mi)
+
+        Sahip çıkarmadan vazgeçerse (ExtractionAbandoned) hata yalnızca ona
+        döner; bekleyenler çıkarmayı yeniden ister.
+        """
+        key = normalize_url(url)
+        while True:
+            future, owner = self._claim(key)
+            if owner:
+                self._run(key, future, extract)
+            try:
+                return future.result(), not owner
+            except ExtractionAbandoned:
+                if owner:
+                    raise
+
+    async def aget_or_extract(self, url: str, extract: Callable[[], Tuple[Dict[str, Any], List[Any]]],
+                              executor: ThreadPoolExecutor) -> Dict[str, Any]:
+        """Event loop sürümü: çıkarma işi verilen havuzda çalışır"""
+        key = normalize_url(url)
+        while True:
+            future, owner = self._claim(key)
+            if owner:
+                executor.submit(self._run, key, future, extract)
+            try:
+                return await asyncio.wrap_future(future)
+            except ExtractionAbandoned:
+                if owner:
+                    raise
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+metadata_cache = MetadataCache(METADATA_CACHE_SIZE, METADATA_CACHE_TTL)
+
+def fetch_metadata(url: str) -> Tuple[Dict[str, Any], List[Any]]:
+    """Metadata havuzunda çalışan bağımsız çıkarma işi.
+
+    İstek beklediği için geçici hatalar kısa aralıklarla en fazla iki kez denenir.
+    """
+    platform = get_platform_from_url(url)
+    attempts = min(RETRY_MAX_ATTEMPTS, 2)
+    for attempt in range(attempts + 1):
+        try:
+            with platform_guard.extraction(platform, RATE_LIMIT_MAX_WAIT):
+                result = extract_page(url)
+        except Exception as e:
+            if platform_guard.record(platform, e) != "transient" or attempt == attempts:
+                raise
+            time.sleep(backoff_delay(attempt, RETRY_BASE_DELAY / 4, RETRY_BASE_DELAY * 2))
+            continue
+        platform_guard.record(platform)
+        return result
+
+# Bu durumlardan sonra iş için yeni olay gelmez
+TERMINAL_STATUSES = {"completed", "failed"}
+
+class JobEventHub:
+    """İş durum değişikliklerini SSE/WebSocket abonelerine dağıtır.
+
+    publish() worker thread'lerinden çağrılır; olaylar event loop'a
+    call_soon_threadsafe ile aktarılır. Durum değişiklikleri hemen,
+    ilerleme güncellemeleri ise EVENT_MIN_INTERVAL / EVENT_MIN_PROGRESS_DELTA
+    sınırlarıyla seyreltilerek gönderilir.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # job_id -> (son gönderim zamanı, son durum, son ilerleme)
+        self._last_sent: Dict[str, Tuple[float, str, float]] = {}
+        # Başka süreçlerdeki işler için son görülen (durum, ilerleme)
+        self._remote_seen: Dict[str, Tuple[Any, Any]] = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self, job_id: str, queue: asyncio.Queue):
+        self._subscribers.setdefault(job_id, set()).add(queue)
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            self._subscribers.pop(job_id, None)
+            self._last_sent.pop(job_id, None)
+            self._remote_seen.pop(job_id, None)
+
+    def publish(self, job_id: str, job: Optional[Dict[str, Any]], force: bool = False):
+        """İş değişikliğini bildir; job None ise iş silinmiştir"""
+        if self._loop is None or job_id not in self._subscribers:
+            return
+        if job is None:
+            self._loop.call_soon_threadsafe(self._dispatch, job_id, None)
+            return
+        status = job.get("status", "unknown")
+        progress = job.get("progress") or 0
+        now = time.monotonic()
+        last = self._last_sent.get(job_id)
+        if not force and last is not None and last[1] == status:
+            last_time, _, last_progress = last
+            if (now - last_time < EVENT_MIN_INTERVAL
+                    or abs(progress - last_progress) < EVENT_MIN_PROGRESS_DELTA):
+                return
+        self._last_sent[job_id] = (now, status, progress)
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch, job_id, job)
+        except RuntimeError:
+            # Loop kapanmış (shutdown)
+            pass
+
+    async def watch_remote(self):
+        """Paylaşımlı modda başka süreçlerde çalışan işleri depodan izle"""
+        while True:
+            await asyncio.sleep(EVENT_MIN_INTERVAL)
+            remote = [job_id for job_id in self._subscribers if job_id not in jobs]
+            if not remote:
+                continue
+            try:
+                found = await asyncio.to_thread(job_store.get_many, remote)
+            except Exception as e:
+                logger.warning(f"⚠️ Uzak iş durumu okunamadı: {e}")
+                continue
+            for job_id in remote:
+                job = found.get(job_id)
+                seen = None if job is None else (job.get("status"), job.get("progress"))
+                if job is not None and self._remote_seen.get(job_id) == seen:
+                    continue
+                self._remote_seen[job_id] = seen
+                self._dispatch(job_id, job)
+
+    def _dispatch(self, job_id: str, job: Optional[Dict[str, Any]]):
+        subscribers = self._subscribers.get(job_id)
+        if not subscribers:
+            return
+        if job is None:
+            event = (job_id, "deleted", {"job_id": job_id, "status": "deleted"})
+        else:
+            view = job_status_view(job_id, job)
+            name = view["status"] if view["status"] in TERMINAL_STATUSES else "progress"
+            event = (job_id, name, view)
+        for queue in list(subscribers):
+            if queue.full():
+                # Yavaş istemci: en eski olayı at, son durum her zaman iletilsin
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+job_events = JobEventHub()
+
+def update_job(job_id: str, changes: Dict[str, Any]):
+    """İş kaydını güncelle ve olay abonelerine bildir (thread-safe)"""
+    job = jobs.get(job_id)
+    if job is None:
+        return
+    with dedupe_lock:
+        # Sürüm: /status ETag'i ve since_version uzun yoklaması bununla değişikliği anlar
+        job.update({**changes, "version": (job.get("version") or 0) + 1})
+        followers = list(file_refs.get(job_id, ()))
+    job_store.mark_dirty(job_id)
+    job_events.publish(job_id, job)
+    
+    # Bu işe bağlanan tekrar istekleri aynı ilerlemeyi görür
+    if followers:
+        mirrored = {key: value for key, value in changes.items() if key not in JOB_IDENTITY_FIELDS}
+        for follower_id in followers:
+            update_job(follower_id, mirrored)
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Bu süreçteki iş kaydı; paylaşımlı modda yoksa depodaki kopya"""
+    job = jobs.get(job_id)
+    if job is None and SHARED_JOB_STATE:
+        job = job_store.get(job_id)
+    if job is not None and job.get("detached"):
+        # Silinmiş ama dosyası başka işlerce kullanılan kayıt
+        return None
+    return job
+
+def get_jobs(job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Birden fazla iş; paylaşımlı modda bu süreçte olmayanlar depodan tek sorguyla"""
+    found = {job_id: job for job_id, job in ((job_id, jobs.get(job_id)) for job_id in job_ids) if job is not None}
+    missing = [job_id for job_id in job_ids if job_id not in found]
+    if missing and SHARED_JOB_STATE:
+        found.update(job_store.get_many(missing))
+    return {job_id: job for job_id, job in found.items() if not job.get("detached")}
+
+def all_jobs(include_detached: bool = False) -> Dict[str, Dict[str, Any]]:
+    snapshot = job_store.load_all() if SHARED_JOB_STATE else dict(jobs.items())
+    if include_detached:
+        return snapshot
+    return {job_id: job for job_id, job in snapshot.items() if not job.get("detached")}
+
+def count_jobs_by_status() -> Dict[str, int]:
+    """Durum başına iş sayısı (bellekte indeksten, paylaşımlı modda depodan)"""
+    if SHARED_JOB_STATE:
+        return job_store.count_by_status()
+    return jobs.count_by_status()
+
+def count_jobs_by_platform() -> Dict[str, int]:
+    if SHARED_JOB_STATE:
+        return job_store.count_by_platform()
+    return jobs.count_by_platform()
+
+def touch_job(job_id: str, job: Dict[str, Any]):
+    """Son indirme zamanını güncelle (paylaşımlı modda bitmiş işler depoda)"""
+    now = time.time()
+    if now - (job.get("last_accessed_at") or 0) < 60:
+        # Oynatıcıların ardışık Range istekleri her seferinde yazılmasın
+        return
+    if job_id in jobs:
+        update_job(job_id, {"last_accessed_at": now})
+    elif SHARED_JOB_STATE:
+        job_store.write_now(job_id, {**job, "last_accessed_at": now})
+
+def snapshot_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Depoya yazılacak kopya; worker thread'leri yazarken de güvenli"""
+    job = jobs.get(job_id)
+    if job is None:
+        return None
+    job = dict(job)
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in job.items()}
+
+def job_status_view(job_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+    """/status ve olay akışlarında dönen iş görünümü"""
+    job = job.copy()
+    # Sürümden önce oluşturulmuş kayıtlar
+    job.setdefault("version", 0)
+    
+    # Kuyruk bilgisi: sıra ve bekleme süresi
+    queued_at = job.get("queued_at") or job.get("created_at")
+    if job["status"] == "queued":
+        job["queue_position"] = job_queue.position(job.get("source_job") or job_id)
+        job["wait_time"] = round(time.time() - queued_at, 3)
+        if job.get("not_before"):
+            # Ertelenmiş iş (hız sınırı / yeniden deneme)
+            job["retry_in"] = round(max(0.0, job["not_before"] - time.time()), 1)
+    else:
+        job["queue_position"] = None
+        started_at = job.get("started_at")
+        job["wait_time"] = round(started_at - queued_at, 3) if started_at else None
+    
+    # İlerleme sayısal saklanır; okunur metinler yalnızca yanıtta üretilir
+    if "speed_bps" in job:
+        job.update(format_progress(job))
+    
+    # Hassas bilgileri temizle
+    if "error" in job and job["error"]:
+        job["error"] = str(job["error"])[:200]  # Hata mesajını kısalt
+    
+    return job
+
+def status_etag(view: Dict[str, Any]) -> str:
+    """Zayıf ETag: iş sürümü, kuyruktaki işte ayrıca sıra (sürüm artmadan değişir)"""
+    tag = str(view.get("version") or 0)
+    if view.get("queue_position") is not None:
+        tag += f".{view['queue_position']}"
+    return f'W/"{tag}"'
+
+def format_progress(job: Dict[str, Any]) -> Dict[str, str]:
+    """Sayısal ilerleme alanlarının okunur biçimi (eski yanıt alanları)"""
+    from yt_dlp.downloader.common import FileDownloader
+    from yt_dlp.utils import format_bytes
+    total = job.get("total_bytes")
+    return {
+        "speed": FileDownloader.format_speed(job.get("speed_bps")).strip() if job.get("speed_bps") else "N/A",
+        "eta": FileDownloader.format_eta(job.get("eta_seconds")).strip() if job.get("eta_seconds") is not None else "N/A",
+        "downloaded": format_bytes(job.get("downloaded_bytes")),
+        "total": format_bytes(total) if total else "N/A",
+    }
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+class JobQueue:
+    """Öncelikli, istemciler arasında adil indirme kuyruğu (fair_queue).
+
+    Worker'lar sıradaki işi alır; bekleyen işlerin tahmini sırası /status
+    yanıtındaki kuyruk pozisyonu için hesaplanır.
+    """
+
+    def __init__(self):
+        self._pending = FairQueue()
+        self._available = asyncio.Semaphore(0)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._pending
+
+    def put(self, job_id: str, job: Optional[Dict[str, Any]] = None):
+        job = job or jobs.get(job_id) or {}
+        self._pending.push(
+            job_id,
+            job.get("client") or "default",
+            job.get("client_weight") or 1.0,
+            job.get("priority") or DEFAULT_PRIORITY,
+        )
+        self._available.release()
+
+    async def get(self) -> str:
+        while True:
+            await self._available.acquire()
+            # remove() ile çıkarılan işler fazladan izin bırakabilir
+            job_id = self._pending.pop()
+            if job_id is not None:
+                return job_id
+
+    def remove(self, job_id: str) -> bool:
+        return self._pending.remove(job_id)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1'den başlayan kuyruk sırası, kuyrukta değilse None"""
+        return self._pending.position(job_id)
+
+class SharedJobQueue:
+    """Süreçler arası paylaşılan kuyruk (SHARED_JOB_STATE).
+
+    Kuyruk, depodaki 'queued' durumundaki işlerdir; worker'lar sıradaki işi
+    atomik olarak claim eder ve işi bu sürecin `jobs` sözlüğüne alır.
+    """
+
+    def __init__(self, owner: str):
+        self._owner = owner
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return job_store.count_queued()
+
+    def put(self, job_id: str, job: Optional[Dict[str, Any]] = None):
+        # Kayıt zaten depoda; bu süreçteki boşta worker'ları uyandır
+        self._wakeup.set()
+
+    async def get(self) -> str:
+        while True:
+            claimed = await asyncio.to_thread(job_store.claim_next, self._owner)
+            if claimed is not None:
+                job_id, job = claimed
+                jobs[job_id] = JobRecord.from_dict(job)
+                return job_id
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), SHARED_QUEUE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def remove(self, job_id: str) -> bool:
+        # Depodan silinen iş claim edilemez
+        return False
+
+    def position(self, job_id: str) -> Optional[int]:
+        return job_store.queue_position(job_id)
+
+job_queue = SharedJobQueue(PROCESS_ID) if SHARED_JOB_STATE else JobQueue()
+worker_tasks: List[asyncio.Task] = []
+background_tasks: List[asyncio.Task] = []
+active_workers = 0
+
+def new_job(url: str, format_type: str, quality: str, platform: str, client: str = "default",
+            client_weight: float = 1.0, priority: str = DEFAULT_PRIORITY) -> JobRecord:
+    """Kuyruğa alınan iş için başlangıç kaydı"""
+    now = time.time()
+    return JobRecord({
+        "status": "queued",
+        "progress": 0,
+        "url": url,
+        "platform": platform,
+        "format": format_type,
+        "quality": quality,
+        "client": client,
+        "client_weight": client_weight,
+        "priority": priority,
+        "created_at": now,
+        "queued_at": now,
+        "started_at": None,
+        "file_path": None,
+        "file_size": 0,
+        "duration": None,
+        "title": None,
+        "thumbnail": None,
+        "error": None,
+        "version": 1,
+    })
+
+# --- Tekrarlanan İçerik (Dedupe) ---
+# Aynı URL + format + kalite için dosya bir kez indirilir. Dosyayı indiren iş
+# "sahip" (holder) olur; tekrar istekleri source_job ile ona bağlanır ve
+# ilerlemesini izler. Dosya, ona referans veren son iş silinince silinir.
+content_index: Dict[str, str] = {}    # içerik anahtarı -> sahip iş
+file_refs: Dict[str, Set[str]] = {}   # sahip iş -> bağlı işler
+dedupe_lock = threading.Lock()
+
+# Bağlı işe sahipten kopyalanmayan alanlar
+JOB_IDENTITY_FIELDS = {
+    "url", "platform", "created_at", "queued_at", "last_accessed_at",
+    "url_key", "video_key", "source_job", "deduplicated", "detached", "recovered",
+    "client", "client_weight", "priority", "batch_id", "playlist_item", "version",
+}
+
+def url_content_key(url: str, format_type: str, quality: str) -> str:
+    return f"url:{normalize_url(url)}|{format_type}|{quality}"
+
+def video_content_key(info: Dict[str, Any], format_type: str, quality: str) -> Optional[str]:
+    """Extractor'ın video kimliği: farklı URL biçimleri aynı videoya çıkar"""
+    extractor = info.get("extractor_key") or info.get("ie_key")
+    if not extractor or not info.get("id"):
+        return None
+    return f"id:{extractor}:{info['id']}|{format_type}|{quality}"
+
+def content_keys_for(url: str, format_type: str, quality: str) -> List[str]:
+    """İstek için bilinen anahtarlar; metadata önbellekteyse video kimliği de"""
+    keys = [url_content_key(url, format_type, quality)]
+    metadata = metadata_cache.get(normalize_url(url))
+    if metadata is not None:
+        video_key = video_content_key(metadata["info"], format_type, quality)
+        if video_key:
+            keys.append(video_key)
+    return keys
+
+def job_file_exists(job: Dict[str, Any]) -> bool:
+    file_path = job.get("file_path")
+    return bool(file_path) and Path(file_path).exists()
+
+def find_reusable_job(keys: List[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Aynı içeriği tamamlamış veya indirmekte olan sahip işi bul"""
+    if SHARED_JOB_STATE:
+        # Süreçler arası yalnızca tamamlanmış dosyalar paylaşılır
+        found = job_store.find_completed(keys)
+        return found if found and job_file_exists(found[1]) else None
+    for key in keys:
+        holder_id = content_index.get(key)
+        holder = jobs.get(holder_id) if holder_id else None
+        if holder is not None and reusable_holder(holder):
+            return holder_id, holder
+    return None
+
+def reusable_holder(holder: Dict[str, Any]) -> bool:
+    """Sahip iş yeni isteklere dosya verebilir mi (başarısız veya dosyası silinmiş değil)"""
+    if holder["status"] == "failed":
+        return False
+    return holder["status"] != "completed" or job_file_exists(holder)
+
+def attach_job(job_id: str, job: Dict[str, Any], holder_id: str, holder: Dict[str, Any]):
+    """Yeni işi sahibin dosyasına ve (sürüyorsa) ilerlemesine bağla"""
+    with dedupe_lock:
+        job.update({key: value for key, value in holder.items() if key not in JOB_IDENTITY_FIELDS})
+        job.update({"source_job": holder_id, "deduplicated": True})
+        if not SHARED_JOB_STATE:
+            file_refs.setdefault(holder_id, set()).add(job_id)
+    if holder["status"] == "completed":
+        job.update({"completed_at": time.time(), "message": "♻️ Daha önce indirilmiş dosya kullanıldı"})
+
+def register_content_key(job_id: str, key: str):
+    """Sahip işi bir içerik anahtarıyla eşle (varsa çalışan/tamamlanmış eşleşmeyi koru)"""
+    with dedupe_lock:
+        current = jobs.get(content_index.get(key, ""))
+        if current is None or not reusable_holder(current):
+            content_index[key] = job_id
+
+def drop_content_keys(holder_id: str):
+    with dedupe_lock:
+        for key in [key for key, value in content_index.items() if value == holder_id]:
+            del content_index[key]
+        file_refs.pop(holder_id, None)
+
+def job_refs(holder_id: str) -> Set[str]:
+    """Sahibin dosyasını kullanan işler (sahip kaydı dahil)"""
+    if SHARED_JOB_STATE:
+        return set(job_store.find_refs(holder_id))
+    refs = set(file_refs.get(holder_id, ()))
+    if holder_id in jobs:
+        refs.add(holder_id)
+    return refs
+
+async def download_worker_loop(worker_no: int):
+    """Kuyruktan iş alıp indirme havuzunda çalıştıran worker"""
+    global active_workers
+    loop = asyncio.get_running_loop()
+    while True:
+        # Disk dolmak üzereyken işler kuyrukta bekler
+        await wait_for_free_space()
+        job_id = await job_queue.get()
+        job = jobs.get(job_id)
+        if job is None:
+            # Kuyrukta beklerken silinmiş
+            continue
+        retry_delay = admit_job(job_id, job)
+        if retry_delay is None:
+            active_workers += 1
+            ACTIVE_WORKERS.inc()
+            try:
+                retry_delay = await loop.run_in_executor(
+                    download_executor,
+                    download_worker,
+                    job_id,
+                    job["url"],
+                    job["format"],
+                    job["quality"],
+                )
+            except Exception as e:
+                logger.error(f"❌ Worker {worker_no} hatası: {job_id} - {e}")
+            finally:
+                active_workers -= 1
+                ACTIVE_WORKERS.dec()
+        if retry_delay and not SHARED_JOB_STATE:
+            # Paylaşımlı modda ertelenen işi not_before süresi dolunca herhangi bir süreç alır
+            loop.call_later(retry_delay, requeue_job, job_id)
+        
+        if SHARED_JOB_STATE and job_id not in transcoding_jobs:
+            # Dönüştürülen ses işleri dönüştürme bitince bırakılır
+            await asyncio.to_thread(release_shared_job, job_id)
+
+def release_shared_job(job_id: str):
+    """Son durumu hemen yaz ve işi diğer süreçlerle aynı şekilde depodan sun"""
+    job = snapshot_job(job_id)
+    if job is not None:
+        try:
+            job_store.write_now(job_id, job)
+        except Exception as e:
+            logger.error(f"❌ İş durumu yazılamadı: {job_id} - {e}")
+            job_store.mark_dirty(job_id)
+            return
+    jobs.pop(job_id, None)
+
+def admit_job(job_id: str, job: Dict[str, Any]) -> Optional[float]:
+    """İş şimdi çalışabilir mi? None: çalıştır; >0: bu kadar sn ertelendi; 0: başarısız oldu.
+
+    Platform devre dışıysa iş beklemeden başarısız olur. Hız sınırındaysa worker
+    meşgul edilmeden ertelenir (önbellekteki metadata çıkarma gerektirmez).
+    """
+    platform = job.get("platform") or "unknown"
+    try:
+        if metadata_cache.get(normalize_url(job["url"])) is not None:
+            platform_guard.ensure_available(platform)
+            return None
+        delay = platform_guard.check(platform)
+    except PlatformUnavailable as e:
+        update_job(job_id, {
+            "status": "failed",
+            "error": str(e),
+            "message": "⚡ Platform geçici olarak devre dışı",
+            "retry_after": round(e.retry_after, 1),
+            "failed_at": time.time(),
+        })
+        JOBS_FINISHED.labels(platform, "failed").inc()
+        return 0.0
+    if delay <= 0:
+        return None
+    defer_job(job_id, delay, f"⏳ {platform} hız sınırı, sırada bekliyor")
+    return delay
+
+def defer_job(job_id: str, delay: float, message: str, changes: Optional[Dict[str, Any]] = None):
+    """İşi kuyruğa geri koy; delay sn dolmadan alınmaz"""
+    update_job(job_id, {
+        "status": "queued",
+        "started_at": None,
+        "not_before": time.time() + delay,
+        "message": message,
+        **(changes or {}),
+    })
+
+def requeue_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is not None and job["status"] == "queued" and job_id not in job_queue:
+        job_queue.put(job_id, job)
+
+MEDIA_EXTENSIONS = ['.mp4', '.webm', '.mkv', '.avi', '.mov', '.mp3', '.m4a', '.opus']
+THUMBNAIL_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp']
+
+# Tek parça, doğrudan yazılan indirmeler; parçalı (HLS/DASH) akışlar sonradan düzeltilebilir
+PROGRESSIVE_PROTOCOLS = {"http", "https"}
+
+def is_progressive_download(info: Dict[str, Any], ydl_opts: Dict[str, Any]) -> bool:
+    """İndirilen .part dosyası, son dosyanın kendisi mi?
+
+    Birleştirme (video+ses), son işlem (ör. ses dönüştürme) veya DASH
+    düzeltmesi gerekiyorsa son dosya indirme bittikten sonra oluşur.
+    """
+    return (
+        not info.get("requested_formats")
+        and info.get("protocol") in PROGRESSIVE_PROTOCOLS
+        and not str(info.get("container") or "").endswith("_dash")
+        and not ydl_opts.get("postprocessors")
+        # Ses işlerinde indirilen dosya sonradan kopyalanır/dönüştürülür
+        and not ydl_opts.get("final_ext")
+        # Aralıklar paralel yazılır; dosyanın başı sona kadar tamamlanmayabilir
+        and not info.get("segmented")
+    )
+
+def find_job_media(job_id: str, format_type: Optional[str] = None) -> Optional[Path]:
+    """İş klasöründeki medya dosyası ({job_id}.<ext>); ara/yarım dosyalar sayılmaz.
+
+    İndirme sonucu kaydedilen yolu kullanır; bu yalnızca yolu bilinmeyen işler
+    (yeniden başlatmada yarım kalanlar) içindir. format_type verilirse ses
+    işlerinde yalnızca dönüştürülmüş son dosya döner.
+    """
+    final_ext = audio_extension(format_type) if format_type else None
+    try:
+        entries = list(os.scandir(job_dir(job_id)))
+    except FileNotFoundError:
+        return None
+    for entry in entries:
+        file = Path(entry.path)
+        if file.stem == job_id and file.suffix.lower() in MEDIA_EXTENSIONS:
+            if final_ext is None or file.suffix.lower() == f".{final_ext}":
+                return file
+    return None
+
+def written_thumbnail(info: Dict[str, Any]) -> Optional[str]:
+    """yt-dlp'nin yazdığı thumbnail dosyası (liste sonucunda öğelerde aranır)"""
+    for thumbnail in info.get('thumbnails') or ():
+        if thumbnail.get('filepath') and Path(thumbnail['filepath']).suffix.lower() in THUMBNAIL_EXTENSIONS:
+            return thumbnail['filepath']
+    for entry in info.get('entries') or ():
+        found = written_thumbnail(entry) if isinstance(entry, dict) else None
+        if found:
+            return found
+    return None
+
+# --- İptal ---
+# Silinen işin süren indirmesi ilerleme kancasında DownloadAborted ile
+# durdurulur (segmented_download)
+running_downloads: Set[str] = set()
+cancelled_downloads: Set[str] = set()
+
+def cancel_download(job_id: str) -> bool:
+    """Bu süreçte çalışan indirmeyi durdur (paylaşımlı modda diğer süreçler
+    kaydın silindiğini CANCEL_CHECK_INTERVAL içinde fark eder)"""
+    if job_id in running_downloads:
+        cancelled_downloads.add(job_id)
+        return True
+    return False
+
+def download_worker(job_id: str, url: str, format_type: str, quality: str) -> Optional[float]:
+    """Video indirme worker'ı (indirme havuzundaki bir thread'de çalışır).
+
+    Geçici bir hatayla ertelenen iş için yeniden deneme gecikmesini döndürür.
+    """
+    require_engine()
+    from segmented_download import DownloadAborted, SegmentedYoutubeDL
+    # Aşama süreleri (saniye): kuyruk, sayfa çıkarma, indirme, son işlem
+    timings: Dict[str, float] = {}
+    stage_marks: Dict[str, float] = {}
+    platform = jobs.get(job_id, {}).get("platform") or "unknown"
+    # Toplu işteki liste öğesi: URL listenin kendisidir, yalnızca bu öğe indirilir
+    playlist_item = jobs.get(job_id, {}).get("playlist_item")
+    last_cancel_check = time.time()
+    
+    def check_cancelled(*_):
+        nonlocal last_cancel_check
+        if job_id in cancelled_downloads:
+            raise DownloadAborted()
+        if SHARED_JOB_STATE and time.time() - last_cancel_check >= CANCEL_CHECK_INTERVAL:
+            last_cancel_check = time.time()
+            if job_store.get(job_id) is None:
+                raise DownloadAborted()
+    
+    running_downloads.add(job_id)
+    try:
+        started_at = time.time()
+        job = jobs[job_id]
+        timings["queue"] = round(started_at - (job.get("queued_at") or started_at), 3)
+        update_job(job_id, {
+            "status": "starting",
+            "started_at": started_at,
+            "timings": timings,
+        })
         
         logger.info(f"🚀 İndirme başlatılıyor: {job_id} - {url}")
         
         def progress_hook(d):
+            check_cancelled()
             if d['status'] == 'downloading':
+                if "download_start" not in stage_marks:
+                    stage_marks["download_start"] = time.time()
+                    # /stream bu dosyayı indirme sürerken okuyabilir mi?
+                    info = d.get('info_dict') or {}
+                    update_job(job_id, {
+                        "stream_path": d.get('tmpfilename') or d.get('filename'),
+                        "stream_ext": info.get('ext'),
+                        "stream_size": d.get('total_bytes'),
+                        "streamable": is_progressive_download(info, ydl_opts),
+                        # Sayfa bilgisi listeye aittir; öğenin bilgisi burada gelir
+                        **({
+                            "title": info.get('title') or job.get("title"),
+                            "duration": info.get('duration'),
+                            "uploader": info.get('uploader'),
+                        } if playlist_item else {}),
+                    })
                 try:
-                    percent_str = d.get('_percent_str', '0%').replace('%', '')
-                    percent = float(percent_str) if percent_str.replace('.', '').isdigit() else 0
-                    jobs[job_id].update({
+                    downloaded = d.get('downloaded_bytes') or 0
+                    total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                    if total:
+                        percent = min(100.0, downloaded * 100 / total)
+                    elif d.get('fragment_count'):
+                        # Boyutu bilinmeyen parçalı (HLS) indirme
+                        percent = (d.get('fragment_index') or 0) * 100 / d['fragment_count']
+                    else:
+                        percent = 0
+                    update_job(job_id, {
                         "status": "downloading",
-                        "progress": percent,
-                        "speed": d.get('_speed_str', 'N/A'),
-                        "eta": d.get('_eta_str', 'N/A'),
-                        "downloaded": d.get('_downloaded_bytes_str', 'N/A'),
-                        "total": d.get('_total_bytes_str', 'N/A')
+                        "progress": round(percent, 1),
+                        "speed_bps": d.get('speed'),
+                        "eta_seconds": d.get('eta'),
+                        "downloaded_bytes": downloaded,
+                        "total_bytes": total,
                     })
                 except Exception as e:
                     logger.error(f"Progress güncelleme hatası: {e}")
             elif d['status'] == 'finished':
-                jobs[job_id].update({
+                # Birleştirilecek formatlarda birden fazla 'finished' gelir; sonuncusu geçerli
+                stage_marks["download_end"] = time.time()
+                update_job(job_id, {
                     "status": "processing",
                     "progress": 100,
                     "message": "İşleniyor..."
                 })
         
+        # Son işlemlerden (birleştirme, dönüştürme) sonraki kesin dosya yolu
+        outputs: Dict[str, Path] = {}
+        def post_hook(filepath):
+            outputs["media"] = Path(filepath)
+        
         # yt-dlp seçenekleri
-        ydl_opts = get_ydl_options(job_id, format_type, quality)
+        ydl_opts = get_ydl_options(job_id, format_type, quality, job.get("platform") or "unknown")
         ydl_opts['progress_hooks'] = [progress_hook]
+        ydl_opts['postprocessor_hooks'] = [check_cancelled]
+        ydl_opts['post_hooks'] = [post_hook]
+        if playlist_item:
+            ydl_opts['playlist_items'] = str(playlist_item)
         
         # İndirme işlemi
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Video bilgilerini al
+        with SegmentedYoutubeDL(ydl_opts) as ydl:
+            # Platform çerezleri işler arasında korunur (ilk istekten önce atanmalı)
+            ydl.cookiejar = http_pools.cookiejar(platform)
+            # Sayfa ve format bilgisini yalnızca bir kez çıkar (format seçimi/indirme yok).
+            # Önbellekte taze kayıt varsa (örn. thumbnail isteğinden) çıkarma atlanır.
+            extract_start = time.time()
+            # Devre kesiciye yalnızca çıkarmanın sahibi, gerçek istek başına bir kez
+            # bildirir (birleşen işler aynı hatayı tekrar saydırmaz)
+            def extract():
+                with platform_guard.extraction(platform, RATE_LIMIT_MAX_WAIT):
+                    try:
+                        result = extract_page(url, check_cancelled)
+                    except DownloadAborted:
+                        # İptal yalnızca bu işe ait; aynı çıkarmayı bekleyen işler silinmesin
+                        platform_guard.abandon(platform)
+                        raise ExtractionAbandoned()
+                    except Exception as e:
+                        platform_guard.record(platform, e)
+                        raise
+                platform_guard.record(platform)
+                return result
+            
             try:
-                info = ydl.extract_info(url, download=False)
-                jobs[job_id].update({
-                    "title": info.get('title', 'Bilinmiyor'),
-                    "duration": info.get('duration', 0),
-                    "uploader": info.get('uploader', 'Bilinmiyor'),
-                    "view_count": info.get('view_count', 0)
+                metadata, cached = metadata_cache.get_or_extract(url, extract)
+            except ExtractionAbandoned:
+                raise DownloadAborted()
+            timings["extract"] = round(time.time() - extract_start, 3)
+            for cookie in metadata["cookies"]:
+                ydl.cookiejar.set_cookie(cookie)
+            # process_ie_result sözlüğü değiştirir; önbellekteki kopyayı koru
+            ie_result = copy.deepcopy(metadata["info"])
+            if not playlist_item:
+                update_job(job_id, {
+                    "title": metadata["title"],
+                    "duration": metadata["duration"],
+                    "uploader": metadata["uploader"],
+                    "view_count": ie_result.get('view_count', 0),
                 })
-            except Exception as e:
-                logger.warning(f"Video bilgisi alınamadı: {e}")
+            update_job(job_id, {"metadata_cached": cached})
+            
+            # Farklı URL biçimleriyle gelen aynı video da bu dosyayı kullanabilsin
+            video_key = None if playlist_item else video_content_key(ie_result, format_type, quality)
+            if video_key:
+                update_job(job_id, {"video_key": video_key})
+                if not SHARED_JOB_STATE:
+                    register_content_key(job_id, video_key)
             
-            # Video indir
-            jobs[job_id]["status"] = "downloading"
-            ydl.download([url])
+            # Aynı sonuç üzerinden format seç ve indir; sayfa ikinci kez çekilmez
+            check_cancelled()
+            update_job(job_id, {"status": "downloading"})
+            process_start = time.time()
+            result = ydl.process_ie_result(ie_result, download=True)
+            process_end = time.time()
         
-        # İndirilen dosyayı bul
-        downloaded_files = list(DOWNLOAD_DIR.glob(f"{job_id}.*"))
-        video_file = None
+        download_start = stage_marks.get("download_start", process_start)
+        download_end = stage_marks.get("download_end", process_end)
+        timings["download"] = round(download_end - download_start, 3)
+        timings["postprocess"] = round(process_end - download_end, 3)
         
-        for file in downloaded_files:
-            if file.suffix.lower() in ['.mp4', '.webm', '.mkv', '.avi', '.mov', '.mp3', '.m4a']:
-                video_file = file
-                break
-        
-        if video_file and video_file.exists():
-            file_size = video_file.stat().st_size
-            jobs[job_id].update({
-                "status": "completed",
-                "progress": 100,
-                "file_path": str(video_file),
-                "file_size": file_size,
-                "completed_at": time.time(),
-                "message": "✅ İndirme tamamlandı!"
-            })
-            
-            # Thumbnail dosyasını bul
-            thumbnail_files = list(DOWNLOAD_DIR.glob(f"{job_id}.*"))
-            for thumb in thumbnail_files:
-                if thumb.suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp']:
-                    jobs[job_id]["thumbnail"] = str(thumb)
-                    break
-                    
-            logger.info(f"✅ İndirme tamamlandı: {job_id} - {video_file.name}")
-        else:
+        # İndirilen dosya: yt-dlp'nin bildirdiği yol (klasör taranmaz)
+        video_file = outputs.get("media")
+        if not (video_file and video_file.exists()):
             raise Exception("İndirilen dosya bulunamadı")
+        thumbnail = written_thumbnail(result or {})
+        
+        if format_type in AUDIO_FORMATS and video_file.suffix[1:] != audio_extension(format_type):
+            check_cancelled()
+            if audio_converter.needs_transcode(video_file, format_type):
+                # CPU yoğun kodlama: indirme worker'ını bırak, dönüştürme havuzunda sürsün
+                transcoding_jobs.add(job_id)
+                update_job(job_id, {"status": "processing", "message": "🎵 Ses dönüştürme sırasında"})
+                audio_converter.submit(transcode_worker, job_id, video_file, format_type, quality,
+                                       platform, timings, time.time(), thumbnail)
+                return None
+            # Aynı codec: ses yeniden kodlanmaz, yalnızca kapsayıcı değişir
+            convert_start = time.time()
+            video_file = audio_converter.convert(video_file, format_type, quality)
+            timings["postprocess"] = round(timings["postprocess"] + time.time() - convert_start, 3)
+        
+        complete_job(job_id, video_file, platform, timings, thumbnail)
             
+    except DownloadAborted:
+        discard_aborted_job(job_id)
     except Exception as e:
         error_msg = str(e)
+        kind = classify_error(e)
+        retries = jobs.get(job_id, {}).get("retries", 0)
+        if job_id in jobs and (kind == "limited" or (kind == "transient" and retries < RETRY_MAX_ATTEMPTS)):
+            # Hız sınırı (bizim sınırımız) deneme hakkı harcamaz
+            if kind == "limited":
+                delay, changes = e.retry_after, {}
+            else:
+                delay = backoff_delay(retries, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+                changes = {"retries": retries + 1, "last_error": error_msg[:200]}
+            logger.warning(f"🔁 {job_id} {delay:.1f} sn sonra yeniden denenecek - {error_msg}")
+            defer_job(job_id, delay, f"🔁 Geçici hata, yeniden denenecek ({retries + 1}/{RETRY_MAX_ATTEMPTS})"
+                      if changes else f"⏳ {platform} hız sınırı, sırada bekliyor", changes)
+            return delay
         logger.error(f"❌ İndirme hatası: {job_id} - {error_msg}")
-        jobs[job_id].update({
+        update_job(job_id, {
             "status": "failed",
             "error": error_msg,
-            "failed_at": time.time()
+            "message": "❌ İndirme başarısız",
+            "failed_at": time.time(),
+            **({"retry_after": round(e.retry_after, 1)} if kind == "unavailable" else {}),
         })
+        JOBS_FINISHED.labels(platform, "failed").inc()
+    finally:
+        running_downloads.discard(job_id)
+        cancelled_downloads.discard(job_id)
+
+def complete_job(job_id: str, media: Path, platform: str, timings: Dict[str, float],
+                 thumbnail: Optional[str] = None):
+    """İndirilen (ses işlerinde dönüştürülen) dosyayla işi tamamla"""
+    file_size = media.stat().st_size
+    
+    job = jobs.get(job_id) or {}
+    timings["total"] = round(time.time() - (job.get("queued_at") or job.get("started_at") or time.time()), 3)
+    update_job(job_id, {
+        "status": "completed",
+        "progress": 100,
+        "file_path": str(media),
+        "file_size": file_size,
+        "thumbnail": thumbnail,
+        "completed_at": time.time(),
+        "message": "✅ İndirme tamamlandı!"
+    })
+    observe_completed_job(platform, timings, file_size)
+    
+    logger.info(f"✅ İndirme tamamlandı: {job_id} - {media.name}")
+
+def discard_aborted_job(job_id: str):
+    """Kayıt silindi; yarım dosyaları temizle, durumu geri yazma"""
+    remove_job_files(job_id)
+    job = jobs.pop(job_id, None) or {}
+    JOBS_FINISHED.labels(job.get("platform") or "unknown", "cancelled").inc()
+    logger.info(f"🛑 İndirme iptal edildi: {job_id}")
+
+# Dönüştürme havuzunda bekleyen/çalışan ses işleri (indirme worker'ı bunları bıraktı)
+transcoding_jobs: Set[str] = set()
+
+def job_deleted(job_id: str) -> bool:
+    if job_id not in jobs:
+        return True
+    return SHARED_JOB_STATE and job_store.get(job_id) is None
+
+def transcode_worker(job_id: str, source: Path, format_type: str, quality: str,
+                     platform: str, timings: Dict[str, float], handed_off_at: float,
+                     thumbnail: Optional[str] = None):
+    """Ses dönüştürme (dönüştürme havuzundaki bir thread'de çalışır).
+
+    ffmpeg çalışırken durdurulmaz; silinen işin dosyaları dönüştürme bitince temizlenir.
+    """
+    from segmented_download import DownloadAborted
+    try:
+        if job_deleted(job_id):
+            raise DownloadAborted()
+        started = time.time()
+        timings["transcode_queue"] = round(started - handed_off_at, 3)
+        update_job(job_id, {"message": "🎵 Ses dönüştürülüyor..."})
+        media = audio_converter.convert(source, format_type, quality)
+        timings["postprocess"] = round(timings.get("postprocess", 0) + time.time() - started, 3)
+        if job_deleted(job_id):
+            raise DownloadAborted()
+        complete_job(job_id, media, platform, timings, thumbnail)
+    except DownloadAborted:
+        discard_aborted_job(job_id)
+    except Exception as e:
+        logger.error(f"❌ Ses dönüştürme hatası: {job_id} - {e}")
+        update_job(job_id, {
+            "status": "failed",
+            "error": str(e),
+            "message": "❌ Ses dönüştürülemedi",
+            "failed_at": time.time(),
+        })
+        JOBS_FINISHED.labels(platform, "failed").inc()
+    finally:
+        transcoding_jobs.discard(job_id)
+        if SHARED_JOB_STATE:
+            release_shared_job(job_id)
+
+# --- Disk Yönetimi ---
+# İş klasöründeki dosyalar: <job_id>.<ext>, <job_id>.info.json, <job_id>.mp4.part ...
+# Eski sürümler aynı adlarla doğrudan downloads/ altına yazıyordu (düz düzen)
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+JOB_FILE_PATTERN = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\.")
+EVICTABLE_STATUSES = {"completed", "failed"}
+
+# Son janitor taramasının sonucu (/health bunu döndürür, diski tekrar taramaz)
+disk_usage_snapshot: Dict[str, Any] = {"used_bytes": 0, "files": 0, "evicted_jobs": 0, "scanned_at": None}
+
+def free_disk_bytes() -> int:
+    return shutil.disk_usage(DOWNLOAD_DIR).free
+
+def has_free_space() -> bool:
+    return free_disk_bytes() >= DISK_MIN_FREE_BYTES
+
+def scan_job_files() -> Dict[str, List[Tuple[Path, int, float]]]:
+    """downloads/ klasörünü tek geçişte tara: job_id -> [(yol, boyut, mtime)]"""
+    files: Dict[str, List[Tuple[Path, int, float]]] = {}
+    
+    def add(job_id: str, entry: os.DirEntry):
+        stat = entry.stat(follow_symlinks=False)
+        files.setdefault(job_id, []).append((Path(entry.path), stat.st_size, stat.st_mtime))
+    
+    with os.scandir(DOWNLOAD_DIR) as shards:
+        for shard in shards:
+            if shard.is_file(follow_symlinks=False):
+                # Düz düzenden kalan dosyalar
+                match = JOB_FILE_PATTERN.match(shard.name)
+                if match:
+                    add(match.group(1), shard)
+                continue
+            if len(shard.name) != 2 or not shard.is_dir(follow_symlinks=False):
+                continue
+            with os.scandir(shard.path) as directories:
+                for directory in directories:
+                    if not JOB_ID_PATTERN.match(directory.name) or not directory.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(directory.path) as entries:
+                        for entry in entries:
+                            if entry.is_file(follow_symlinks=False):
+                                add(directory.name, entry)
+    return files
+
+def remove_job_files(job_id: str, job: Optional[Dict[str, Any]] = None,
+                     extra_paths: Iterable[Path] = ()) -> int:
+    """İşe ait tüm dosyaları (medya, thumbnail, info.json, yarım dosyalar) ve
+    iş klasörünü sil; yalnızca bu işin klasörüne ve kayıttaki yollara bakılır"""
+    directory = job_dir(job_id)
+    try:
+        with os.scandir(directory) as entries:
+            paths = {Path(entry.path) for entry in entries if entry.is_file(follow_symlinks=False)}
+    except FileNotFoundError:
+        paths = set()
+    paths.update(extra_paths)
+    for key in ("file_path", "thumbnail"):
+        if job and job.get(key):
+            paths.add(Path(job[key]))
+    freed = 0
+    for path in paths:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            freed += size
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Dosya silinirken hata: {path} - {e}")
+    # Klasörde kalanlar (yt-dlp ara klasörleri) ile birlikte
+    shutil.rmtree(directory, ignore_errors=True)
+    return freed
+
+def delete_job_record(job_id: str):
+    # Henüz başlamadıysa kuyruktan çıkar
+    job_queue.remove(job_id)
+    jobs.pop(job_id, None)
+    job_store.delete_now(job_id)
+    job_store.release_idempotency_keys(job_id)
+
+def purge_job(job_id: str, job: Optional[Dict[str, Any]] = None) -> int:
+    """İşin referansını kaldır; dosyayı kullanan başka iş kalmadıysa dosyaları da sil.
+
+    Açık olay akışları her durumda kapatılır.
+    """
+    holder_id = (job or {}).get("source_job") or job_id
+    holder = jobs.get(holder_id) or (job_store.get(holder_id) if SHARED_JOB_STATE else None)
+    others = job_refs(holder_id) - {job_id}
+    if holder_id != job_id and holder and holder.get("detached"):
+        others.discard(holder_id)
+    
+    freed = 0
+    if job_id == holder_id and others:
+        # Dosya başka işlerce kullanılıyor: kaydı gizle, indirme ve dosya kalsın
+        if job_id in jobs:
+            update_job(job_id, {"detached": True})
+        job_store.write_now(job_id, {**(snapshot_job(job_id) or job), "detached": True})
+        job_store.release_idempotency_keys(job_id)
+    else:
+        delete_job_record(job_id)
+        with dedupe_lock:
+            file_refs.get(holder_id, set()).discard(job_id)
+        if not others:
+            # Kimse beklemiyor: süren indirmeyi durdur (worker yarım dosyaları da siler)
+            cancel_download(holder_id)
+            freed = remove_job_files(holder_id, holder or job)
+            if holder_id != job_id:
+                # Son referans gitti: gizlenmiş sahip kaydı da silinir
+                delete_job_record(holder_id)
+            drop_content_keys(holder_id)
+    
+    job_events.publish(job_id, None)
+    return freed
+
+def run_janitor_pass() -> Dict[str, Any]:
+    """Yaşı dolan ve kotayı aşan işleri, en uzun süredir indirilmeyenden başlayarak sil"""
+    now = time.time()
+    job_store.expire_idempotency_keys(now)
+    files = scan_job_files()
+    usage = {job_id: sum(size for _, size, _ in entries) for job_id, entries in files.items()}
+    used = sum(usage.values())
+    # Gizlenmiş sahip kayıtları dosyalarını korur; silme sırası bağlı işlerle gelir
+    known = all_jobs(include_detached=True)
+    evicted = 0
+    
+    # 1) Saklama süresi dolan tamamlanmış/başarısız işler ve sahipsiz dosyalar
+    if DOWNLOAD_MAX_AGE > 0:
+        for job_id, job in known.items():
+            finished_at = job.get("completed_at") or job.get("failed_at") or job.get("created_at") or now
+            if (job.get("status") in EVICTABLE_STATUSES and not job.get("detached")
+                    and now - finished_at > DOWNLOAD_MAX_AGE):
+                freed = purge_job(job_id, job)
+                if freed:
+                    used -= freed
+                    usage.pop(job.get("source_job") or job_id, None)
+                evicted += 1
+        for job_id, entries in files.items():
+            if job_id not in known and all(now - mtime > DOWNLOAD_MAX_AGE for _, _, mtime in entries):
+                used -= remove_job_files(job_id, extra_paths=[path for path, _, _ in entries])
+                usage.pop(job_id, None)
+    
+    # 2) Kota: en uzun süredir indirilmeyen tamamlanmış işlerden başla
+    if DISK_QUOTA_BYTES > 0 and used > DISK_QUOTA_BYTES:
+        candidates = sorted(
+            (
+                (job.get("last_accessed_at") or job.get("completed_at") or job.get("created_at") or 0, job_id, job)
+                for job_id, job in known.items()
+                if job.get("status") in EVICTABLE_STATUSES and not job.get("detached")
+                and (job.get("source_job") or job_id) in usage
+            ),
+            key=lambda item: item[0],
+        )
+        for _, job_id, job in candidates:
+            if used <= DISK_QUOTA_BYTES:
+                break
+            freed = purge_job(job_id, job)
+            if freed:
+                used -= freed
+                usage.pop(job.get("source_job") or job_id, None)
+            evicted += 1
+    
+    if evicted:
+        logger.info(f"🧹 Janitor {evicted} işi sildi, kullanım: {used / 1024 ** 2:.1f} MB")
+    disk_usage_snapshot.update({
+        "used_bytes": max(used, 0),
+        "files": sum(len(entries) for job_id, entries in files.items() if job_id in usage),
+        "evicted_jobs": disk_usage_snapshot["evicted_jobs"] + evicted,
+        "scanned_at": now,
+    })
+    return disk_usage_snapshot
+
+async def disk_janitor():
+    """Arka planda düzenli disk temizliği"""
+    while True:
+        try:
+            await asyncio.to_thread(run_janitor_pass)
+        except Exception as e:
+            logger.error(f"❌ Janitor hatası: {e}")
+        await asyncio.sleep(JANITOR_INTERVAL)
+
+async def http_pool_janitor():
+    """Trafik yokken de boşta kalan bağlantıları kapat"""
+    while True:
+        await asyncio.sleep(HTTP_POOL_IDLE_TIMEOUT)
+        if http_pools is None:
+            continue
+        try:
+            await asyncio.to_thread(http_pools.prune)
+        except Exception as e:
+            logger.error(f"❌ Bağlantı havuzu temizliği hatası: {e}")
+
+async def wait_for_free_space():
+    """Boş alan eşiğin altındaysa yeni iş başlatmadan önce bekle"""
+    warned = False
+    while not await asyncio.to_thread(has_free_space):
+        if not warned:
+            logger.warning("⚠️ Disk alanı az, yeni indirmeler bekletiliyor")
+            warned = True
+        await asyncio.sleep(JANITOR_INTERVAL / 4)
+
+# --- Toplu İşler (Batch) ---
+# Oynatma listesi veya URL listesi tek bir toplu iş kaydıyla ("type": "batch")
+# izlenir. Her öğe normal bir indirme işidir (dedupe, öncelik, adil sıra aynen
+# geçerli); toplu iş aynı anda en fazla `concurrency` öğeyi kuyruğa verir,
+# biri bitince sıradakini ekler ve toplam ilerlemeyi kendi kaydına yazar.
+# Toplu iş kaydı worker'larca claim edilmez; durumları bu yüzden
+# expanding/running/completed/failed olur.
+batch_tasks: Dict[str, asyncio.Task] = {}
+
+def new_batch(source_url: Optional[str], urls: List[str], format_type: str, quality: str,
+              client: Tuple[str, float], priority: str, concurrency: int) -> JobRecord:
+    """Toplu iş kaydı; tek URL verildiyse öğeleri çalışırken çıkarılır"""
+    platforms = {get_platform_from_url(url) for url in ([source_url] if source_url else urls)}
+    batch = new_job(source_url or "", format_type, quality,
+                    platforms.pop() if len(platforms) == 1 else "mixed", *client, priority)
+    batch.update({
+        "type": "batch",
+        "status": "expanding" if source_url else "running",
+        "concurrency": concurrency,
+        "entries": [{"url": url} for url in urls],
+        "total": len(urls),
+        "completed": 0,
+        "failed": 0,
+        "active": 0,
+    })
+    return batch
+
+def expand_batch_source(url: str) -> Tuple[Optional[str], List[Dict[str, Any]], bool]:
+    """Liste / çoklu video sayfasını öğelerine aç: (başlık, öğeler, kırpıldı mı).
+
+    Liste öğeleri indirilmeden (process=False) okunur; kendi URL'si olan
+    öğeler o URL ile, olmayanlar (ör. tweet'teki videolar) liste URL'si ve
+    sıra numarasıyla (playlist_items) indirilir.
+    """
+    platform = get_platform_from_url(url)
+    try:
+        with platform_guard.extraction(platform, RATE_LIMIT_MAX_WAIT):
+            info, _ = extract_page(url)
+        entries = None
+        if info.get("_type") in ("playlist", "multi_video"):
+            entries = info.get("entries") or []
+    except Exception as e:
+        platform_guard.record(platform, e)
+        raise
+    platform_guard.record(platform)
+    
+    if entries is None:
+        # Tek video: toplu iş tek öğeli olur
+        return info.get("title"), [{"url": url, "title": info.get("title")}], False
+    items = []
+    for number, entry in enumerate(entries[:BATCH_MAX_ITEMS], 1):
+        if not entry:
+            continue
+        entry_url = None
+        if entry.get("_type") in ("url", "url_transparent"):
+            entry_url = entry.get("webpage_url") or entry.get("url")
+        if entry_url and urlsplit(entry_url).scheme in ("http", "https"):
+            items.append({"url": entry_url, "title": entry.get("title")})
+        else:
+            items.append({"url": url, "playlist_item": number, "title": entry.get("title")})
+    return info.get("title"), items, len(entries) > BATCH_MAX_ITEMS
+
+def batch_totals(entries: List[Dict[str, Any]], running: Dict[str, float]) -> Dict[str, Any]:
+    """Öğe durumlarından toplam ilerleme; biten öğe %100 sayılır"""
+    completed = sum(1 for entry in entries if entry.get("status") == "completed")
+    failed = sum(1 for entry in entries if entry.get("status") == "failed")
+    progress = ((completed + failed) * 100 + sum(running.values())) / max(len(entries), 1)
+    return {
+        "completed": completed,
+        "failed": failed,
+        "active": len(running),
+        "progress": round(progress, 1),
+    }
+
+def purge_batch_entries(entries: List[Dict[str, Any]]):
+    """Toplu işin öğe işlerini (ve başka işin kullanmadığı dosyalarını) sil"""
+    for entry in entries:
+        job_id = entry.get("job_id")
+        job = get_job(job_id) if job_id else None
+        if job is not None:
+            purge_job(job_id, job)
+
+async def run_batch(batch_id: str):
+    """Toplu işi yürüt: öğeleri eş zamanlılık sınırıyla kuyruğa ver, ilerlemeyi topla"""
+    queue: asyncio.Queue = asyncio.Queue()
+    # Toplu iş silinirse 'deleted' olayı bu kuyruğa da gelir
+    job_events.subscribe(batch_id, queue)
+    watched: Set[str] = set()
+    entries: List[Dict[str, Any]] = []
+    try:
+        batch = jobs.get(batch_id)
+        if batch is None:
+            return
+        if batch["status"] == "expanding":
+            loop = asyncio.get_running_loop()
+            try:
+                title, found, truncated = await loop.run_in_executor(
+                    metadata_executor, expand_batch_source, batch["url"])
+                if not found:
+                    raise Exception("Listede indirilebilir video bulunamadı")
+            except Exception as e:
+                logger.error(f"❌ Liste açılamadı: {batch_id} - {e}")
+                update_job(batch_id, {
+                    "status": "failed",
+                    "error": str(e),
+                    "message": "❌ Liste açılamadı",
+                    "failed_at": time.time(),
+                })
+                return
+            update_job(batch_id, {
+                "status": "running",
+                "title": title,
+                "entries": found,
+                "total": len(found),
+                "truncated": truncated,
+                "started_at": time.time(),
+            })
+            logger.info(f"📦 Liste açıldı: {batch_id} - {len(found)} öğe")
+        
+        # Kayıttaki liste olduğu gibi değiştirilmez (depoya yazan thread okuyor olabilir)
+        entries = [dict(entry) for entry in batch["entries"]]
+        position = {entry["job_id"]: index for index, entry in enumerate(entries) if entry.get("job_id")}
+        running: Dict[str, float] = {}
+        
+        def watch(job_id: str, job: Dict[str, Any]):
+            watched.add(job_id)
+            job_events.subscribe(job_id, queue)
+            running[job_id] = job.get("progress") or 0
+        
+        def finish_entry(job_id: str, status: str, error: Optional[str] = None):
+            watched.discard(job_id)
+            job_events.unsubscribe(job_id, queue)
+            running.pop(job_id, None)
+            entries[position[job_id]].update({"status": status, **({"error": error[:200]} if error else {})})
+        
+        # Yeniden başlatma sonrası: kuyruğa verilmiş öğeleri izlemeye devam et
+        for job_id in list(position):
+            if entries[position[job_id]].get("status") in TERMINAL_STATUSES:
+                continue
+            job = get_job(job_id)
+            if job is None:
+                finish_entry(job_id, "failed", "İş silindi")
+            elif job["status"] in TERMINAL_STATUSES:
+                finish_entry(job_id, job["status"], job.get("error"))
+            else:
+                watch(job_id, job)
+        pending = deque(index for index, entry in enumerate(entries)
+                        if not entry.get("job_id") and not entry.get("status"))
+        changed = True
+        last_totals: Dict[str, Any] = {}
+        
+        while True:
+            while pending and len(watched) < batch["concurrency"]:
+                index = pending.popleft()
+                entry = entries[index]
+                changed = True
+                try:
+                    job_id, job, _ = submit_job(
+                        entry["url"], batch["format"], batch["quality"], get_platform_from_url(entry["url"]),
+                        (batch["client"], batch["client_weight"]), batch["priority"],
+                        {"batch_id": batch_id, "playlist_item": entry.get("playlist_item"),
+                         "title": entry.get("title")},
+                    )
+                except Exception as e:
+                    # Platform devre dışı vb.: öğe başarısız, liste devam eder
+                    entry.update({"status": "failed", "error": str(e)[:200]})
+                    continue
+                entry["job_id"] = job_id
+                position[job_id] = index
+                if job["status"] in TERMINAL_STATUSES:
+                    # Daha önce indirilmiş dosya kullanıldı
+                    entry["status"] = job["status"]
+                else:
+                    watch(job_id, job)
+            
+            totals = batch_totals(entries, running)
+            if changed or totals != last_totals:
+                changes = dict(totals)
+                if changed:
+                    changes["entries"] = [dict(entry) for entry in entries]
+                update_job(batch_id, changes)
+                changed, last_totals = False, totals
+            if not watched and not pending:
+                break
+            
+            try:
+                job_id, name, data = await asyncio.wait_for(
+                    queue.get(), CANCEL_CHECK_INTERVAL if SHARED_JOB_STATE else None)
+            except asyncio.TimeoutError:
+                # Paylaşımlı modda toplu iş başka bir süreçte silinmiş olabilir
+                if await asyncio.to_thread(job_store.get, batch_id) is None:
+                    jobs.pop(batch_id, None)
+                    return
+                continue
+            if job_id == batch_id:
+                if name == "deleted":
+                    return
+                continue
+            if job_id not in watched:
+                continue
+            if name in TERMINAL_STATUSES:
+                finish_entry(job_id, name, data.get("error"))
+                changed = True
+            elif name == "deleted":
+                finish_entry(job_id, "failed", "İş silindi")
+                changed = True
+            else:
+                running[job_id] = data.get("progress") or 0
+        
+        totals = batch_totals(entries, running)
+        update_job(batch_id, {
+            "status": "completed" if totals["completed"] else "failed",
+            "completed_at": time.time(),
+            "message": f"✅ {totals['completed']}/{len(entries)} video indirildi" if totals["completed"]
+            else "❌ Listedeki videolar indirilemedi",
+        })
+        logger.info(f"📦 Toplu iş bitti: {batch_id} - {totals['completed']}/{len(entries)}")
+    finally:
+        job_events.unsubscribe(batch_id, queue)
+        for job_id in watched:
+            job_events.unsubscribe(job_id, queue)
+        batch_tasks.pop(batch_id, None)
+        if batch_id not in jobs:
+            # Toplu iş silindi: silme sırasında kuyruğa verilmiş öğeler de gider
+            await asyncio.to_thread(purge_batch_entries, entries)
+        elif SHARED_JOB_STATE and jobs[batch_id]["status"] in TERMINAL_STATUSES:
+            # Bitmiş kayıt diğer süreçlerle aynı şekilde depodan sunulur
+            await asyncio.to_thread(job_store.write_now, batch_id, snapshot_job(batch_id))
+            jobs.pop(batch_id, None)
+
+def start_batch(batch_id: str):
+    batch_tasks[batch_id] = asyncio.create_task(run_batch(batch_id))
+
+# --- Uygulama Yaşam Döngüsü ---
+def restore_jobs():
+    """Depodaki işleri yükle; yarım kalanları kuyruğa al, tamamlananların dosyasını bağla"""
+    restored = job_store.load_all()
+    requeued = reattached = lost = 0
+    now = time.time()
+    
+    for job_id, data in restored.items():
+        job = JobRecord.from_dict(data)
+        if job.get("type") == "batch":
+            # Toplu işler kuyruğa girmez; yarım kalanlar başlangıçta sürdürülür
+            jobs[job_id] = job
+            continue
+        if job.get("source_job"):
+            # Tekrar istekleri kendi dosyası olmadan sahibine bağlıdır (aşağıda)
+            jobs[job_id] = job
+            continue
+        status = job.get("status")
+        file_path = job.get("file_path")
+        
+        if status == "completed" and not (file_path and Path(file_path).exists()):
+            media = find_job_media(job_id, job.get("format"))
+            if media:
+                job.update({"file_path": str(media), "file_size": media.stat().st_size})
+                reattached += 1
+            else:
+                job.update({"status": "failed", "error": "Dosya yeniden başlatma sonrası bulunamadı", "failed_at": now})
+                lost += 1
+            job_store.mark_dirty(job_id)
+        
+        elif status not in TERMINAL_STATUSES:
+            # Ses işinde yalnızca kaynak akış varsa dönüştürme yeniden yapılır
+            media = find_job_media(job_id, job.get("format"))
+            if media:
+                # Dosya tamamlanmış ama durum yazılamadan süreç kapanmış
+                job.update({
+                    "status": "completed",
+                    "progress": 100,
+                    "file_path": str(media),
+                    "file_size": media.stat().st_size,
+                    "completed_at": media.stat().st_mtime,
+                    "message": "✅ İndirme tamamlandı!"
+                })
+                reattached += 1
+            else:
+                # Baştan (yt-dlp .part dosyası varsa kaldığı yerden) tekrar indir
+                job.update({
+                    "status": "queued",
+                    "progress": 0,
+                    "queued_at": now,
+                    "started_at": None,
+                    "recovered": True,
+                })
+                job_queue.put(job_id, job)
+                requeued += 1
+            job_store.mark_dirty(job_id)
+        
+        jobs[job_id] = job
+    
+    # İçerik dizinini ve dosya referanslarını yeniden kur
+    for job_id in restored:
+        job = jobs[job_id]
+        holder_id = job.get("source_job")
+        if holder_id is None:
+            for field in ("url_key", "video_key"):
+                if job.get(field):
+                    register_content_key(job_id, job[field])
+            continue
+        holder = jobs.get(holder_id)
+        if holder is None:
+            if job["status"] != "failed":
+                job.update({"status": "failed", "error": "Kaynak iş bulunamadı", "failed_at": now})
+                job_store.mark_dirty(job_id)
+            continue
+        file_refs.setdefault(holder_id, set()).add(job_id)
+        if job["status"] != "completed" or holder["status"] != "completed":
+            # Sahip tekrar kuyruğa alındıysa veya dosyası kaybolduysa onu izle
+            job.update({key: value for key, value in holder.items() if key not in JOB_IDENTITY_FIELDS})
+            job_store.mark_dirty(job_id)
+    
+    if restored:
+        logger.info(
+            f"♻️ {len(restored)} iş geri yüklendi: {requeued} tekrar kuyrukta, "
+            f"{reattached} dosya bağlandı, {lost} dosya kayıp"
+        )
+
+async def shared_state_heartbeat():
+    """Paylaşımlı modda canlılık bildir ve ölen süreçlerin işlerini kuyruğa geri al"""
+    while True:
+        try:
+            await asyncio.to_thread(job_store.heartbeat, PROCESS_ID)
+            recovered = await asyncio.to_thread(
+                job_store.recover_orphans, WORKER_HEARTBEAT_INTERVAL * 5)
+            if recovered:
+                logger.info(f"♻️ {recovered} yarım iş kuyruğa geri alındı")
+                job_queue.put("")
+        except Exception as e:
+            logger.warning(f"⚠️ Heartbeat hatası: {e}")
+        await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+async def monitor_event_loop_lag(interval: float = 0.1):
+    """Event loop'u bloklayan çağrılar uyanma gecikmesi olarak görünür"""
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - expected))
+
+@app.on_event("startup")
+async def start_download_workers():
+    started = time.perf_counter()
+    job_events.bind(asyncio.get_running_loop())
+    # yt-dlp ve çıkarma süreçleri dinlemeye başladıktan sonra hazırlanır;
+    # startup beklemez (uvicorn soketi startup bitince açar)
+    threading.Thread(target=load_engine, name="ytdlp-engine", daemon=True).start()
+    if SHARED_JOB_STATE:
+        # İlk heartbeat claim'den önce yazılmalı; aksi halde işlerimiz yetim sayılır
+        await asyncio.to_thread(job_store.heartbeat, PROCESS_ID)
+        background_tasks.append(asyncio.create_task(shared_state_heartbeat()))
+        background_tasks.append(asyncio.create_task(job_events.watch_remote()))
+    else:
+        restore_jobs()
+        for job_id, job in list(jobs.items()):
+            if job.get("type") == "batch" and job["status"] not in TERMINAL_STATUSES:
+                start_batch(job_id)
+    job_store.start(snapshot_job)
+    background_tasks.append(asyncio.create_task(disk_janitor()))
+    background_tasks.append(asyncio.create_task(http_pool_janitor()))
+    background_tasks.append(asyncio.create_task(monitor_event_loop_lag()))
+    for worker_no in range(MAX_CONCURRENT_DOWNLOADS):
+        worker_tasks.append(asyncio.create_task(download_worker_loop(worker_no)))
+    logger.info(f"⚙️ {MAX_CONCURRENT_DOWNLOADS} indirme worker'ı başlatıldı")
+    STARTUP_TIMINGS["startup"] = round(time.perf_counter() - started, 3)
+    age = process_age()
+    if age is not None:
+        STARTUP_TIMINGS["serving"] = age
+    logger.info(f"⏱️ Açılış: import {STARTUP_TIMINGS['import']:.2f} sn, startup {STARTUP_TIMINGS['startup']:.2f} sn"
+                + (f", süreç başlangıcından {age:.2f} sn" if age is not None else ""))
+
+@app.on_event("shutdown")
+async def stop_download_workers():
+    for task in worker_tasks + background_tasks + list(batch_tasks.values()):
+        task.cancel()
+    worker_tasks.clear()
+    background_tasks.clear()
+    download_executor.shutdown(wait=False, cancel_futures=True)
+    metadata_executor.shutdown(wait=False, cancel_futures=True)
+    audio_converter.shutdown()
+    if extractor_pool is not None:
+        extractor_pool.shutdown()
+    if http_pools is not None:
+        http_pools.shutdown()
+    if SHARED_JOB_STATE:
+        job_store.unregister(PROCESS_ID)
+    job_store.close()
+    mark_process_dead()
 
 # --- API Rotaları ---
 @app.get("/")
@@ -233,68 +2113,494 @@ def root():
 
 @app.get("/health")
 def health():
-    active_jobs = len([j for j in jobs.values() if j["status"] in ["downloading", "processing"]])
-    completed_jobs = len([j for j in jobs.values() if j["status"] == "completed"])
-    failed_jobs = len([j for j in jobs.values() if j["status"] == "failed"])
+    counts = count_jobs_by_status()
+    active_jobs = counts.get("downloading", 0) + counts.get("processing", 0)
+    completed_jobs = counts.get("completed", 0)
+    failed_jobs = counts.get("failed", 0)
     
     return {
         "status": "healthy",
-        "total_jobs": len(jobs),
+        "total_jobs": sum(counts.values()),
         "active_jobs": active_jobs,
         "completed_jobs": completed_jobs,
         "failed_jobs": failed_jobs,
-        "uptime": time.time()
+        "queued_jobs": len(job_queue),
+        "jobs_by_status": counts,
+        "jobs_by_platform": count_jobs_by_platform(),
+        "busy_workers": active_workers,
+        "max_workers": MAX_CONCURRENT_DOWNLOADS,
+        "shared_job_state": SHARED_JOB_STATE,
+        "metadata_cache": metadata_cache.stats(),
+        "audio_conversion": audio_converter.stats(),
+        "extractor_pool": extractor_pool.stats() if extractor_pool else None,
+        "http_pools": http_pools.stats() if http_pools else None,
+        "startup": STARTUP_TIMINGS,
+        "platforms": platform_guard.snapshot(),
+        "disk": {
+            **disk_usage_snapshot,
+            "quota_bytes": DISK_QUOTA_BYTES,
+            "free_bytes": free_disk_bytes(),
+            "min_free_bytes": DISK_MIN_FREE_BYTES,
+            "max_age": DOWNLOAD_MAX_AGE,
+        },
+        "started_at": START_TIME,
+        "uptime": round(time.time() - START_TIME, 3)
+    }
+
+@app.get("/ready")
+def ready():
+    """Hazırlık kontrolü: yt-dlp yüklendi ve çıkarma süreçleri ısındıysa 200, değilse 503"""
+    body = {
+        "ready": engine_ready,
+        "engine_loaded": engine_loaded.is_set() and engine_error is None,
+        "extractor_pool_warm": bool(extractor_pool and extractor_pool.stats()["warm"]) if EXTRACTOR_PROCESSES else None,
+        "error": str(engine_error) if engine_error is not None else None,
+        "startup": STARTUP_TIMINGS,
     }
+    return JSONResponse(body, status_code=200 if engine_ready else 503)
+
+@app.get("/metrics")
+def metrics():
+    """📈 Prometheus metrikleri"""
+    content, content_type = render_metrics(lambda: {
+        "queue_depth": len(job_queue),
+        "max_workers": MAX_CONCURRENT_DOWNLOADS,
+        "jobs": count_jobs_by_status(),
+        "http_pools": http_pools.stats() if http_pools else {},
+        "startup": STARTUP_TIMINGS,
+        "uptime": time.time() - START_TIME,
+    })
+    return Response(content=content, media_type=content_type)
+
+async def ensure_disk_space():
+    """Yeni iş kabul etmeden önce boş alanı kontrol et (507)"""
+    if not await asyncio.to_thread(has_free_space):
+        # Önce eski dosyaları temizlemeyi dene
+        await asyncio.to_thread(run_janitor_pass)
+        if not await asyncio.to_thread(has_free_space):
+            raise HTTPException(status_code=507, detail="💾 Sunucuda yeterli disk alanı yok, daha sonra tekrar deneyin")
+
+def submit_job(url: str, format_type: str, quality: str, platform: str, client: Tuple[str, float],
+               priority: str, extra: Optional[Dict[str, Any]] = None,
+               job_id: Optional[str] = None) -> Tuple[str, Dict[str, Any], str]:
+    """İş kaydını oluştur; aynı içerik varsa ona bağla, yoksa kuyruğa ekle.
+
+    (job_id, kayıt, mesaj) döndürür. Platform devre dışıysa PlatformUnavailable.
+    """
+    job_id = job_id or str(uuid.uuid4())
+    job = new_job(url, format_type, quality, platform, *client, priority)
+    job.update(extra or {})
+    
+    if job.get("playlist_item"):
+        # Listenin n. öğesi: URL listeye aittir, video kimliği indirmeden bilinmez
+        keys = [f"{url_content_key(url, format_type, quality)}|item={job['playlist_item']}"]
+    else:
+        keys = content_keys_for(url, format_type, quality)
+    
+    # Aynı içerik tamamlanmışsa dosyasını, indiriliyorsa çalışan işi kullan
+    reusable = find_reusable_job(keys)
+    if reusable:
+        holder_id, holder = reusable
+        CACHE_LOOKUPS.labels("content", "hit" if holder["status"] == "completed" else "coalesced").inc()
+        attach_job(job_id, job, holder_id, holder)
+        job_store.insert(job_id, job)
+        if not SHARED_JOB_STATE:
+            jobs[job_id] = job
+        logger.info(f"♻️ Tekrar istek {holder_id} işine bağlandı: {job_id}")
+        return job_id, job, ("♻️ Bu video daha önce indirildi, dosya hazır" if job["status"] == "completed"
+                             else "♻️ Bu video zaten indiriliyor, mevcut indirmeye bağlandı")
+    
+    CACHE_LOOKUPS.labels("content", "miss").inc()
+    
+    # Platform devre dışıysa kuyrukta beklemeden hemen bildir
+    platform_guard.ensure_available(platform)
+    
+    # İşi kaydet ve kuyruğa ekle; worker'lar işleri önceliğe ve istemciler
+    # arası adil paya göre alır.
+    # Paylaşımlı modda iş, onu claim eden sürecin belleğine alınır.
+    job["url_key"] = keys[0]
+    if len(keys) > 1:
+        job["video_key"] = keys[1]
+    job_store.insert(job_id, job)
+    if not SHARED_JOB_STATE:
+        jobs[job_id] = job
+        for key in keys:
+            register_content_key(job_id, key)
+    job_queue.put(job_id, job)
+    return job_id, job, f"🎬 {platform.title()} videosu indirme kuyruğuna eklendi"
+
+def request_fingerprint(request: DownloadRequest) -> str:
+    """Aynı Idempotency-Key ile farklı istek gönderildiğini anlamak için özet"""
+    body = [request.url, request.format, request.quality, request.platform, request.priority]
+    return hashlib.sha256(json.dumps(body).encode()).hexdigest()
+
+async def claim_idempotency_key(key: str, job_id: str, fingerprint: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Anahtarı yeni iş için al; anahtar başka işe aitse o işi döndür.
+
+    Aynı anahtarla gelen eş zamanlı istekler ilk isteğin sonucunu bekler: ilk
+    istek işi oluşturursa o iş döner, başarısız olursa (anahtar bırakılır)
+    bekleyenlerden biri işi kendisi oluşturur.
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT
+    while True:
+        owner_id, owner_fingerprint, expires_at = job_store.claim_idempotency_key(
+            key, job_id, fingerprint, time.time() + IDEMPOTENCY_TTL
+        )
+        if owner_id == job_id:
+            return None
+        if owner_fingerprint != fingerprint:
+            raise HTTPException(status_code=422,
+                                detail="❌ Bu Idempotency-Key farklı bir istekle kullanılmış")
+        owner = get_job(owner_id)
+        if owner is not None:
+            return owner_id, owner
+        if time.time() - (expires_at - IDEMPOTENCY_TTL) > IDEMPOTENCY_WAIT:
+            # İşi oluşturmadan kaybolan istek (süreç çöktü): anahtar bırakılır
+            job_store.release_idempotency_keys(owner_id)
+        elif time.monotonic() > deadline:
+            raise HTTPException(status_code=409, detail="⏳ Aynı Idempotency-Key ile gelen istek hâlâ sürüyor",
+                                headers={"Retry-After": "1"})
+        else:
+            await asyncio.sleep(0.05)
 
 @app.post("/download", dependencies=[Depends(check_api_key)])
-async def start_download(request: DownloadRequest, background_tasks: BackgroundTasks):
-    """🚀 Video indirme işlemini başlat"""
+async def start_download(request: DownloadRequest, response: Response,
+                         client: Tuple[str, float] = Depends(get_api_client),
+                         idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """🚀 Video indirme işlemini başlat
+
+    Idempotency-Key başlığı verilirse aynı anahtarla (aynı istemciden)
+    IDEMPOTENCY_TTL süresince gelen tekrar istekler yeni iş açmaz, ilk işi döndürür.
+    """
+    priority = request.priority or default_priority(request.format, request.quality)
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"❌ Geçersiz öncelik: {priority} ({', '.join(PRIORITIES)})")
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400,
+                            detail=f"❌ Idempotency-Key 1-{IDEMPOTENCY_KEY_MAX_LENGTH} karakter olmalı")
+    
+    job_id = str(uuid.uuid4())
+    if idempotency_key is not None:
+        replay = await claim_idempotency_key(f"{client[0]}:{idempotency_key}", job_id, request_fingerprint(request))
+        if replay is not None:
+            owner_id, owner = replay
+            CACHE_LOOKUPS.labels("idempotency", "hit").inc()
+            logger.info(f"🔁 Tekrar istek (Idempotency-Key) {owner_id} işine yönlendirildi")
+            response.headers["Idempotent-Replayed"] = "true"
+            return DownloadResponse(job_id=owner_id, status=owner["status"],
+                                    message="🔁 Bu istek daha önce alındı, mevcut iş döndürüldü")
+        CACHE_LOOKUPS.labels("idempotency", "miss").inc()
+    
     try:
-        job_id = str(uuid.uuid4())
+        await ensure_disk_space()
+        
         platform = request.platform or get_platform_from_url(request.url)
         
         logger.info(f"📥 Yeni indirme isteği: {platform} - {request.url}")
         
-        # Background task olarak indirme işlemini başlat
-        background_tasks.add_task(
-            download_worker, 
-            job_id, 
-            request.url, 
-            request.format, 
-            request.quality
-        )
-        
-        return DownloadResponse(
-            job_id=job_id,
-            status="queued",
-            message=f"🎬 {platform.title()} videosu indirme kuyruğuna eklendi"
-        )
+        job_id, job, message = submit_job(request.url, request.format, request.quality, platform, client, priority,
+                                          job_id=job_id)
+        return DownloadResponse(job_id=job_id, status=job["status"], message=message)
         
+    except HTTPException:
+        # İş oluşturulmadı: aynı anahtarla yeniden deneme yeni iş açabilsin
+        job_store.release_idempotency_keys(job_id)
+        raise
+    except PlatformUnavailable as e:
+        job_store.release_idempotency_keys(job_id)
+        raise HTTPException(status_code=503, detail=f"⚡ {e}",
+                            headers={"Retry-After": str(int(e.retry_after) + 1)})
     except Exception as e:
+        job_store.release_idempotency_keys(job_id)
         logger.error(f"❌ İndirme başlatma hatası: {e}")
         raise HTTPException(status_code=400, detail=f"İndirme başlatılamadı: {str(e)}")
 
+@app.post("/batch", dependencies=[Depends(check_api_key)])
+async def start_batch_download(request: BatchRequest, client: Tuple[str, float] = Depends(get_api_client)):
+    """📦 Oynatma listesi / çoklu video sayfası ya da URL listesi için toplu indirme
+
+    Öğeler normal indirme işleri olarak en fazla `concurrency` tanesi aynı
+    anda kuyruğa verilir. Dönen job_id /status, /events ve DELETE /job ile
+    kullanılır; bitince dosyalar /batch/{job_id}/zip ile tek arşivde iner.
+    """
+    source_url = (request.url or "").strip() or None
+    urls = list(dict.fromkeys(url.strip() for url in request.urls if url.strip()))
+    if bool(source_url) == bool(urls):
+        raise HTTPException(status_code=400, detail="❌ 'url' (liste) veya 'urls' alanlarından yalnızca biri verilmeli")
+    if len(urls) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"❌ Tek istekte en fazla {BATCH_MAX_ITEMS} URL gönderilebilir"
+        )
+    priority = request.priority or default_priority(request.format, request.quality)
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"❌ Geçersiz öncelik: {priority} ({', '.join(PRIORITIES)})")
+    concurrency = min(max(request.concurrency or BATCH_CONCURRENCY, 1), BATCH_CONCURRENCY)
+    
+    await ensure_disk_space()
+    
+    if source_url:
+        try:
+            platform_guard.ensure_available(get_platform_from_url(source_url))
+        except PlatformUnavailable as e:
+            raise HTTPException(status_code=503, detail=f"⚡ {e}",
+                                headers={"Retry-After": str(int(e.retry_after) + 1)})
+    
+    batch_id = str(uuid.uuid4())
+    batch = new_batch(source_url, urls, request.format, request.quality, client, priority, concurrency)
+    logger.info(f"📦 Yeni toplu indirme isteği: {source_url or f'{len(urls)} URL'}")
+    # Toplu iş bu sürecin belleğinde yürütülür (paylaşımlı modda da)
+    job_store.insert(batch_id, batch)
+    jobs[batch_id] = batch
+    start_batch(batch_id)
+    
+    return DownloadResponse(
+        job_id=batch_id,
+        status=batch["status"],
+        message="📦 Liste açılıyor, videolar sırayla kuyruğa eklenecek" if source_url
+        else f"📦 {len(urls)} video sırayla kuyruğa eklenecek"
+    )
+
+@app.get("/batch/{batch_id}/zip", dependencies=[Depends(check_api_key)])
+def download_batch_zip(batch_id: str):
+    """🗜️ Toplu işin tamamlanan dosyalarını tek ZIP olarak indir
+
+    Arşiv gönderilirken oluşturulur; diskte ikinci bir kopya yazılmaz.
+    """
+    batch = get_job(batch_id)
+    if batch is None or batch.get("type") != "batch":
+        raise HTTPException(status_code=404, detail="❌ Toplu iş bulunamadı")
+    if batch["status"] not in TERMINAL_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"❌ Toplu iş henüz bitmedi ({batch.get('completed', 0)}/{batch.get('total', 0)})"
+        )
+    
+    entries = batch.get("entries") or []
+    width = len(str(len(entries)))
+    files = []
+    for number, entry in enumerate(entries, 1):
+        job_id = entry.get("job_id")
+        job = get_job(job_id) if entry.get("status") == "completed" and job_id else None
+        if job is None or not job_file_exists(job):
+            continue
+        touch_job(job_id, job)
+        file_path = job["file_path"]
+        files.append((file_path, f"{number:0{width}d} - {download_filename(job, Path(file_path).suffix[1:])}"))
+    if not files:
+        raise HTTPException(status_code=404, detail="❌ İndirilebilir dosya bulunamadı")
+    
+    filename = download_filename({"title": batch.get("title") or "liste"}, "zip")
+    return StreamingResponse(
+        iter_zip(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
+
+async def wait_for_job_change(job_id: str, since_version: int, timeout: float) -> Optional[Dict[str, Any]]:
+    """Sürümü since_version'ı geçen iş görünümünü bekle; süre dolarsa None.
+
+    Değişiklikler olay dağıtıcısından (JobEventHub) gelir: ilerleme olayları
+    seyreltildiğinden yoklama en sık EVENT_MIN_INTERVAL aralıkla döner.
+    Silinen iş için durum "deleted" olan görünüm döner.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    job_events.subscribe(job_id, queue)
+    try:
+        # Abone olduktan sonra tekrar oku: arada gelen değişiklik kaçmasın
+        job = await asyncio.to_thread(get_job, job_id)
+        if job is None:
+            return {"job_id": job_id, "status": "deleted"}
+        view = job_status_view(job_id, job)
+        deadline = time.monotonic() + timeout
+        while (view.get("version") or 0) <= since_version:
+            try:
+                _, name, view = await asyncio.wait_for(queue.get(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                return None
+            if name == "deleted":
+                return view
+        return view
+    finally:
+        job_events.unsubscribe(job_id, queue)
+
 @app.get("/status/{job_id}", dependencies=[Depends(check_api_key)])
-def get_download_status(job_id: str):
-    """📊 İndirme durumunu kontrol et"""
-    if job_id not in jobs:
+async def get_download_status(job_id: str, request: Request, response: Response,
+                              since_version: Optional[int] = None, timeout: float = STATUS_LONG_POLL_MAX):
+    """📊 İndirme durumunu kontrol et
+
+    Yanıt işin sürümünden üretilen ETag taşır; If-None-Match aynıysa 304
+    döner. since_version verilirse iş bu sürümden ileri gidene kadar (en
+    fazla timeout sn, üst sınır STATUS_LONG_POLL_MAX) beklenir; değişmezse 304.
+    """
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="❌ İş bulunamadı")
+    view = job_status_view(job_id, job)
     
-    job = jobs[job_id].copy()
-    
-    # Hassas bilgileri temizle
-    if "error" in job and job["error"]:
-        job["error"] = str(job["error"])[:200]  # Hata mesajını kısalt
+    if (since_version is not None and (view.get("version") or 0) <= since_version
+            and view["status"] not in TERMINAL_STATUSES):
+        changed = await wait_for_job_change(job_id, since_version, min(max(timeout, 0.0), STATUS_LONG_POLL_MAX))
+        if changed is not None and changed["status"] == "deleted":
+            raise HTTPException(status_code=404, detail="❌ İş bulunamadı")
+        if changed is None:
+            # Seyreltilen ilerleme olayları dışındaki değişiklikler için son hali oku
+            job = await asyncio.to_thread(get_job, job_id) or job
+            changed = job_status_view(job_id, job)
+        view = changed
     
-    return job
+    etag = status_etag(view)
+    unchanged = (since_version is not None and (view.get("version") or 0) <= since_version
+                 or etag in request.headers.get("if-none-match", ""))
+    if unchanged:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return view
 
-@app.get("/download/{job_id}", dependencies=[Depends(check_api_key)])
-def download_file(job_id: str):
-    """📥 Tamamlanan dosyayı indir"""
-    if job_id not in jobs:
+def batch_status(job_ids: List[str], versions: Dict[str, int],
+                 found: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """POST /status yanıtı; event loop'ta çalışır (kuyruk sırası loop'un kuyruğundan okunur)"""
+    result: Dict[str, Any] = {"jobs": {}, "unchanged": [], "not_found": []}
+    for job_id in job_ids:
+        job = found.get(job_id)
+        if job is None:
+            result["not_found"].append(job_id)
+            continue
+        # Sürüm ve durum görünümün kopyasından okunur: ikisi aynı anı yansıtır
+        view = job_status_view(job_id, job)
+        if job_id in versions and view["version"] <= versions[job_id] and view["status"] != "queued":
+            # Kuyruktaki işin sırası sürüm artmadan değiştiği için her zaman döner
+            result["unchanged"].append(job_id)
+        else:
+            result["jobs"][job_id] = view
+    return result
+
+@app.post("/status", dependencies=[Depends(check_api_key)])
+async def get_download_statuses(request: StatusBatchRequest):
+    """📊 Birden fazla işin durumunu tek istekte döndür (indirme geçmişi ekranı)"""
+    job_ids = list(dict.fromkeys(request.job_ids))
+    if len(job_ids) > STATUS_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"❌ En fazla {STATUS_BATCH_MAX_IDS} iş sorgulanabilir")
+    # Yalnızca depo okuması thread'de; görünümler tek /status gibi loop'ta üretilir
+    found = await asyncio.to_thread(get_jobs, job_ids) if SHARED_JOB_STATE else get_jobs(job_ids)
+    return batch_status(job_ids, request.versions, found)
+
+@app.get("/events/{job_id}", dependencies=[Depends(check_api_key)])
+async def job_event_stream(job_id: str):
+    """📡 İş ilerlemesini Server-Sent Events ile gönder
+
+    İlk olay güncel durumdur; ardından ilerleme olayları gelir. Akış
+    completed/failed olayıyla (iş silinirse deleted) kapanır.
+    """
+    if await asyncio.to_thread(get_job, job_id) is None:
         raise HTTPException(status_code=404, detail="❌ İş bulunamadı")
     
-    job = jobs[job_id]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+    job_events.subscribe(job_id, queue)
+    
+    async def event_stream():
+        try:
+            job = await asyncio.to_thread(get_job, job_id)
+            if job is None:
+                yield format_sse("deleted", {"job_id": job_id, "status": "deleted"})
+                return
+            view = job_status_view(job_id, job)
+            if view["status"] in TERMINAL_STATUSES:
+                yield format_sse(view["status"], view)
+                return
+            yield format_sse("progress", view)
+            
+            while True:
+                try:
+                    _, name, data = await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Proxy'lerin bağlantıyı kapatmaması için yorum satırı
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(name, data)
+                if name in TERMINAL_STATUSES or name == "deleted":
+                    return
+        finally:
+            job_events.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/ws/jobs")
+async def job_event_socket(websocket: WebSocket):
+    """📡 Birden fazla işin ilerlemesini tek WebSocket üzerinden gönder
+
+    Yetki: `Authorization: Bearer <API anahtarı>` başlığı veya `?api_key=` parametresi
+    (API_KEYS ile tanımlanan anahtarlar dahil).
+    İstemci `{"subscribe": [job_id, ...]}` / `{"unsubscribe": [...]}` mesajları
+    gönderir; sunucu `{"job_id", "event", "data"}` mesajlarıyla yanıt verir.
+    """
+    auth = websocket.headers.get("authorization", "")
+    token = auth[7:] if auth.lower().startswith("bearer ") else websocket.query_params.get("api_key")
+    if token not in API_CLIENTS:
+        await websocket.close(code=4401)
+        return
+    client = client_label(API_CLIENTS[token][0], websocket.headers.get("x-client-id", ""))
+    await websocket.accept()
+    logger.info(f"📡 WebSocket bağlandı: {client}")
+    
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+    subscribed: Set[str] = set()
+    
+    async def receive_commands():
+        while True:
+            message = await websocket.receive_json()
+            for job_id in message.get("subscribe", []):
+                job = await asyncio.to_thread(get_job, job_id)
+                if job is None:
+                    await websocket.send_json({"job_id": job_id, "event": "not_found", "data": None})
+                    continue
+                view = job_status_view(job_id, job)
+                name = view["status"] if view["status"] in TERMINAL_STATUSES else "progress"
+                await websocket.send_json({"job_id": job_id, "event": name, "data": view})
+                if name not in TERMINAL_STATUSES and job_id not in subscribed:
+                    subscribed.add(job_id)
+                    job_events.subscribe(job_id, queue)
+            for job_id in message.get("unsubscribe", []):
+                subscribed.discard(job_id)
+                job_events.unsubscribe(job_id, queue)
+    
+    async def send_events():
+        while True:
+            job_id, name, data = await queue.get()
+            if job_id not in subscribed:
+                continue
+            await websocket.send_json({"job_id": job_id, "event": name, "data": data})
+            if name in TERMINAL_STATUSES or name == "deleted":
+                subscribed.discard(job_id)
+                job_events.unsubscribe(job_id, queue)
+    
+    receiver = asyncio.create_task(receive_commands())
+    sender = asyncio.create_task(send_events())
+    try:
+        await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        sender.cancel()
+        for job_id in subscribed:
+            job_events.unsubscribe(job_id, queue)
+
+@app.api_route("/download/{job_id}", methods=["GET", "HEAD"], dependencies=[Depends(check_api_key)])
+def download_file(job_id: str, inline: bool = False):
+    """📥 Tamamlanan dosyayı indir
+
+    Range/If-Range (kaldığı yerden devam, ileri sarma), ETag ve
+    Last-Modified desteklenir. `inline=true` ile oynatıcıda açılır.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="❌ İş bulunamadı")
     
     if job.get("status") != "completed":
         raise HTTPException(
@@ -302,29 +2608,138 @@ def download_file(job_id: str):
             detail=f"❌ Dosya henüz hazır değil. Durum: {job.get('status', 'unknown')}"
         )
     
+    return job_file_response(job_id, job, inline)
+
+def download_filename(job: Dict[str, Any], ext: str) -> str:
+    filename = job.get("title") or "video"
+    # Dosya adını temizle
+    filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return f"{filename or 'video'}.{ext}"
+
+def accel_path(file_path: str) -> str:
+    """downloads/ altındaki göreli yol (nginx internal location'ına eklenir)"""
+    try:
+        return Path(file_path).resolve().relative_to(DOWNLOAD_DIR.resolve()).as_posix()
+    except ValueError:
+        return Path(file_path).name
+
+def job_file_response(job_id: str, job: Dict[str, Any], inline: bool) -> MediaFileResponse:
+    """Tamamlanan işin dosyası (Range/ETag destekli)"""
     file_path = job.get("file_path")
     if not file_path or not Path(file_path).exists():
         raise HTTPException(status_code=404, detail="❌ Dosya bulunamadı")
     
-    filename = job.get("title", "video")
-    # Dosya adını temizle
-    filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
-    filename = f"{filename}.{Path(file_path).suffix[1:]}"
+    # Janitor en uzun süredir indirilmeyen işleri önce siler
+    touch_job(job_id, job)
+    
+    filename = download_filename(job, Path(file_path).suffix[1:])
     
-    return FileResponse(
-        file_path, 
+    return MediaFileResponse(
+        file_path,
         filename=filename,
-        media_type='application/octet-stream'
+        content_disposition_type="inline" if inline else "attachment",
+        accel_redirect=f"{DOWNLOAD_ACCEL_REDIRECT}{accel_path(file_path)}" if DOWNLOAD_ACCEL_REDIRECT else None,
     )
 
+def can_stream(job: Dict[str, Any]) -> bool:
+    stream_path = job.get("stream_path")
+    return (job["status"] == "downloading" and bool(job.get("streamable"))
+            and bool(stream_path) and Path(stream_path).exists())
+
+def stream_write_state(job: Optional[Dict[str, Any]]) -> Optional[bool]:
+    """iter_growing_file için: True yazım sürüyor, False dosya tamam, None yarıda kaldı.
+
+    Yalnızca tamamlanan iş dosyayı bitirmiş sayılır. Ertelenen (queued),
+    yeniden başlayan, başarısız veya silinen işin dosyası eksik kalmıştır;
+    uzunluğu bilinmeyen gövde temiz bitseydi istemci eksik dosyayı tam sanırdı.
+    """
+    status = job["status"] if job is not None else None
+    if status == "completed":
+        return False
+    # processing: indirme bitti, son işlem sürüyor; tamamlanmayı bekle
+    if status in ("downloading", "processing"):
+        return True
+    return None
+
+@app.get("/stream/{job_id}", dependencies=[Depends(check_api_key)])
+async def stream_file(job_id: str, request: Request, inline: bool = False):
+    """📶 Dosyayı sunucu indirirken gönder (ilerlemeli indirme)
+
+    İlk baytlar indirme başlar başlamaz gelir. Birleştirme/son işlem
+    gereken formatlarda (veya iş zaten bittiyse) dosya tamamlanınca
+    /download ile aynı şekilde gönderilir.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+    job_events.subscribe(job_id, queue)
+    try:
+        while True:
+            job = await asyncio.to_thread(get_job, job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="❌ İş bulunamadı")
+            if job["status"] == "failed":
+                raise HTTPException(status_code=400, detail="❌ İndirme başarısız oldu")
+            if job["status"] == "completed":
+                return await asyncio.to_thread(job_file_response, job_id, job, inline)
+            if can_stream(job):
+                break
+            if await request.is_disconnected():
+                raise HTTPException(status_code=408, detail="İstemci bağlantısı kapandı")
+            try:
+                await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        job_events.unsubscribe(job_id, queue)
+    
+    async def still_writing() -> Optional[bool]:
+        return stream_write_state(await asyncio.to_thread(get_job, job_id))
+    
+    async def body():
+        try:
+            async for chunk in iter_growing_file(job["stream_path"], still_writing):
+                yield chunk
+        except GrowingFileAborted:
+            # Bağlantı eksik gövdeyle kapanır; istemci dosyayı eksik sayar
+            logger.warning(f"⚠️ İlerlemeli gönderim yarıda kaldı: {job_id}")
+            raise
+    
+    ext = job.get("stream_ext") or "mp4"
+    headers = {"Content-Disposition": content_disposition(download_filename(job, ext), "inline" if inline else "attachment")}
+    if job.get("stream_size"):
+        headers["Content-Length"] = str(job["stream_size"])
+    return StreamingResponse(body(), media_type=media_type_for(f"file.{ext}"), headers=headers)
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    return base64.urlsafe_b64encode(f"{key[0]!r}|{key[1]}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, _, job_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().partition("|")
+        return float(created_at), job_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="❌ Geçersiz cursor")
+
 @app.get("/jobs", dependencies=[Depends(check_api_key)])
-def list_all_jobs():
-    """📋 Tüm işleri listele"""
+def list_all_jobs(status: Optional[str] = None, platform: Optional[str] = None, since: Optional[float] = None,
+                  cursor: Optional[str] = None, limit: int = JOBS_PAGE_SIZE):
+    """📋 İşleri oluşturma sırasıyla sayfa sayfa listele.
+
+    status / platform / since (created_at >= since) ile süzülür; yanıttaki
+    next_cursor bir sonraki sayfa için cursor olarak verilir (son sayfada null).
+    """
+    if not 1 <= limit <= JOBS_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"❌ limit 1 ile {JOBS_PAGE_MAX} arasında olmalı")
+    after = decode_cursor(cursor) if cursor else None
+    table = job_store if SHARED_JOB_STATE else jobs
+    page, next_key, total = table.page(status, platform, since, after, limit)
     return {
-        "total": len(jobs),
+        "total": total,
+        "count": len(page),
+        "next_cursor": encode_cursor(next_key) if next_key else None,
         "jobs": [
             {
                 "job_id": job_id,
+                "type": job.get("type", "download"),
                 "status": job["status"],
                 "platform": job.get("platform", "unknown"),
                 "title": job.get("title", "Bilinmiyor"),
@@ -333,45 +2748,39 @@ def list_all_jobs():
                 "completed_at": job.get("completed_at"),
                 "file_size": job.get("file_size", 0)
             }
-            for job_id, job in jobs.items()
+            for job_id, job in page
         ]
     }
 
 @app.delete("/job/{job_id}", dependencies=[Depends(check_api_key)])
 def delete_job(job_id: str):
     """🗑️ İşi ve dosyasını sil"""
-    if job_id not in jobs:
+    job = get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="❌ İş bulunamadı")
     
-    job = jobs[job_id]
-    
-    # Dosyaları sil
-    if job.get("file_path"):
-        try:
-            Path(job["file_path"]).unlink(missing_ok=True)
-        except Exception as e:
-            logger.warning(f"Dosya silinirken hata: {e}")
-    
-    # Thumbnail'i sil
-    if job.get("thumbnail"):
-        try:
-            Path(job["thumbnail"]).unlink(missing_ok=True)
-        except Exception as e:
-            logger.warning(f"Thumbnail silinirken hata: {e}")
+    if job.get("type") == "batch":
+        # Çalışan toplu iş 'deleted' olayıyla durur; öğeleri de silinir
+        purge_job(job_id, job)
+        purge_batch_entries(job.get("entries") or [])
+        return {"message": "✅ Toplu iş ve dosyaları silindi"}
     
-    # İşi sil
-    del jobs[job_id]
+    # İşi ve açık olay akışlarını kaldır; dosyalar (medya, thumbnail, info.json)
+    # onları kullanan başka iş kalmadıysa silinir
+    purge_job(job_id, job)
     
+    if job_refs(job.get("source_job") or job_id):
+        return {"message": "✅ İş silindi, dosya başka işler tarafından kullanılıyor"}
     return {"message": "✅ İş ve dosyalar silindi"}
 
 @app.get("/platforms")
 def get_supported_platforms():
     """🌐 Desteklenen platformları listele"""
-    return {
+    response = {
         "platforms": {
             "youtube": {
                 "name": "YouTube",
-                "formats": ["mp4", "mp3"],
+                "formats": ["mp4", "mp3", "m4a", "opus"],
                 "qualities": ["high", "medium", "low"],
                 "features": ["thumbnails", "metadata", "playlists"]
             },
@@ -401,81 +2810,116 @@ def get_supported_platforms():
             }
         }
     }
+    # Anlık erişilebilirlik: devre kesici durumu ve hız sınırı
+    limits = platform_guard.snapshot()
+    for name, platform in response["platforms"].items():
+        platform["status"] = limits.get(name)
+    return response
 
-@app.get("/api/thumbnail")
-async def get_video_thumbnail(url: str):
-    """🖼️ Video thumbnail'ını al"""
+async def resolve_thumbnail(url: str) -> Tuple[int, Dict[str, Any]]:
+    """Tek URL için thumbnail yanıtı: (HTTP durum kodu, gövde)"""
     try:
-        logger.info(f"🖼️ Thumbnail isteniyor: {url}")
-        
         # Platform tespit et
         platform = get_platform_from_url(url)
         
-        # yt-dlp ile video bilgilerini al (indirmeden)
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'writethumbnail': False,
-            'writeinfojson': False,
-        }
+        # yt-dlp ile video bilgilerini al (indirmeden); önbellek ve
+        # aynı URL için devam eden çıkarma işi paylaşılır
+        try:
+            metadata = await metadata_cache.aget_or_extract(
+                url, lambda: fetch_metadata(url), metadata_executor)
+        except Exception as e:
+            logger.error(f"❌ Video bilgisi alınamadı: {e}")
+            return 400, {
+                "success": False,
+                "error": f"Video bilgisi alınamadı: {str(e)}",
+                "platform": platform
+            }
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info = ydl.extract_info(url, download=False)
-                
-                # Thumbnail URL'sini al
-                thumbnail_url = None
-                
-                # En iyi kaliteli thumbnail'ı bul
-                if 'thumbnails' in info and info['thumbnails']:
-                    # En yüksek kaliteli thumbnail'ı seç
-                    thumbnails = info['thumbnails']
-                    # Width ve height'a göre sırala
-                    thumbnails_sorted = sorted(thumbnails, 
-                                             key=lambda x: (x.get('width', 0) * x.get('height', 0)), 
-                                             reverse=True)
-                    
-                    if thumbnails_sorted:
-                        thumbnail_url = thumbnails_sorted[0]['url']
-                elif 'thumbnail' in info:
-                    thumbnail_url = info['thumbnail']
-                
-                if thumbnail_url:
-                    logger.info(f"✅ Thumbnail bulundu: {thumbnail_url}")
-                    return JSONResponse({
-                        "success": True,
-                        "thumbnail_url": thumbnail_url,
-                        "platform": platform,
-                        "title": info.get('title', 'Bilinmiyor'),
-                        "duration": info.get('duration', 0),
-                        "uploader": info.get('uploader', 'Bilinmiyor')
-                    })
-                else:
-                    logger.warning(f"❌ Thumbnail bulunamadı: {url}")
-                    return JSONResponse({
-                        "success": False,
-                        "error": "Thumbnail bulunamadı",
-                        "platform": platform
-                    }, status_code=404)
-                    
-            except Exception as e:
-                logger.error(f"❌ Video bilgisi alınamadı: {e}")
-                return JSONResponse({
-                    "success": False,
-                    "error": f"Video bilgisi alınamadı: {str(e)}",
-                    "platform": platform
-                }, status_code=400)
+        thumbnail_url = metadata["thumbnail_url"]
+        if thumbnail_url:
+            logger.info(f"✅ Thumbnail bulundu: {thumbnail_url}")
+            return 200, {
+                "success": True,
+                "thumbnail_url": thumbnail_url,
+                "platform": platform,
+                "title": metadata["title"],
+                "duration": metadata["duration"],
+                "uploader": metadata["uploader"]
+            }
+        else:
+            logger.warning(f"❌ Thumbnail bulunamadı: {url}")
+            return 404, {
+                "success": False,
+                "error": "Thumbnail bulunamadı",
+                "platform": platform
+            }
                 
     except Exception as e:
         logger.error(f"❌ Thumbnail endpoint hatası: {e}")
-        return JSONResponse({
+        return 500, {
             "success": False,
             "error": f"Genel hata: {str(e)}"
-        }, status_code=500)
+        }
+
+@app.get("/api/thumbnail")
+async def get_video_thumbnail(url: str):
+    """🖼️ Video thumbnail'ını al"""
+    logger.info(f"🖼️ Thumbnail isteniyor: {url}")
+    status_code, body = await resolve_thumbnail(url)
+    return JSONResponse(body, status_code=status_code)
+
+@app.post("/api/thumbnails")
+async def get_video_thumbnails(batch: ThumbnailBatchRequest, request: Request):
+    """🖼️ Birden fazla videonun thumbnail'ını tek istekte al
+
+    Çıkarma işleri THUMBNAIL_BATCH_CONCURRENCY sınırıyla eş zamanlı çalışır.
+    `stream` açıksa (veya Accept: application/x-ndjson) her sonuç hazır
+    olduğu anda bir NDJSON satırı olarak gönderilir; aksi halde tüm
+    sonuçlar URL -> yanıt haritası olarak döner.
+    """
+    urls = list(dict.fromkeys(u.strip() for u in batch.urls if u.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="❌ URL listesi boş")
+    if len(urls) > THUMBNAIL_BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"❌ Tek istekte en fazla {THUMBNAIL_BATCH_MAX_URLS} URL gönderilebilir"
+        )
+    
+    logger.info(f"🖼️ Toplu thumbnail isteniyor: {len(urls)} URL")
+    semaphore = asyncio.Semaphore(THUMBNAIL_BATCH_CONCURRENCY)
+    
+    async def resolve_one(url: str) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            status_code, body = await resolve_thumbnail(url)
+        return url, {"status_code": status_code, **body}
+    
+    stream = batch.stream or "application/x-ndjson" in request.headers.get("accept", "")
+    if not stream:
+        results = await asyncio.gather(*(resolve_one(url) for url in urls))
+        return {"total": len(urls), "results": dict(results)}
+    
+    async def ndjson_lines():
+        tasks = [asyncio.create_task(resolve_one(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                url, body = await next_done
+                yield json.dumps({"url": url, **body}, ensure_ascii=False) + "\n"
+        finally:
+            # İstemci bağlantıyı kestiyse kalan işleri iptal et
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+STARTUP_TIMINGS["import"] = round(time.perf_counter() - IMPORT_STARTED, 3)
 
 if __name__ == "__main__":
     import uvicorn
     import os
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
+    if WEB_CONCURRENCY > 1:
+        # Çoklu süreçte uvicorn uygulamayı import string'inden yükler
+        uvicorn.run("api:app", host="0.0.0.0", port=port, log_level="info", workers=WEB_CONCURRENCY)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
@@ -0,0 +1,178 @@
+"""
+Ses indirme hattı: yalnızca ses akışı seçimi, kopyalama veya dönüştürme.
+
+mp3 / m4a / opus istekleri için format seçici, hedef bit hızını karşılayan
+en küçük ses akışını (yoksa en iyi ses akışını, o da yoksa sesli tam
+dosyayı) seçer; istenen codec'teki akışlar önce denenir. İndirmeden sonra:
+
+  * Kaynak codec hedefle aynıysa (ör. webm/opus -> .opus, m4a/aac -> .m4a)
+    ses yeniden kodlanmadan yalnızca kapsayıcı değiştirilir (stream copy);
+    bu hızlıdır ve indirme thread'inde yapılır
+  * Aksi halde ffmpeg ile dönüştürülür; dönüştürmeler indirme havuzundan
+    ayrı, boyutu sınırlı bir havuzda çalışır ve her ffmpeg süreci
+    FFMPEG_THREADS thread ile sınırlanır. Böylece CPU yoğun kodlama ağ
+    bekleyen indirmelerin worker'larını tutmaz
+
+Dönüştürme yt-dlp'nin FFmpegExtractAudioPP'si ile yapılır. yt-dlp ilk
+kullanımda içe aktarılır; format tabloları ve seçiciler API açılırken yt-dlp
+yüklemeden kullanılabilir.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import yt_dlp
+    from yt_dlp.postprocessor import FFmpegExtractAudioPP
+
+
+class AudioFormat(NamedTuple):
+    ext: str            # Son dosya uzantısı
+    codec: str          # ffprobe codec adı (kopyalanabilir kaynak)
+    acodec_prefix: str  # yt-dlp format 'acodec' alanının başı
+
+
+AUDIO_FORMATS: Dict[str, AudioFormat] = {
+    "mp3": AudioFormat("mp3", "mp3", "mp3"),
+    "m4a": AudioFormat("m4a", "aac", "mp4a"),
+    "opus": AudioFormat("opus", "opus", "opus"),
+}
+
+# Kalite -> hedef bit hızı (kbps); "best" en iyi kaynak ve VBR en yüksek kalite
+AUDIO_BITRATES: Dict[str, int] = {
+    "high": 192,
+    "medium": 128,
+    "low": 96,
+}
+
+
+class AudioConversionError(Exception):
+    """ffmpeg bulunamadı veya dönüştürme başarısız"""
+
+
+def audio_format_selector(format_type: str, quality: str) -> str:
+    """Hedef bit hızını karşılayan en küçük ses akışı (önce kopyalanabilir codec)"""
+    prefix = AUDIO_FORMATS[format_type].acodec_prefix
+    bitrate = AUDIO_BITRATES.get(quality)
+    if bitrate is None:
+        return f"bestaudio[acodec^={prefix}]/bestaudio/best"
+    # abr bilinmeyen akışlar da elenmez (>=?). Hedefe ulaşan akış yoksa
+    # kayıplı bir kaynağı daha yüksek bit hızına dönüştürmek kalite kazandırmaz;
+    # hedef codec'teki en iyi akış kopyalanır
+    floor = f"[abr>=?{bitrate}]"
+    return (f"worstaudio[acodec^={prefix}]{floor}/worstaudio{floor}"
+            f"/bestaudio[acodec^={prefix}]/bestaudio/best")
+
+
+def audio_extension(format_type: str) -> Optional[str]:
+    """Ses formatı için son dosya uzantısı (ses formatı değilse None)"""
+    audio_format = AUDIO_FORMATS.get(format_type)
+    return audio_format.ext if audio_format else None
+
+
+class AudioConverter:
+    """Ses kopyalama/dönüştürme ve sınırlı dönüştürme havuzu"""
+
+    def __init__(self, workers: int, ffmpeg_threads: int = 1):
+        self.workers = workers
+        self._params = {
+            "quiet": True,
+            "no_warnings": True,
+            # Her ffmpeg süreci en fazla bu kadar çekirdek kullanır
+            "postprocessor_args": {"extractaudio+ffmpeg_o": ["-threads", str(ffmpeg_threads)]},
+        }
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._available: Optional[bool] = None
+
+    def _processor(self, ydl: "yt_dlp.YoutubeDL", format_type: str, quality: str) -> "FFmpegExtractAudioPP":
+        from yt_dlp.postprocessor import FFmpegExtractAudioPP
+        bitrate = AUDIO_BITRATES.get(quality)
+        processor = FFmpegExtractAudioPP(
+            ydl,
+            preferredcodec=AUDIO_FORMATS[format_type].ext,
+            # Bit hızı yoksa mp3 için VBR en yüksek kalite (0)
+            preferredquality=str(bitrate) if bitrate else "0",
+        )
+        if not processor.available:
+            raise AudioConversionError("ffmpeg bulunamadı, ses dönüştürülemiyor")
+        return processor
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            import yt_dlp
+            from yt_dlp.postprocessor import FFmpegExtractAudioPP
+            with yt_dlp.YoutubeDL(self._params) as ydl:
+                self._available = FFmpegExtractAudioPP(ydl).available
+        return self._available
+
+    def needs_transcode(self, path: Path, format_type: str) -> bool:
+        """Kaynak yeniden kodlanmalı mı? (codec aynıysa yalnızca kapsayıcı değişir)"""
+        import yt_dlp
+        with yt_dlp.YoutubeDL(self._params) as ydl:
+            codec = self._processor(ydl, format_type, "best").get_audio_codec(str(path))
+        return codec != AUDIO_FORMATS[format_type].codec
+
+    def convert(self, path: Path, format_type: str, quality: str) -> Path:
+        """Dosyayı hedef formata getir; kaynak dosya silinir, son dosya döner.
+
+        ffmpeg çıktıyı doğrudan hedef ada yazar; süreç yarıda kalırsa yarım
+        dosya bitmiş sanılmasın diye dönüştürme ara adla (<ad>.audio.<ext>)
+        yapılır ve sonuç en son yeniden adlandırılır.
+        """
+        import yt_dlp
+        staging = path.with_name(f"{path.stem}.audio{path.suffix}")
+        os.replace(path, staging)
+        info = {"filepath": str(staging), "ext": staging.suffix[1:], "acodec": None, "vcodec": None}
+        try:
+            with yt_dlp.YoutubeDL(self._params) as ydl:
+                files_to_delete, info = self._processor(ydl, format_type, quality).run(info)
+        except (yt_dlp.utils.PostProcessingError, AudioConversionError) as e:
+            # Kaynak yerine konur; iş yeniden denenirse tekrar indirilmez
+            os.replace(staging, path)
+            raise AudioConversionError(str(e)) from e
+        for leftover in files_to_delete:
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+        output = Path(info["filepath"])
+        final = path.with_suffix(output.suffix)
+        os.replace(output, final)
+        return final
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Dönüştürme işini havuza ver (fn dönüştürmeyi kendisi çağırır)"""
+        with self._lock:
+            self._queued += 1
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        return self._executor.submit(run)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._queued,
+                # ffmpeg, yt-dlp yüklenirken kontrol edilir; o zamana kadar None
+                "ffmpeg_available": self._available,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Soğuk başlangıç benchmark'ı: import süresi, dinlemeye başlama ve hazır olma.
+
+  * import: `python -X importtime -c "import api"` ile api modülünün toplam
+    yüklenme süresi ve en ağır modüller. yt-dlp api importunda yüklenirse
+    (tembel yükleme bozulduysa) hata sayılır
+  * serving: uvicorn başlatıldıktan /health ilk 200 dönene kadar geçen süre
+  * ready: /ready ilk 200 dönene kadar (yt-dlp yüklendi, çıkarma süreçleri ısındı)
+
+Sınır verilirse (--max-import, --max-serving, --max-ready) ortanca değer
+sınırı aşınca çıkış kodu 1 olur; CI ve imaj derlemesinde gerilemeler görünür.
+Ağ erişimi gerekmez.
+
+Kullanım:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --import-only --max-import 3
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_workers import REPO_ROOT, start_api  # noqa: E402
+
+# api importunda yüklenmemesi gereken ağır modüller (arka planda yüklenir)
+LAZY_MODULES = ("yt_dlp",)
+
+
+def measure_import(workdir: Path) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """(api toplam sn, en ağır 10 üst düzey modül, yanlışlıkla yüklenen tembel modüller)
+
+    api importu downloads/ klasörünü ve iş veritabanını oluşturur; ikisi de
+    geçici workdir içinde kalır (imaj katmanına/depoya yazılmaz).
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT), JOB_DB_PATH=str(workdir / "downloads" / "jobs.db"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api"],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    modules: List[Tuple[float, str]] = []
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        loaded.add(name.strip())
+        seconds = int(cumulative) / 1e6
+        # Girinti derinliği: üst düzey modüller ve api'nin doğrudan içe aktardıkları
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == "api":
+            total = seconds
+        elif depth <= 1:
+            modules.append((seconds, name.strip()))
+    modules.sort(reverse=True)
+    return total, modules[:10], [name for name in LAZY_MODULES if name in loaded]
+
+
+def wait_status(url: str, path: str, started: float, timeout: float) -> Optional[float]:
+    """path 200 dönene kadar geçen süre (süre dolarsa None)"""
+    import httpx
+
+    deadline = started + timeout
+    with httpx.Client(base_url=url, timeout=2) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if client.get(path).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+    return None
+
+
+def measure_cold_start(port: int, timeout: float) -> Dict[str, Optional[float]]:
+    import httpx
+
+    with tempfile.TemporaryDirectory(prefix="linkcim-startup-") as workdir:
+        started = time.perf_counter()
+        process = start_api(1, port, Path(workdir), downloads_per_worker=2, shared=False)
+        try:
+            url = f"http://127.0.0.1:{port}"
+            serving = wait_status(url, "/health", started, timeout)
+            ready = wait_status(url, "/ready", started, timeout) if serving is not None else None
+            phases = httpx.get(f"{url}/ready", timeout=2).json().get("startup", {}) if ready is not None else {}
+        finally:
+            process.terminate()
+            process.wait(10)
+    return {"serving": serving, "ready": ready, **{f"api_{phase}": value for phase, value in phases.items()}}
+
+
+def median(values: List[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç (import / dinleme / hazır) benchmark'ı")
+    parser.add_argument("--runs", type=int, default=3, help="Tekrar sayısı (ortanca raporlanır)")
+    parser.add_argument("--import-only", action="store_true", help="Yalnızca import süresini ölç (imaj derlemesi)")
+    parser.add_argument("--max-import", type=float, default=0, help="api import ortanca sınırı (sn, 0 = yok)")
+    parser.add_argument("--max-serving", type=float, default=0, help="/health ilk 200 ortanca sınırı (sn)")
+    parser.add_argument("--max-ready", type=float, default=0, help="/ready ilk 200 ortanca sınırı (sn)")
+    parser.add_argument("--timeout", type=float, default=60, help="Tek başlatma için en fazla bekleme (sn)")
+    parser.add_argument("--port", type=int, default=8798)
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="linkcim-import-") as workdir:
+        imports = [measure_import(Path(workdir)) for _ in range(args.runs)]
+    import_seconds = median([total for total, _, _ in imports])
+    print(f"⏱️ api import: {import_seconds:.3f} sn (ortanca, {args.runs} tekrar)")
+    for seconds, name in imports[-1][1]:
+        print(f"    {seconds:>7.3f} sn  {name}")
+    eager = sorted({name for _, _, names in imports for name in names})
+    if eager:
+        failures.append(f"api importunda yüklenmemesi gereken modüller yüklendi: {', '.join(eager)}")
+    if args.max_import and import_seconds > args.max_import:
+        failures.append(f"api import {import_seconds:.3f} sn > {args.max_import} sn")
+
+    if not args.import_only:
+        runs = []
+        for run in range(args.runs):
+            runs.append(measure_cold_start(args.port, args.timeout))
+            print(f"🚀 {run + 1}. başlatma: /health {runs[-1]['serving'] or float('nan'):.3f} sn, "
+                  f"/ready {runs[-1]['ready'] or float('nan'):.3f} sn", flush=True)
+        print()
+        print(f"{'aşama':<22} {'ortanca sn':>10}")
+        for key in sorted({key for run in runs for key in run}):
+            value = median([run.get(key) for run in runs])
+            print(f"{key:<22} {value:>10.3f}" if value is not None else f"{key:<22} {'-':>10}")
+        for key, limit in (("serving", args.max_serving), ("ready", args.max_ready)):
+            value = median([run[key] for run in runs])
+            if value is None:
+                failures.append(f"{key} süresinde ({args.timeout} sn) ulaşılamadı")
+            elif limit and value > limit:
+                failures.append(f"{key} {value:.3f} sn > {limit} sn")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Çoklu süreç (uvicorn --workers N) ölçekleme benchmark'ı.
+
+Her N için API'yi paylaşımlı iş durumuyla (SHARED_JOB_STATE=1) ayrı bir
+geçici klasörde başlatır. Ardından yerel sahte kaynaktan indirme işleri
+gönderip iş/sn ölçer ve /status uç noktasını eş zamanlı istemcilerle
+yükleyerek istek/sn ve gecikmeyi raporlar. Ağ erişimi gerekmez.
+
+Kullanım:
+    python benchmarks/bench_workers.py --workers 1,2,4,8 --jobs 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from fake_origin import media_url, parse_size, start_origin  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+API_KEY = os.getenv("API_KEY", "45541d717524a99df5f994bb9f6cbce825269852be079594b8e35f7752d6f1bd")
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def start_api(workers: int, port: int, workdir: Path, downloads_per_worker: int,
+              source: Path = REPO_ROOT, shared: bool = True) -> subprocess.Popen:
+    """API'yi workdir'de başlat; source, api.py'nin bulunduğu kaynak klasör"""
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": str(source),
+        "API_KEY": API_KEY,
+        "WEB_CONCURRENCY": str(workers),
+        "SHARED_JOB_STATE": "1" if shared else "0",
+        "MAX_CONCURRENT_DOWNLOADS": str(downloads_per_worker),
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("API başlatılamadı")
+
+
+async def run_downloads(client: httpx.AsyncClient, origin: str, count: int, size: int) -> Dict[str, float]:
+    started = time.monotonic()
+    responses = await asyncio.gather(*(
+        client.post("/download", json={"url": media_url(origin, size, name=f"bench{i}")})
+        for i in range(count)
+    ))
+    pending = {r.json()["job_id"] for r in responses}
+    failed = 0
+    while pending:
+        await asyncio.sleep(0.2)
+        statuses = await asyncio.gather(*(client.get(f"/status/{job_id}") for job_id in pending))
+        for job_id, response in zip(list(pending), statuses):
+            status = response.json().get("status")
+            if status in TERMINAL_STATUSES:
+                pending.discard(job_id)
+                failed += status == "failed"
+    elapsed = time.monotonic() - started
+    return {"jobs_per_sec": count / elapsed, "elapsed": elapsed, "failed": failed,
+            "job_id": responses[-1].json()["job_id"]}
+
+
+async def run_status_load(client: httpx.AsyncClient, job_id: str, concurrency: int, duration: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    deadline = time.monotonic() + duration
+
+    async def hammer():
+        while time.monotonic() < deadline:
+            began = time.perf_counter()
+            await client.get(f"/status/{job_id}")
+            latencies.append(time.perf_counter() - began)
+
+    await asyncio.gather(*(hammer() for _ in range(concurrency)))
+    return {
+        "req_per_sec": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def bench(workers: int, args, origin: str) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix=f"linkcim-bench-{workers}-") as tmp:
+        process = start_api(workers, args.port, Path(tmp), args.downloads_per_worker)
+        limits = httpx.Limits(max_connections=args.concurrency * 2)
+        try:
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{args.port}",
+                headers={"Authorization": f"Bearer {API_KEY}"},
+                limits=limits, timeout=60,
+            ) as client:
+                await wait_ready(client)
+                downloads = await run_downloads(client, origin, args.jobs, args.size)
+                status = await run_status_load(client, downloads["job_id"], args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return {"workers": workers, **downloads, **status}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="uvicorn --workers N ölçekleme benchmark'ı")
+    parser.add_argument("--workers", default="1,2,4,8", help="Virgülle ayrılmış süreç sayıları")
+    parser.add_argument("--jobs", type=int, default=32, help="Her turda gönderilecek indirme işi")
+    parser.add_argument("--size", type=parse_size, default=parse_size("4MB"), help="Sahte video boyutu")
+    parser.add_argument("--rate", type=parse_size, default=0, help="Kaynakta bağlantı başına hız sınırı")
+    parser.add_argument("--downloads-per-worker", type=int, default=3, help="MAX_CONCURRENT_DOWNLOADS")
+    parser.add_argument("--concurrency", type=int, default=32, help="/status yükündeki eş zamanlı istemci")
+    parser.add_argument("--duration", type=float, default=5.0, help="/status yük süresi (sn)")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    origin_server, origin = start_origin(rate=args.rate)
+    results = []
+    try:
+        for workers in (int(w) for w in args.workers.split(",")):
+            print(f"⏱️ {workers} süreç ölçülüyor...", flush=True)
+            results.append(asyncio.run(bench(workers, args, origin)))
+    finally:
+        origin_server.shutdown()
+
+    print()
+    print(f"{'süreç':>6} {'iş/sn':>8} {'hata':>5} {'status/sn':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['workers']:>6} {r['jobs_per_sec']:>8.2f} {r['failed']:>5} "
+              f"{r['req_per_sec']:>10.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark'lar için yerel sahte video kaynağı.
+
+`/media/<ad>-<bayt>.mp4` adresine gelen isteklere belirtilen boyutta
+deterministik (rastgele olmayan) içerik döner; dosya diskte tutulmaz.
+yt-dlp bu adresleri generic extractor ile doğrudan video bağlantısı olarak
+indirir, bu yüzden ağ erişimi gerekmez. HEAD ve Range istekleri desteklenir;
+`rate` ile bağlantı başına hız sınırı verilebilir.
+
+Kullanım:
+    python benchmarks/fake_origin.py --port 8765 --rate 5MB
+"""
+
+import argparse
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+MEDIA_PATH = re.compile(r"^/media/(?P<name>[\w.-]+?)-(?P<size>\d+)\.(?P<ext>mp4|webm|m4a|mp3)$")
+CONTENT_TYPES = {"mp4": "video/mp4", "webm": "video/webm", "m4a": "audio/mp4", "mp3": "audio/mpeg"}
+CHUNK_SIZE = 64 * 1024
+# Her istekte aynı baytlar: 1 MiB'lık desen tekrar eder
+PATTERN = bytes(range(256)) * 4096
+
+
+def parse_size(value: str) -> int:
+    """'5MB', '512K', '1048576' -> bayt"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMG]?)B?", value.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Geçersiz boyut: {value}")
+    number, unit = match.groups()
+    return int(float(number) * {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[unit])
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """'bytes=a-b' -> (başlangıç, bitiş) dahil; geçersizse None"""
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[6:].split(",")[0].strip()
+    start_str, _, end_str = spec.partition("-")
+    if start_str:
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    else:
+        start = max(0, size - int(end_str))
+        end = size - 1
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
+
+class FakeOriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Sunucu örneğinde ayarlanır (bayt/sn, 0 = sınırsız)
+    rate = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resolve(self):
+        match = MEDIA_PATH.match(self.path.split("?")[0])
+        if not match:
+            self.send_error(404, "Not Found")
+            return None
+        return int(match["size"]), CONTENT_TYPES[match["ext"]]
+
+    def do_HEAD(self):
+        resolved = self._resolve()
+        if resolved:
+            self._send_headers(*resolved)
+
+    def do_GET(self):
+        resolved = self._resolve()
+        if not resolved:
+            return
+        start, end = self._send_headers(*resolved)
+        self._write_body(start, end)
+
+    def _send_headers(self, size: int, content_type: str) -> Tuple[int, int]:
+        byte_range = parse_range(self.headers.get("Range"), size)
+        if byte_range:
+            start, end = byte_range
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            start, end = 0, size - 1
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.end_headers()
+        return start, end
+
+    def _write_body(self, start: int, end: int):
+        position = start
+        began = time.monotonic()
+        sent = 0
+        try:
+            while position <= end:
+                offset = position % len(PATTERN)
+                length = min(CHUNK_SIZE, end - position + 1, len(PATTERN) - offset)
+                self.wfile.write(PATTERN[offset:offset + length])
+                position += length
+                sent += length
+                if self.rate:
+                    # Bağlantı başına hız sınırı
+                    ahead = sent / self.rate - (time.monotonic() - began)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_origin(port: int = 0, rate: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Arka planda sahte kaynağı başlat; (sunucu, temel URL) döner"""
+    handler = type("RateLimitedHandler", (FakeOriginHandler,), {"rate": rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-origin", daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def media_url(base_url: str, size: int, name: str = "video", ext: str = "mp4") -> str:
+    return f"{base_url}/media/{name}-{size}.{ext}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte video kaynağı")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=parse_size, default=0, help="Bağlantı başına hız (örn. 5MB)")
+    args = parser.parse_args()
+
+    server, base_url = start_origin(args.port, args.rate)
+    print(f"🎞️ Sahte kaynak: {media_url(base_url, 10 * 1024 * 1024)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
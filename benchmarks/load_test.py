@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Uçtan uca yük testi: POST /download -> /status yoklaması -> GET /download/{job_id}.
+
+API'yi geçici bir klasörde başlatır, yerel sahte kaynaktaki videoları
+(benchmarks/fake_origin.py) verilen eş zamanlılıkla indirtir ve şunları
+raporlar: iş/sn, uç nokta başına p50/p95/p99 gecikme, event loop
+gecikmesi (/metrics) ve API süreçlerinin tepe bellek kullanımı (RSS).
+Ağ erişimi gerekmez.
+
+İki git revizyonunu karşılaştırmak için `--compare` verilir; her revizyon
+`git archive` ile ayrı klasöre çıkarılıp aynı yükle ölçülür. Eşiği aşan
+gerileme varsa çıkış kodu 1 olur (CI'da deploy öncesi kullanılabilir).
+
+Kullanım:
+    python benchmarks/load_test.py --jobs 64 --concurrency 16
+    python benchmarks/load_test.py --compare origin/main HEAD --threshold 10
+    python benchmarks/load_test.py --compare HEAD WORKTREE   # commit edilmemiş değişiklikler
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_workers import API_KEY, REPO_ROOT, TERMINAL_STATUSES, percentile, start_api, wait_ready  # noqa: E402
+from fake_origin import media_url, parse_size, start_origin  # noqa: E402
+
+ENDPOINTS = ("POST /download", "GET /status", "GET /download")
+# Karşılaştırmada "küçük daha iyi" / "büyük daha iyi" metrikler
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "loop_lag_p99_ms", "peak_rss_mb")
+HIGHER_IS_BETTER = ("jobs_per_sec",)
+LAG_SAMPLE = re.compile(r'^linkcim_event_loop_lag_seconds_(bucket|sum|count)(?:\{le="([^"]+)"\})? (\S+)$')
+
+
+# --- Sunucu tarafı ölçümler ---
+def process_tree(pid: int) -> List[int]:
+    """pid ve tüm alt süreçleri (/proc üzerinden, yalnızca Linux)"""
+    children: Dict[int, List[int]] = {}
+    for stat_file in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat_file.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat_file.parent.name))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def peak_rss_bytes(pid: int) -> Optional[int]:
+    """API süreçlerinin tepe RSS toplamı (VmHWM); desteklenmiyorsa None"""
+    total = 0
+    for member in process_tree(pid):
+        try:
+            status = Path(f"/proc/{member}/status").read_text()
+        except OSError:
+            continue
+        match = re.search(r"^VmHWM:\s+(\d+) kB", status, re.MULTILINE)
+        if match:
+            total += int(match.group(1)) * 1024
+    return total or None
+
+
+async def scrape_loop_lag(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    """/metrics'teki event loop gecikme histogramı (eski revizyonlarda None)"""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    buckets: Dict[float, float] = {}
+    total = count = 0.0
+    for line in response.text.splitlines():
+        match = LAG_SAMPLE.match(line)
+        if not match:
+            continue
+        kind, le, value = match.groups()
+        if kind == "bucket":
+            buckets[float(le)] = float(value)
+        elif kind == "sum":
+            total = float(value)
+        else:
+            count = float(value)
+    return {"buckets": buckets, "sum": total, "count": count} if count else None
+
+
+def lag_summary(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """Yük süresince gözlenen gecikme: ortalama ve p99 (kova üst sınırı)"""
+    if not after:
+        return {"loop_lag_mean_ms": None, "loop_lag_p99_ms": None}
+    before = before or {"buckets": {}, "sum": 0.0, "count": 0.0}
+    count = after["count"] - before["count"]
+    if count <= 0:
+        return {"loop_lag_mean_ms": None, "loop_lag_p99_ms": None}
+    p99 = None
+    for le in sorted(after["buckets"]):
+        if after["buckets"][le] - before["buckets"].get(le, 0.0) >= 0.99 * count:
+            p99 = le
+            break
+    return {
+        "loop_lag_mean_ms": (after["sum"] - before["sum"]) / count * 1000,
+        "loop_lag_p99_ms": p99 * 1000 if p99 is not None and p99 != float("inf") else None,
+    }
+
+
+# --- İstemci yükü ---
+async def run_job(client: httpx.AsyncClient, url: str, poll_interval: float,
+                  latencies: Dict[str, List[float]]) -> str:
+    began = time.perf_counter()
+    response = await client.post("/download", json={"url": url})
+    latencies["POST /download"].append(time.perf_counter() - began)
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+
+    status = response.json().get("status")
+    while status not in TERMINAL_STATUSES:
+        await asyncio.sleep(poll_interval)
+        began = time.perf_counter()
+        response = await client.get(f"/status/{job_id}")
+        latencies["GET /status"].append(time.perf_counter() - began)
+        status = response.json().get("status")
+
+    if status == "completed":
+        began = time.perf_counter()
+        async with client.stream("GET", f"/download/{job_id}") as download:
+            async for _ in download.aiter_raw():
+                pass
+        latencies["GET /download"].append(time.perf_counter() - began)
+    return status
+
+
+async def run_load(base_url: str, origin: str, args) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {API_KEY}"},
+                                 limits=limits, timeout=300) as client:
+        await wait_ready(client)
+        lag_before = await scrape_loop_lag(client)
+
+        async def one(index: int) -> str:
+            url = media_url(origin, args.size, name=f"load{index % args.distinct}")
+            async with semaphore:
+                try:
+                    return await run_job(client, url, args.poll_interval, latencies)
+                except httpx.HTTPError:
+                    return "error"
+
+        started = time.monotonic()
+        statuses = await asyncio.gather(*(one(i) for i in range(args.jobs)))
+        elapsed = time.monotonic() - started
+        lag_after = await scrape_loop_lag(client)
+
+    result: Dict[str, Any] = {
+        "jobs": args.jobs,
+        "elapsed": elapsed,
+        "jobs_per_sec": statuses.count("completed") / elapsed,
+        "failed": len(statuses) - statuses.count("completed"),
+        **lag_summary(lag_before, lag_after),
+        "endpoints": {},
+    }
+    for name, values in latencies.items():
+        result["endpoints"][name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+    return result
+
+
+def bench_source(source: Path, origin: str, args) -> Dict[str, Any]:
+    """Verilen kaynak klasördeki API'yi başlatıp yükü uygula"""
+    with tempfile.TemporaryDirectory(prefix="linkcim-load-") as workdir:
+        process = start_api(args.workers, args.port, Path(workdir), args.downloads_per_worker,
+                            source=source, shared=args.workers > 1)
+        try:
+            result = asyncio.run(run_load(f"http://127.0.0.1:{args.port}", origin, args))
+            rss = peak_rss_bytes(process.pid)
+            result["peak_rss_mb"] = rss / 1024 ** 2 if rss else None
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return result
+
+
+def export_revision(revision: str, dest: Path) -> Path:
+    """git revizyonunu klasöre çıkar; WORKTREE çalışma kopyasının kendisidir"""
+    if revision == "WORKTREE":
+        return REPO_ROOT
+    archive = subprocess.run(["git", "archive", revision], cwd=REPO_ROOT,
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return dest
+
+
+# --- Rapor ---
+def fmt(value: Optional[float], digits: int = 2) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_report(result: Dict[str, Any], title: str = ""):
+    if title:
+        print(f"\n== {title} ==")
+    print(f"iş/sn: {result['jobs_per_sec']:.2f}  süre: {result['elapsed']:.2f}s  hata: {result['failed']}  "
+          f"loop gecikmesi ort/p99: {fmt(result['loop_lag_mean_ms'])}/{fmt(result['loop_lag_p99_ms'])} ms  "
+          f"tepe RSS: {fmt(result['peak_rss_mb'], 1)} MB")
+    print(f"{'uç nokta':<16} {'adet':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in result["endpoints"].items():
+        print(f"{name:<16} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+
+def flatten(result: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    flat = {key: result.get(key) for key in ("jobs_per_sec", "loop_lag_p99_ms", "peak_rss_mb")}
+    for name, stats in result["endpoints"].items():
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            flat[f"{name} {key}"] = stats[key]
+    return flat
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """Karşılaştırma tablosunu yaz; eşiği aşan gerilemeleri döndür"""
+    regressions = []
+    base_flat, head_flat = flatten(base), flatten(head)
+    print(f"\n{'metrik':<28} {'önce':>10} {'sonra':>10} {'değişim':>9}")
+    for key, before in base_flat.items():
+        after = head_flat.get(key)
+        if not before or after is None:
+            print(f"{key:<28} {fmt(before):>10} {fmt(after):>10} {'-':>9}")
+            continue
+        change = (after - before) / before * 100
+        worse = -change if key.endswith(HIGHER_IS_BETTER) else change
+        flag = " ⚠️" if worse > threshold else ""
+        print(f"{key:<28} {before:>10.2f} {after:>10.2f} {change:>+8.1f}%{flag}")
+        if worse > threshold and key.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER):
+            regressions.append(f"{key}: {before:.2f} -> {after:.2f} ({change:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Linkcim API uçtan uca yük testi")
+    parser.add_argument("--jobs", type=int, default=64, help="Toplam indirme işi")
+    parser.add_argument("--concurrency", type=int, default=16, help="Eş zamanlı istemci")
+    parser.add_argument("--distinct", type=int, default=0,
+                        help="Farklı video sayısı (0 = her iş farklı; küçük değer tekrar isteklerini ölçer)")
+    parser.add_argument("--size", type=parse_size, default=parse_size("4MB"), help="Sahte video boyutu")
+    parser.add_argument("--rate", type=parse_size, default=0, help="Kaynakta bağlantı başına hız sınırı")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="/status yoklama aralığı (sn)")
+    parser.add_argument("--workers", type=int, default=1, help="API süreç sayısı (uvicorn --workers)")
+    parser.add_argument("--downloads-per-worker", type=int, default=3, help="MAX_CONCURRENT_DOWNLOADS")
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--compare", nargs=2, metavar=("ÖNCE", "SONRA"),
+                        help="İki git revizyonunu karşılaştır (WORKTREE = çalışma kopyası)")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Gerileme eşiği (%%)")
+    parser.add_argument("--json", type=Path, help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+    args.distinct = args.distinct or args.jobs
+
+    origin_server, origin = start_origin(rate=args.rate)
+    try:
+        if not args.compare:
+            result = bench_source(REPO_ROOT, origin, args)
+            print_report(result)
+            output: Dict[str, Any] = result
+            regressions: List[str] = []
+        else:
+            results = []
+            with tempfile.TemporaryDirectory(prefix="linkcim-rev-") as tmp:
+                for index, revision in enumerate(args.compare):
+                    source = export_revision(revision, Path(tmp) / str(index))
+                    print(f"⏱️ {revision} ölçülüyor...", flush=True)
+                    results.append(bench_source(source, origin, args))
+                    print_report(results[-1], revision)
+            regressions = compare(results[0], results[1], args.threshold)
+            output = {
+                "revisions": [{"revision": rev, **result} for rev, result in zip(args.compare, results)],
+                "regressions": regressions,
+            }
+    finally:
+        origin_server.shutdown()
+
+    if args.json:
+        args.json.write_text(json.dumps(output, indent=2, ensure_ascii=False))
+    if regressions:
+        print("\n❌ Gerileme:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
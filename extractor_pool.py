@@ -0,0 +1,339 @@
+"""
+Sayfa çıkarma (extraction) için önceden ısınmış süreç havuzu.
+
+yt-dlp'yi içe aktarmak ve extractor listesiyle YoutubeDL kurmak CPU
+harcar; imza/JS çözme gibi işler de GIL'i tutar ve API sürecindeki diğer
+thread'leri yavaşlatır. Havuzdaki her süreç yt-dlp'yi bir kez yükler ve her
+seçenek profili için bir YoutubeDL örneğini (sık kullanılan extractor'lar
+ve URL eşleştirme ifadeleri hazır) çıkarmalar arasında saklar.
+
+  * Süreçler forkserver ile doğar (destekleniyorsa): yt-dlp forkserver'da bir
+    kez içe aktarılır, yeni süreçler onu hazır bulur
+  * Süreç N çıkarmadan sonra veya bellek tavanını aşınca yenilenir
+  * Takılan çıkarma zaman aşımında, çöken çıkarma kendi sürecinde kalır:
+    süreç öldürülüp yerine yenisi başlatılır, API süreci etkilenmez
+  * Çıkarmada extractor'ların ayarladığı çerezler sonuçla birlikte döner;
+    indirmeyi yapan YoutubeDL'e eklenir
+  * Süreçler HTTP bağlantılarını çıkarmalar arasında açık tutar
+    (http_pools); havuz istatistikleri yanıtlarla birlikte gelir
+
+Sonuç, süreçler arasında taşınabilsin diye sade veri tiplerine çevrilir
+(fonksiyon değerleri atılır, sayfalı liste öğeleri entry_limit kadar
+okunur).
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import yt_dlp
+from yt_dlp.extractor import gen_extractor_classes
+
+import http_pools
+
+# Isınmada örneği oluşturulan extractor'lar
+WARM_EXTRACTORS = ("Youtube", "YoutubeTab", "Instagram", "TikTok", "Twitter", "Facebook", "Generic")
+POLL_INTERVAL = 0.25
+
+
+class ExtractorCrashed(Exception):
+    """Çıkarma süreci yanıt vermeden kapandı"""
+
+
+class ExtractorTimeout(TimeoutError):
+    """Çıkarma süresinde bitmedi; süreç öldürüldü"""
+
+
+def extract_raw_info(ydl: yt_dlp.YoutubeDL, url: str) -> Dict[str, Any]:
+    """Sayfayı bir kez çıkar; format seçimi ve indirme yapılmaz"""
+    ie_result = ydl.extract_info(url, download=False, process=False)
+    # Yönlendirme (url) sonuçlarını asıl extractor'a kadar takip et
+    for _ in range(3):
+        if ie_result.get('_type') != 'url':
+            break
+        ie_result = ydl.extract_info(
+            ie_result['url'], download=False, process=False, ie_key=ie_result.get('ie_key'))
+    return ie_result
+
+
+def read_entries(info: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """Liste sonucunun öğelerini (sayfalı/tembel olsa da) en fazla limit kadar oku"""
+    entries = info.get("entries")
+    if entries is None or isinstance(entries, list):
+        return info
+    if isinstance(entries, yt_dlp.utils.PagedList):
+        entries = entries.getslice(0, limit)
+    # Sayfalı listeler yalnızca gereken kadar çekilir
+    return {**info, "entries": list(itertools.islice(entries, limit))}
+
+
+def _plain(value: Any) -> Any:
+    """Süreçler arası taşınabilir kopya; taşınamayan değerler None olur"""
+    if isinstance(value, dict):
+        # Fonksiyon değerleri (ör. __post_extractor) taşınamaz, atılır
+        return {key: _plain(item) for key, item in value.items() if not callable(item)}
+    if isinstance(value, (list, tuple, yt_dlp.utils.LazyList)):
+        return [_plain(item) for item in value if not callable(item)]
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return value
+    return None
+
+
+def _current_rss_bytes() -> int:
+    """Sürecin şu anki bellek kullanımı (RSS); /proc yoksa 0 (RSS ile yenileme kapalı).
+
+    ru_maxrss kullanılmaz: o en yüksek değerdir ve hiç düşmez, bir kez sınırı
+    aşan süreç her çıkarmadan sonra yenilenirdi.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _worker_main(conn, profiles: Dict[str, Dict[str, Any]], warm: Iterable[str],
+                 http_settings: Optional[Dict[str, Any]] = None, warmed=None):
+    """Havuz süreci: profilleri kur, istekleri sırayla çıkar"""
+    # Profil YoutubeDL'leri süreç boyunca yaşar; bağlantılar da çıkarmalar
+    # arasında açık kalır
+    pools = http_pools.install(http_pools.HttpPools(**(http_settings or {})))
+    # URL eşleştirme her extractor'ın _VALID_URL düzenli ifadesini ilk
+    # kullanımda derler (~1800 extractor); ilk istek bunu beklemesin
+    for ie in gen_extractor_classes():
+        ie.suitable("https://warmup.invalid/")
+    instances: Dict[str, yt_dlp.YoutubeDL] = {}
+    for name, params in profiles.items():
+        ydl = instances[name] = yt_dlp.YoutubeDL(params)
+        for ie_key in warm:
+            try:
+                ydl.get_info_extractor(ie_key)
+            except Exception:
+                pass
+    if warmed is not None:
+        warmed.set()
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+        profile, url, entry_limit = request
+        try:
+            ydl = instances[profile]
+            info = _plain(read_entries(extract_raw_info(ydl, url), entry_limit))
+            cookies = [cookie for cookie in ydl.cookiejar if not cookie.is_expired()]
+            reply = ("ok", info, cookies)
+        except Exception as e:
+            reply = ("error", type(e).__name__, str(e))
+        try:
+            conn.send((*reply, _current_rss_bytes(), pools.stats()))
+        except (OSError, ValueError):
+            return
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["yt_dlp", __name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "warmed", "jobs", "rss", "http")
+
+    def __init__(self, process, conn, warmed):
+        self.process = process
+        self.conn = conn
+        # Süreç ısınmayı bitirince set edilir
+        self.warmed = warmed
+        self.jobs = 0
+        self.rss = 0
+        self.http: Dict[str, Dict[str, Any]] = {}
+
+
+class ExtractorPool:
+    """Sınırlı sayıda uzun ömürlü çıkarma süreci; çağıranlar thread'lerdir"""
+
+    def __init__(self, processes: int, profiles: Dict[str, Dict[str, Any]], *,
+                 max_jobs: int = 200, max_rss: int = 0, timeout: float = 120,
+                 warm_extractors: Iterable[str] = WARM_EXTRACTORS,
+                 http_settings: Optional[Dict[str, Any]] = None):
+        self.processes = processes
+        self.profiles = profiles
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.timeout = timeout
+        self.warm_extractors = tuple(warm_extractors)
+        # Süreçlerdeki HttpPools ayarları
+        self.http_settings = http_settings
+        self._context = None
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._busy = 0
+        self._counts = {"jobs": 0, "errors": 0, "recycled": 0, "crashed": 0, "timeouts": 0, "cancelled": 0}
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._context.Pipe()
+        warmed = self._context.Event()
+        process = self._context.Process(
+            target=_worker_main, args=(child, self.profiles, self.warm_extractors, self.http_settings, warmed),
+            name="ytdlp-extractor", daemon=True,
+        )
+        process.start()
+        child.close()
+        worker = _Worker(process, parent, warmed)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def start(self):
+        """Süreçleri başlat; ısınma (import, extractor'lar) süreçlerde arka planda sürer"""
+        with self._start_lock:
+            if self._context is not None:
+                return
+            self._context = _context()
+            for _ in range(self.processes):
+                self._idle.put(self._spawn())
+
+    def wait_warm(self, timeout: Optional[float] = None) -> bool:
+        """Başlatılan tüm süreçler ısınana kadar bekle (/ready); süre dolarsa False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            while not worker.warmed.wait(POLL_INTERVAL):
+                if not worker.process.is_alive():
+                    # Isınırken çöktü; yerine başlatılan süreç sonraki istekte kullanılır
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    return False
+        return True
+
+    def _retire(self, worker: _Worker, reason: str):
+        """Süreci kapat ve yerine yenisini koy"""
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._counts[reason] += 1
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(1)
+            if worker.process.is_alive():
+                worker.process.kill()
+        worker.process.join(1)
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def extract(self, url: str, profile: str, entry_limit: int,
+                check: Optional[Callable[[], None]] = None) -> Tuple[Dict[str, Any], List[Any]]:
+        """URL'yi bir havuz sürecinde çıkar: (ham bilgi, çerezler).
+
+        check, beklerken düzenli çağrılır; hata fırlatırsa (ör. iptal) süreç
+        öldürülür ve hata çağırana geçer. yt-dlp hataları DownloadError olarak
+        aynı metinle yeniden fırlatılır.
+        """
+        if self._closed:
+            raise RuntimeError("Çıkarma havuzu kapatıldı")
+        if self._context is None:
+            self.start()
+        while True:
+            worker = self._idle.get()
+            if worker.process.is_alive():
+                break
+            # Boşta beklerken kapanmış
+            self._retire(worker, "crashed")
+        with self._lock:
+            self._busy += 1
+        try:
+            reply = self._call(worker, (profile, url, entry_limit), check)
+        except ExtractorCrashed:
+            self._retire(worker, "crashed")
+            raise
+        except ExtractorTimeout:
+            self._retire(worker, "timeouts")
+            raise
+        except BaseException:
+            # İptal: süren çıkarma durdurulamaz, süreç değiştirilir
+            self._retire(worker, "cancelled")
+            raise
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+        *result, worker.rss, worker.http = reply
+        worker.jobs += 1
+        with self._lock:
+            self._counts["jobs"] += 1
+            if result[0] == "error":
+                self._counts["errors"] += 1
+        if worker.jobs >= self.max_jobs or (self.max_rss and worker.rss > self.max_rss):
+            self._retire(worker, "recycled")
+        else:
+            self._idle.put(worker)
+
+        if result[0] == "error":
+            _, name, message = result
+            raise yt_dlp.utils.DownloadError(message if message.startswith("ERROR") else f"{name}: {message}")
+        _, info, cookies = result
+        return info, cookies
+
+    def _call(self, worker: _Worker, request: Tuple[str, str, int], check: Optional[Callable[[], None]]) -> Tuple:
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker.conn.send(request)
+            while not worker.conn.poll(POLL_INTERVAL):
+                if check is not None:
+                    check()
+                if not worker.process.is_alive():
+                    break
+                if time.monotonic() > deadline:
+                    raise ExtractorTimeout(f"Çıkarma {self.timeout:.0f} sn içinde bitmedi")
+            return worker.conn.recv()
+        except (EOFError, ConnectionError, BrokenPipeError) as e:
+            raise ExtractorCrashed("Çıkarma süreci beklenmedik şekilde kapandı") from e
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "processes": self.processes,
+                "alive": sum(1 for worker in self._workers if worker.process.is_alive()),
+                "warm": sum(1 for worker in self._workers if worker.warmed.is_set()),
+                "busy": self._busy,
+                "max_jobs": self.max_jobs,
+                "max_rss_bytes": self.max_rss,
+                "rss_bytes": {str(worker.process.pid): worker.rss for worker in self._workers},
+                # Yaşayan süreçlerin bağlantı havuzları (yenilenen süreçlerinki düşer)
+                "http": http_pools.merge_stats(*(worker.http for worker in self._workers)),
+                **self._counts,
+            }
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            worker.process.join(0.5)
+            if worker.process.is_alive():
+                worker.process.kill()
@@ -0,0 +1,134 @@
+"""
+Öncelikli, istemci başına ağırlıklı adil iş kuyruğu.
+
+Her istemcinin (API anahtarı / X-Client-Id) kendi kuyruğu vardır; istemci
+içinde işler önceliğe, sonra geliş sırasına göre dizilir. İstemciler arasında
+seçim sanal zamanla yapılır (start-time fair queuing): bir iş gönderildiğinde
+istemcinin sanal saati `maliyet / ağırlık` kadar ilerler ve sıradaki iş en
+erken bitiş etiketine sahip istemciden alınır. Böylece 500 iş gönderen bir
+istemci, tek iş gönderen diğerlerinin önünü kesemez. Yüksek öncelikli işlerin
+maliyeti düşük olduğu için (ör. ses) büyük videoların önüne geçer; boşta kalan
+istemci ise birikmiş hak kazanmaz (saati genel sanal zamana çekilir).
+"""
+
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+# Öncelik -> (istemci içi sıra, sanal zaman maliyeti)
+PRIORITIES: Dict[str, Tuple[int, float]] = {
+    "high": (0, 0.25),
+    "normal": (1, 1.0),
+    "low": (2, 4.0),
+}
+DEFAULT_PRIORITY = "normal"
+_RANK_COST = dict(PRIORITIES.values())
+
+
+class _ClientQueue:
+    __slots__ = ("weight", "finish", "heap")
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.finish = 0.0
+        # (öncelik sırası, geliş sırası, iş)
+        self.heap: List[Tuple[int, int, str]] = []
+
+    def cost(self) -> float:
+        return _RANK_COST[self.heap[0][0]] / self.weight
+
+
+class FairQueue:
+    """Senkron veri yapısı; bekleme/uyandırma çağıranın işidir"""
+
+    def __init__(self):
+        self._clients: Dict[str, _ClientQueue] = {}
+        self._owners: Dict[str, str] = {}
+        self._sequence = itertools.count()
+        self._vtime = 0.0
+        self._version = 0
+        self._order_cache: Tuple[int, Dict[str, int]] = (-1, {})
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._owners
+
+    def push(self, item: str, client: str, weight: float = 1.0, priority: str = DEFAULT_PRIORITY):
+        queue = self._clients.get(client)
+        if queue is None:
+            queue = self._clients[client] = _ClientQueue(max(weight, 0.01))
+        queue.weight = max(weight, 0.01)
+        rank = PRIORITIES.get(priority, PRIORITIES[DEFAULT_PRIORITY])[0]
+        heapq.heappush(queue.heap, (rank, next(self._sequence), item))
+        self._owners[item] = client
+        self._version += 1
+
+    def pop(self) -> Optional[str]:
+        client = self._select(self._clients, self._vtime)
+        if client is None:
+            return None
+        queue = self._clients[client]
+        start = max(self._vtime, queue.finish)
+        queue.finish = start + queue.cost()
+        self._vtime = start
+        _, _, item = heapq.heappop(queue.heap)
+        # Boşalan istemcinin saati, genel sanal zaman onu geçene kadar korunur;
+        # hemen yeni iş gönderirse sırası yine hakkına göre gelir
+        for idle in [name for name, other in self._clients.items()
+                     if not other.heap and other.finish <= self._vtime]:
+            del self._clients[idle]
+        del self._owners[item]
+        self._version += 1
+        return item
+
+    def remove(self, item: str) -> bool:
+        client = self._owners.pop(item, None)
+        if client is None:
+            return False
+        queue = self._clients[client]
+        queue.heap = [entry for entry in queue.heap if entry[2] != item]
+        heapq.heapify(queue.heap)
+        self._version += 1
+        return True
+
+    def position(self, item: str) -> Optional[int]:
+        """1'den başlayan tahmini sıra (şu anki kuyruk değişmezse)"""
+        if item not in self._owners:
+            return None
+        version, order = self._order_cache
+        if version != self._version:
+            order = {queued: index + 1 for index, queued in enumerate(self._simulate())}
+            self._order_cache = (self._version, order)
+        return order.get(item)
+
+    @staticmethod
+    def _select(clients: Dict[str, _ClientQueue], vtime: float) -> Optional[str]:
+        best, best_key = None, None
+        for client, queue in clients.items():
+            if not queue.heap:
+                continue
+            key = (max(vtime, queue.finish) + queue.cost(), queue.heap[0][1])
+            if best_key is None or key < best_key:
+                best, best_key = client, key
+        return best
+
+    def _simulate(self) -> List[str]:
+        """pop() sırasını kuyruğu değiştirmeden çıkar"""
+        clients: Dict[str, _ClientQueue] = {}
+        for client, queue in self._clients.items():
+            copy = _ClientQueue(queue.weight)
+            copy.finish = queue.finish
+            copy.heap = list(queue.heap)
+            clients[client] = copy
+        vtime, order = self._vtime, []
+        while True:
+            client = self._select(clients, vtime)
+            if client is None:
+                return order
+            queue = clients[client]
+            start = max(vtime, queue.finish)
+            queue.finish = start + queue.cost()
+            vtime = start
+            order.append(heapq.heappop(queue.heap)[2])
@@ -0,0 +1,330 @@
+"""
+Platform başına paylaşılan HTTP bağlantı havuzları ve çerez kavanozları.
+
+yt-dlp her YoutubeDL örneği için kendi HTTP yığınını kurar ve kapatır; her iş
+googlevideo, cdninstagram, tiktokcdn gibi sunuculara TLS el sıkışmasını ve
+çerez kurulumunu baştan yapar. Kısa kliplerde (TikTok, Reels) bu süre işin
+önemli bir kısmıdır. Bu modül:
+
+  * yt-dlp'ye requests tabanlı bir istek işleyicisi (SharedRequestsRH)
+    ekler: oturumlar YoutubeDL başına kalır ama bağlantılar süreç genelindeki
+    havuzlardan alınır, YoutubeDL kapanınca kapanmaz (keep-alive)
+  * Havuzlar sunucu adından bulunan platforma göre ayrılır
+    (rr1---sn-x.googlevideo.com -> youtube); her platformun sunucu başına
+    tutulan bağlantı sayısı ayrı ayarlanır
+  * Belirli süre kullanılmayan sunucu havuzları kapatılır (idle timeout)
+  * Platform başına çerez kavanozu işler arasında korunur
+  * Platform başına istek / yeni bağlantı sayısı ve yeniden kullanım oranı
+
+Bağlantı sınırı engelleyici değildir: havuz doluyken açılan fazla bağlantı
+kullanıldıktan sonra kapatılır. Vekil sunucu (proxy) üzerinden giden
+istekler requests'in kendi vekil havuzlarını kullanır ve sayılmaz.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import urllib3
+from yt_dlp.cookies import YoutubeDLCookieJar
+from yt_dlp.networking.common import register_preference, register_rh
+
+try:
+    import requests.structures
+    from yt_dlp.networking._requests import RequestsHTTPAdapter, RequestsRH, RequestsSession, select_proxy
+except ImportError:
+    # requests >= 2.32.2 yoksa yt-dlp urllib ile (keep-alive olmadan) çalışır
+    RequestsRH = None
+
+# Platform -> sunucu alan adları (alt alan adları dahil)
+PLATFORM_DOMAINS: Dict[str, Tuple[str, ...]] = {
+    "youtube": ("youtube.com", "youtu.be", "googlevideo.com", "ytimg.com", "ggpht.com",
+                "googleusercontent.com", "youtube-nocookie.com"),
+    "instagram": ("instagram.com", "cdninstagram.com"),
+    "tiktok": ("tiktok.com", "tiktokcdn.com", "tiktokcdn-us.com", "tiktokv.com", "ibyteimg.com",
+               "byteoversea.com"),
+    "twitter": ("twitter.com", "x.com", "twimg.com", "t.co"),
+    "facebook": ("facebook.com", "fbcdn.net", "fb.watch"),
+}
+
+# Sunucu başına tutulan keep-alive bağlantı sayısı. Paralel aralık/parça
+# indirmeleri aynı sunucuya birden çok bağlantı açar
+DEFAULT_POOL_SIZES: Dict[str, int] = {
+    "youtube": 16,
+    "instagram": 8,
+    "tiktok": 8,
+    "twitter": 8,
+    "facebook": 8,
+    "unknown": 4,
+}
+
+
+def parse_pool_sizes(value: str) -> Dict[str, int]:
+    """'tiktok=12,youtube=24' -> varsayılanların üzerine yazılmış havuz boyutları"""
+    sizes = dict(DEFAULT_POOL_SIZES)
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        platform, _, size = entry.partition("=")
+        try:
+            sizes[platform.strip()] = max(1, int(size))
+        except ValueError:
+            raise ValueError(f"HTTP_POOL_SIZES geçersiz kayıt: {entry}")
+    return sizes
+
+
+def platform_for_host(host: Optional[str]) -> str:
+    host = (host or "").lower().rstrip(".")
+    for platform, domains in PLATFORM_DOMAINS.items():
+        if any(host == domain or host.endswith("." + domain) for domain in domains):
+            return platform
+    return "unknown"
+
+
+class _Counts:
+    __slots__ = ("requests", "connections", "idle_closed")
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.idle_closed = 0
+
+
+class _PlatformPoolManager(urllib3.PoolManager):
+    """Bir platformun sunucu havuzları; son kullanım zamanını ve sayaçları tutar"""
+
+    def __init__(self, counts: _Counts, lock: threading.Lock, num_pools: int, maxsize: int, **kwargs: Any):
+        super().__init__(num_pools=num_pools, maxsize=maxsize, block=False, **kwargs)
+        self._counts = counts
+        self._counts_lock = lock
+        self._last_used: Dict[Any, float] = {}
+        # Sınırı aşınca atılan havuzun sayaçları kaybolmasın, bağlantıları kapansın
+        self.pools.dispose_func = self._dispose
+
+    def connection_from_pool_key(self, pool_key, request_context):
+        pool = super().connection_from_pool_key(pool_key, request_context=request_context)
+        self._last_used[pool_key] = time.monotonic()
+        return pool
+
+    def _dispose(self, pool):
+        with self._counts_lock:
+            self._counts.requests += pool.num_requests
+            self._counts.connections += pool.num_connections
+        pool.close()
+
+    def prune(self, idle_timeout: float, now: float) -> int:
+        """idle_timeout sn kullanılmayan sunucu havuzlarını kapat"""
+        closed = 0
+        for pool_key in [key for key, used in list(self._last_used.items()) if now - used > idle_timeout]:
+            with self.pools.lock:
+                pool = self.pools.get(pool_key)
+                if pool is not None and pool.pool is not None and pool.pool.qsize() < pool.pool.maxsize:
+                    # Bağlantısı hâlâ kullanımda (uzun indirme): boşta sayılmaz
+                    self._last_used[pool_key] = now
+                    continue
+                self._last_used.pop(pool_key, None)
+                if pool is None:
+                    continue
+                del self.pools[pool_key]
+            closed += 1
+        return closed
+
+    def live_counts(self) -> Tuple[int, int, int]:
+        """(açık sunucu havuzu, istek, yeni bağlantı) — atılmış havuzlar hariç"""
+        with self.pools.lock:
+            pools = [self.pools[key] for key in self.pools.keys()]
+        return len(pools), sum(pool.num_requests for pool in pools), sum(pool.num_connections for pool in pools)
+
+
+if RequestsRH is not None:
+
+    class SharedHTTPAdapter(RequestsHTTPAdapter):
+        """Bağlantıları platform havuzlarından alan adaptör; oturum kapanınca havuzlar açık kalır"""
+
+        def __init__(self, pools: "HttpPools", **kwargs: Any):
+            self._pools = pools
+            self._managers: Dict[str, _PlatformPoolManager] = {}
+            self._managers_lock = threading.Lock()
+            super().__init__(**kwargs)
+
+        def manager_for(self, platform: str) -> _PlatformPoolManager:
+            manager = self._managers.get(platform)
+            if manager is None:
+                with self._managers_lock:
+                    manager = self._managers.get(platform)
+                    if manager is None:
+                        manager = self._managers[platform] = self._pools.new_manager(platform, self._pm_args)
+            return manager
+
+        def managers(self) -> Dict[str, _PlatformPoolManager]:
+            with self._managers_lock:
+                return dict(self._managers)
+
+        def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+            parsed = urllib3.util.parse_url(request.url)
+            if proxy := select_proxy(parsed.url, proxies):
+                return self.proxy_manager_for(proxy).connection_from_url(parsed.url)
+            self._pools.maybe_prune()
+            return self.manager_for(platform_for_host(parsed.host)).connection_from_url(parsed.url)
+
+        def close(self):
+            # Oturum (YoutubeDL) kapanıyor; bağlantılar diğer işler için kalır
+            pass
+
+        def shutdown(self):
+            for manager in self.managers().values():
+                manager.clear()
+            super().close()
+
+    class SharedRequestsRH(RequestsRH):
+        """requests işleyicisi; bağlantılar HttpPools'tan paylaşılır"""
+
+        RH_NAME = "requests (shared)"
+        pools: Optional["HttpPools"] = None
+
+        def _create_instance(self, cookiejar, legacy_ssl_support=None):
+            pools = SharedRequestsRH.pools or install(HttpPools())
+            session = RequestsSession()
+            adapter = pools.adapter_for(self, legacy_ssl_support)
+            session.adapters.clear()
+            session.headers = requests.structures.CaseInsensitiveDict({"Connection": "keep-alive"})
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.cookies = cookiejar
+            session.trust_env = False
+            return session
+
+    register_rh(SharedRequestsRH)
+
+    @register_preference(SharedRequestsRH)
+    def _prefer_shared(rh, request):
+        # requests işleyicisinin (100) ve urllib'in önünde
+        return 200
+
+
+class HttpPools:
+    """Süreç genelindeki bağlantı havuzları ve platform çerez kavanozları"""
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None, *,
+                 idle_timeout: float = 30, max_hosts: int = 64):
+        self.pool_sizes = pool_sizes or dict(DEFAULT_POOL_SIZES)
+        self.idle_timeout = idle_timeout
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._adapters: Dict[Tuple, "SharedHTTPAdapter"] = {}
+        self._counts: Dict[str, _Counts] = {}
+        self._cookiejars: Dict[str, YoutubeDLCookieJar] = {}
+        self._pruned_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return RequestsRH is not None
+
+    def adapter_for(self, rh: "SharedRequestsRH", legacy_ssl_support: Optional[bool]) -> "SharedHTTPAdapter":
+        """TLS/bağlantı ayarları aynı olan işleyiciler aynı adaptörü (havuzları) kullanır"""
+        legacy = legacy_ssl_support if legacy_ssl_support is not None else rh.legacy_ssl_support
+        key = (bool(legacy), rh.verify, rh.prefer_system_certs,
+               tuple(sorted(rh._client_cert.items())), rh.source_address)
+        with self._lock:
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                adapter = self._adapters[key] = SharedHTTPAdapter(
+                    self,
+                    ssl_context=rh._make_sslcontext(legacy_ssl_support=legacy),
+                    source_address=rh.source_address,
+                    max_retries=urllib3.util.retry.Retry(False),
+                )
+            return adapter
+
+    def new_manager(self, platform: str, pool_kwargs: Dict[str, Any]) -> _PlatformPoolManager:
+        with self._lock:
+            counts = self._counts.setdefault(platform, _Counts())
+        size = self.pool_sizes.get(platform) or self.pool_sizes.get("unknown") or DEFAULT_POOL_SIZES["unknown"]
+        return _PlatformPoolManager(counts, self._lock, self.max_hosts, size, **pool_kwargs)
+
+    def cookiejar(self, platform: str) -> YoutubeDLCookieJar:
+        """Platformun işler arasında korunan çerez kavanozu"""
+        with self._lock:
+            jar = self._cookiejars.get(platform)
+            if jar is None:
+                jar = self._cookiejars[platform] = YoutubeDLCookieJar()
+            return jar
+
+    def maybe_prune(self):
+        """Bağlantı alınırken en fazla birkaç saniyede bir boşta kalan havuzları kapat"""
+        now = time.monotonic()
+        if now - self._pruned_at >= min(5.0, self.idle_timeout):
+            self.prune(now)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Boşta kalan sunucu havuzlarını kapat, süresi dolan çerezleri at"""
+        now = time.monotonic() if now is None else now
+        self._pruned_at = now
+        with self._lock:
+            adapters = list(self._adapters.values())
+            jars = list(self._cookiejars.values())
+        closed = 0
+        for adapter in adapters:
+            for platform, manager in adapter.managers().items():
+                count = manager.prune(self.idle_timeout, now)
+                if count:
+                    with self._lock:
+                        self._counts[platform].idle_closed += count
+                    closed += count
+        for jar in jars:
+            jar.clear_expired_cookies()
+        return closed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Platform başına istek, yeni bağlantı ve bağlantı yeniden kullanım oranı"""
+        with self._lock:
+            adapters = list(self._adapters.values())
+            totals = {platform: [0, counts.requests, counts.connections, counts.idle_closed]
+                      for platform, counts in self._counts.items()}
+            jars = {platform: len(jar) for platform, jar in self._cookiejars.items()}
+        for adapter in adapters:
+            for platform, manager in adapter.managers().items():
+                hosts, requests_made, connections = manager.live_counts()
+                total = totals.setdefault(platform, [0, 0, 0, 0])
+                total[0] += hosts
+                total[1] += requests_made
+                total[2] += connections
+        return {
+            platform: {
+                "open_hosts": hosts,
+                "requests": requests_made,
+                "new_connections": connections,
+                "reuse_rate": round(1 - connections / requests_made, 3) if requests_made else None,
+                "idle_closed": idle_closed,
+                "max_connections_per_host": self.pool_sizes.get(platform, self.pool_sizes.get("unknown")),
+                "cookies": jars.get(platform, 0),
+            }
+            for platform, (hosts, requests_made, connections, idle_closed) in sorted(totals.items())
+        }
+
+    def shutdown(self):
+        with self._lock:
+            adapters = list(self._adapters.values())
+            self._adapters.clear()
+        for adapter in adapters:
+            adapter.shutdown()
+
+
+def install(pools: HttpPools) -> HttpPools:
+    """Süreçteki yt-dlp isteklerinin kullanacağı havuzları ayarla"""
+    if RequestsRH is not None:
+        SharedRequestsRH.pools = pools
+    return pools
+
+
+def merge_stats(*snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Birden çok sürecin stats() çıktısını topla (çıkarma süreçleri)"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for platform, values in snapshot.items():
+            total = merged.setdefault(platform, {**values, "open_hosts": 0, "requests": 0,
+                                                  "new_connections": 0, "idle_closed": 0, "cookies": 0})
+            for field in ("open_hosts", "requests", "new_connections", "idle_closed", "cookies"):
+                total[field] += values[field]
+    for values in merged.values():
+        requests_made = values["requests"]
+        values["reuse_rate"] = round(1 - values["new_connections"] / requests_made, 3) if requests_made else None
+    return merged
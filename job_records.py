@@ -0,0 +1,323 @@
+"""
+Tipli iş kayıtları ve ikincil indeksli iş tablosu.
+
+Her iş önceden serbest biçimli bir sözlüktü (~20 anahtar, ilerleme alanları
+yt-dlp'nin `_*_str` metinleri). JobRecord bilinen alanları `__slots__` ile
+tutar; hız, kalan süre ve bayt sayıları sayısal saklanır, metne yalnızca API
+yanıtında (job_status_view) çevrilir. Nadir/türe özgü alanlar (toplu iş
+öğeleri vb.) `_extra` sözlüğünde durur. Kayıt bir Mapping'dir; mevcut
+`job.get(...)`, `job["status"]`, `{**job}` kullanımları değişmeden çalışır.
+
+JobTable bellekteki `jobs` sözlüğünün yerini alır: kayıtların durum ve
+platform alanları değiştikçe ikincil indeksleri güncel tutar (/health
+sayımları tabloyu dolaşmaz) ve oluşturma sırasını koruyarak /jobs için
+imleçli sayfalama yapar.
+"""
+
+import bisect
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+# Sık kullanılan alanlar; diğerleri _extra'ya yazılır
+JOB_FIELDS = (
+    "type", "status", "progress", "message", "error", "last_error", "retries", "retry_after",
+    "url", "platform", "format", "quality", "client", "client_weight", "priority",
+    "created_at", "queued_at", "started_at", "completed_at", "failed_at", "last_accessed_at", "not_before",
+    "title", "duration", "uploader", "view_count", "thumbnail", "file_path", "file_size",
+    # İlerleme: bayt/sn, saniye, bayt
+    "speed_bps", "eta_seconds", "downloaded_bytes", "total_bytes",
+    "stream_path", "stream_ext", "stream_size", "streamable",
+    "url_key", "video_key", "source_job", "deduplicated", "detached", "recovered",
+    "batch_id", "playlist_item", "metadata_cached", "timings",
+    # Her update_job ile artar: /status ETag ve since_version uzun yoklaması
+    "version",
+)
+# Eski kayıtlardaki biçimlendirilmiş ilerleme metinleri (yüklenirken atılır)
+LEGACY_TEXT_FIELDS = ("speed", "eta", "downloaded", "total")
+# Değişince JobTable indekslerinin güncellenmesi gereken alanlar
+INDEXED_FIELDS = frozenset({"status", "platform", "detached"})
+
+_MISSING = object()
+
+
+class JobRecord(MutableMapping):
+    """Bir işin kaydı; atanmamış alan anahtar olarak yok sayılır"""
+
+    __slots__ = JOB_FIELDS + ("_extra", "_table", "_job_id")
+
+    def __init__(self, data: Optional[Mapping[str, Any]] = None):
+        self._extra: Dict[str, Any] = {}
+        self._table: Optional["JobTable"] = None
+        self._job_id: Optional[str] = None
+        if data:
+            self.update(data)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "JobRecord":
+        """Depodan okunan kayıt; eski sürümlerin ilerleme metinleri atılır"""
+        return cls({key: value for key, value in data.items()
+                    if not (key in LEGACY_TEXT_FIELDS and isinstance(value, str))})
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _SLOT_NAMES:
+            value = getattr(self, key, _MISSING)
+        else:
+            value = self._extra.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _SLOT_NAMES:
+            return getattr(self, key, default)
+        return self._extra.get(key, default)
+
+    def __setitem__(self, key: str, value: Any):
+        self.update({key: value})
+
+    def __delitem__(self, key: str):
+        if key in _SLOT_NAMES:
+            if getattr(self, key, _MISSING) is _MISSING:
+                raise KeyError(key)
+            with self._indexed(key in INDEXED_FIELDS):
+                delattr(self, key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in _SLOT_NAMES:
+            return getattr(self, key, _MISSING) is not _MISSING
+        return key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name in JOB_FIELDS:
+            if getattr(self, name, _MISSING) is not _MISSING:
+                yield name
+        yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def update(self, changes: Mapping[str, Any] = (), **kwargs: Any):
+        changes = {**dict(changes), **kwargs}
+        with self._indexed(not INDEXED_FIELDS.isdisjoint(changes)):
+            for key, value in changes.items():
+                if key in _SLOT_NAMES:
+                    setattr(self, key, value)
+                else:
+                    self._extra[key] = value
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.copy()
+
+    def _indexed(self, indexed: bool):
+        table = self._table if indexed else None
+        return table.reindexing(self) if table is not None else _NO_REINDEX
+
+    def __repr__(self) -> str:
+        return f"JobRecord({self.to_dict()!r})"
+
+
+_SLOT_NAMES = frozenset(JOB_FIELDS)
+
+
+class _NoReindex:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_REINDEX = _NoReindex()
+
+# (created_at, job_id): oluşturma sırası ve sayfalama imleci
+OrderKey = Tuple[float, str]
+
+
+class JobTable(MutableMapping):
+    """job_id -> JobRecord; durum/platform indeksleri ve oluşturma sırası.
+
+    Silinmiş ama dosyası başka işlerce kullanılan (detached) kayıtlar sayım
+    ve listelemelere girmez.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, JobRecord] = {}
+        self._lock = threading.RLock()
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_platform: Dict[str, Set[str]] = {}
+        self._index_keys: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._order: List[OrderKey] = []
+        self._order_keys: Dict[str, OrderKey] = {}
+
+    # --- Mapping ---
+    def __getitem__(self, job_id: str) -> JobRecord:
+        return self._records[job_id]
+
+    def get(self, job_id: str, default: Any = None) -> Any:
+        return self._records.get(job_id, default)
+
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._records))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def items(self) -> List[Tuple[str, JobRecord]]:
+        """Anlık kopya: worker thread'leri kayıt eklerken/silerken de güvenli"""
+        return list(self._records.items())
+
+    def values(self) -> List[JobRecord]:
+        return list(self._records.values())
+
+    def __setitem__(self, job_id: str, record: Mapping[str, Any]):
+        if not isinstance(record, JobRecord):
+            record = JobRecord.from_dict(record)
+        with self._lock:
+            if job_id in self._records:
+                self._remove(job_id)
+            record._table, record._job_id = self, job_id
+            self._records[job_id] = record
+            self._index(job_id, record)
+            order_key = (float(record.get("created_at") or 0), job_id)
+            bisect.insort(self._order, order_key)
+            self._order_keys[job_id] = order_key
+
+    def __delitem__(self, job_id: str):
+        with self._lock:
+            if job_id not in self._records:
+                raise KeyError(job_id)
+            self._remove(job_id)
+
+    def pop(self, job_id: str, *default: Any) -> Any:
+        with self._lock:
+            if job_id not in self._records:
+                if default:
+                    return default[0]
+                raise KeyError(job_id)
+            return self._remove(job_id)
+
+    # --- İndeksler ---
+    @staticmethod
+    def _keys_for(record: JobRecord) -> Tuple[Optional[str], Optional[str]]:
+        if record.get("detached"):
+            return None, None
+        return record.get("status"), record.get("platform") or "unknown"
+
+    def _index(self, job_id: str, record: JobRecord):
+        status, platform = self._index_keys[job_id] = self._keys_for(record)
+        if status is not None:
+            self._by_status.setdefault(status, set()).add(job_id)
+            self._by_platform.setdefault(platform, set()).add(job_id)
+
+    def _unindex(self, job_id: str):
+        status, platform = self._index_keys.pop(job_id, (None, None))
+        if status is None:
+            return
+        for index, key in ((self._by_status, status), (self._by_platform, platform)):
+            members = index.get(key)
+            if members is not None:
+                members.discard(job_id)
+                if not members:
+                    del index[key]
+
+    def _remove(self, job_id: str) -> JobRecord:
+        record = self._records.pop(job_id)
+        self._unindex(job_id)
+        order_key = self._order_keys.pop(job_id)
+        position = bisect.bisect_left(self._order, order_key)
+        if position < len(self._order) and self._order[position] == order_key:
+            del self._order[position]
+        record._table = None
+        return record
+
+    def reindexing(self, record: JobRecord) -> "_Reindex":
+        return _Reindex(self, record)
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            return {status: len(members) for status, members in self._by_status.items()}
+
+    def count_by_platform(self) -> Dict[str, int]:
+        with self._lock:
+            return {platform: len(members) for platform, members in self._by_platform.items()}
+
+    # --- Sayfalama ---
+    def page(self, status: Optional[str] = None, platform: Optional[str] = None,
+             since: Optional[float] = None, after: Optional[OrderKey] = None,
+             limit: int = 100) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[OrderKey], Optional[int]]:
+        """Oluşturma sırasına göre filtreli sayfa: (kayıtlar, sonraki imleç, toplam eşleşen).
+
+        Filtreler indeks kümelerinden tek bakışta sınanır; sıralı listede
+        imleçten (veya since'ten) başlanır, sayfa dolunca durulur. Toplam
+        indeks boyutlarından okunur; since verilince tabloyu kilit altında
+        taramamak için sayılmaz (None).
+        """
+        with self._lock:
+            members = self._matching(status, platform)
+            start = bisect.bisect_left(self._order, (since, "")) if since is not None else 0
+            total: Optional[int] = None
+            if since is None:
+                total = len(members) if members is not None else sum(map(len, self._by_status.values()))
+            if after is not None:
+                start = max(start, bisect.bisect_right(self._order, after))
+            found: List[Tuple[str, Dict[str, Any]]] = []
+            next_key = last_key = None
+            for order_key in self._order[start:]:
+                job_id = order_key[1]
+                if members is None:
+                    if self._index_keys[job_id][0] is None:
+                        continue
+                elif job_id not in members:
+                    continue
+                if len(found) == limit:
+                    next_key = last_key
+                    break
+                found.append((job_id, self._records[job_id].copy()))
+                last_key = order_key
+            return found, next_key, total
+
+    def _matching(self, status: Optional[str], platform: Optional[str]) -> Optional[Set[str]]:
+        """Filtreye uyan işler (filtre yoksa None: detached olmayan tüm işler)"""
+        sets = []
+        if status is not None:
+            sets.append(self._by_status.get(status, set()))
+        if platform is not None:
+            sets.append(self._by_platform.get(platform, set()))
+        if not sets:
+            return None
+        if len(sets) == 1:
+            return sets[0]
+        return set.intersection(*sorted(sets, key=len))
+
+
+class _Reindex:
+    """Kayıt alanı değişirken tablo indekslerini güncel tutar"""
+
+    __slots__ = ("table", "record")
+
+    def __init__(self, table: JobTable, record: JobRecord):
+        self.table = table
+        self.record = record
+
+    def __enter__(self):
+        self.table._lock.acquire()
+
+    def __exit__(self, *exc):
+        try:
+            job_id = self.record._job_id
+            if self.record._table is self.table and self.table._records.get(job_id) is self.record:
+                if self.table._index_keys.get(job_id) != JobTable._keys_for(self.record):
+                    self.table._unindex(job_id)
+                    self.table._index(job_id, self.record)
+        finally:
+            self.table._lock.release()
+        return False
@@ -0,0 +1,593 @@
+"""
+Linkcim iş kayıtları için kalıcı depolama.
+
+API süreci işleri bellekteki `jobs` sözlüğünde tutar; depo bu sözlüğün
+yeniden başlatmalar arasında kaybolmamasını sağlar. Yazmalar toplu yapılır:
+güncellenen işler "kirli" olarak işaretlenir ve arka plandaki flush thread'i
+bunları JOB_STORE_FLUSH_INTERVAL aralıklarla tek işlemde diske yazar.
+Böylece progress_hook her çağrıldığında disk yazması olmaz.
+
+SQLite deposu ayrıca birden fazla API sürecinin (uvicorn --workers N) aynı
+iş durumunu ve iş kuyruğunu paylaşmasını sağlar: kuyruktaki işler tablodan
+atomik olarak "claim" edilir, çalışan süreçler `workers` tablosuna düzenli
+heartbeat yazar ve heartbeat'i kesilen sürecin yarım işleri kuyruğa geri
+alınır.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore(ABC):
+    """İş deposu arayüzü ve toplu yazma mantığı.
+
+    Alt sınıflar soyut metotları ve gerekirse `close` metodunu uygular.
+    Paylaşımlı mod (SHARED_JOB_STATE) için depo SharedJobStore olmalıdır.
+    """
+
+    def __init__(self, flush_interval: float = 1.0):
+        self.flush_interval = flush_interval
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None
+
+    # --- Uygulanacak metotlar ---
+    @abstractmethod
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def insert(self, job_id: str, job: Dict[str, Any]):
+        """Yeni işi hemen yaz (toplu yazma beklenmez)"""
+
+    @abstractmethod
+    def _write_batch(self, updates: Dict[str, Dict[str, Any]], deletions: Set[str]):
+        """Var olan kayıtları güncelle; silinmiş kayıtlar geri oluşturulmaz"""
+
+    @abstractmethod
+    def claim_idempotency_key(self, key: str, job_id: str, fingerprint: str,
+                              expires_at: float) -> Tuple[str, str, float]:
+        """Anahtarı job_id için ayır (atomik); süresi dolmamış kayıt varsa ona dokunma.
+
+        Anahtarın sahibi olan (job_id, fingerprint, expires_at) döner; job_id
+        bizimkiyse anahtar bu çağrıyla alınmıştır.
+        """
+
+    @abstractmethod
+    def release_idempotency_keys(self, job_id: str):
+        """İşe ait anahtarları bırak (iş oluşturulamadı veya silindi)"""
+
+    @abstractmethod
+    def expire_idempotency_keys(self, now: float) -> int:
+        ...
+
+    # --- Ortak davranış ---
+    def mark_dirty(self, job_id: str):
+        with self._lock:
+            self._dirty.add(job_id)
+
+    def flush(self):
+        """Kirli işleri tek seferde yaz"""
+        if self._snapshot is None:
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+
+        updates: Dict[str, Dict[str, Any]] = {}
+        for job_id in dirty:
+            job = self._snapshot(job_id)
+            if job is not None:
+                updates[job_id] = job
+        try:
+            self._write_batch(updates, set())
+        except Exception as e:
+            logger.error(f"❌ İş deposu yazma hatası: {e}")
+            # Bir sonraki turda tekrar dene
+            with self._lock:
+                self._dirty |= dirty
+
+    def write_now(self, job_id: str, job: Dict[str, Any]):
+        """Tek işi toplu yazmayı beklemeden güncelle"""
+        with self._lock:
+            self._dirty.discard(job_id)
+        self._write_batch({job_id: job}, set())
+
+    def delete_now(self, job_id: str):
+        with self._lock:
+            self._dirty.discard(job_id)
+        self._write_batch({}, {job_id})
+
+    def start(self, snapshot: Callable[[str], Optional[Dict[str, Any]]]):
+        """Arka plan flush thread'ini başlat.
+
+        `snapshot(job_id)` işin o anki kopyasını (silinmişse None) döndürür.
+        """
+        self._snapshot = snapshot
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="job-store-flush", daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+class MemoryJobStore(JobStore):
+    """Yalnızca süreç ömrü boyunca tutan depo (eski davranış, testler için)"""
+
+    def __init__(self, flush_interval: float = 1.0):
+        super().__init__(flush_interval)
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        # anahtar -> (iş, istek parmak izi, geçerlilik sonu)
+        self._idempotency: Dict[str, Tuple[str, str, float]] = {}
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return {job_id: dict(job) for job_id, job in self._rows.items()}
+
+    def insert(self, job_id: str, job: Dict[str, Any]):
+        self._rows[job_id] = dict(job)
+
+    def _write_batch(self, updates: Dict[str, Dict[str, Any]], deletions: Set[str]):
+        for job_id, job in updates.items():
+            if job_id in self._rows:
+                self._rows[job_id] = job
+        for job_id in deletions:
+            self._rows.pop(job_id, None)
+
+    def claim_idempotency_key(self, key: str, job_id: str, fingerprint: str,
+                              expires_at: float) -> Tuple[str, str, float]:
+        with self._lock:
+            current = self._idempotency.get(key)
+            if current is None or current[2] <= time.time():
+                current = self._idempotency[key] = (job_id, fingerprint, expires_at)
+            return current
+
+    def release_idempotency_keys(self, job_id: str):
+        with self._lock:
+            for key in [key for key, value in self._idempotency.items() if value[0] == job_id]:
+                del self._idempotency[key]
+
+    def expire_idempotency_keys(self, now: float) -> int:
+        with self._lock:
+            expired = [key for key, value in self._idempotency.items() if value[2] <= now]
+            for key in expired:
+                del self._idempotency[key]
+        return len(expired)
+
+
+class SharedJobStore(JobStore):
+    """Birden fazla API sürecinin paylaşabildiği depo: iş durumu, kuyruk ve heartbeat.
+
+    api.py bu metotları yalnızca paylaşımlı modda çağırır.
+    """
+
+    # --- İş kayıtları ---
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_many(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def count_by_status(self) -> Dict[str, int]:
+        """Gizlenmiş (detached) kayıtlar hariç"""
+
+    @abstractmethod
+    def count_by_platform(self) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def page(self, status: Optional[str] = None, platform: Optional[str] = None,
+             since: Optional[float] = None, after: Optional[Tuple[float, str]] = None,
+             limit: int = 100) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[Tuple[float, str]], Optional[int]]:
+        """Oluşturma sırasına göre filtreli sayfa: (kayıtlar, sonraki imleç, toplam eşleşen).
+
+        since verilince toplam sayılmaz (None).
+        """
+
+    # --- Kuyruk ---
+    @abstractmethod
+    def claim_next(self, owner: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Kuyruktaki sıradaki işi bu sürece ata (atomik)"""
+
+    @abstractmethod
+    def count_queued(self) -> int:
+        ...
+
+    @abstractmethod
+    def queue_position(self, job_id: str) -> Optional[int]:
+        ...
+
+    # --- Tekrarlanan içerik ---
+    @abstractmethod
+    def find_completed(self, keys: List[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    def find_refs(self, holder_id: str) -> List[str]:
+        ...
+
+    # --- Süreçler ---
+    @abstractmethod
+    def heartbeat(self, owner: str):
+        ...
+
+    @abstractmethod
+    def unregister(self, owner: str):
+        ...
+
+    @abstractmethod
+    def recover_orphans(self, stale_after: float) -> int:
+        """Heartbeat'i kesilmiş süreçlerin yarım işlerini kuyruğa geri al"""
+
+
+class SQLiteJobStore(SharedJobStore):
+    """SQLite (WAL modu) üzerinde kalıcı ve süreçler arası paylaşılabilir iş deposu"""
+
+    # Bir süreç bu kadar durumda iş tutuyorsa "çalışıyor" sayılır
+    ACTIVE_STATUSES = ("starting", "downloading", "processing")
+
+    def __init__(self, path: Path, flush_interval: float = 1.0):
+        super().__init__(flush_interval)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id     TEXT PRIMARY KEY,
+                    status     TEXT NOT NULL,
+                    created_at REAL,
+                    data       TEXT NOT NULL
+                )
+                """
+            )
+            # Paylaşımlı kuyruk için sonradan eklenen kolonlar
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "queued_at" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN queued_at REAL")
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs(status, queued_at)")
+            # /jobs sayfalaması: oluşturma sırası + imleç
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs(created_at, job_id)")
+            # Tekrarlanan içerik (dedupe) aramaları için JSON alan indeksleri
+            for field in ("url_key", "video_key", "source_job", "client", "platform"):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS jobs_{field} ON jobs(json_extract(data, '$.{field}'))"
+                )
+            # POST /download Idempotency-Key kayıtları (süreçler arası tekil)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key         TEXT PRIMARY KEY,
+                    job_id      TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    expires_at  REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idempotency_job ON idempotency_keys(job_id)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workers (
+                    owner     TEXT PRIMARY KEY,
+                    heartbeat REAL NOT NULL
+                )
+                """
+            )
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        with self._db_lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    @staticmethod
+    def _decode(job_id: str, data: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(data)
+        except ValueError:
+            logger.warning(f"⚠️ Bozuk iş kaydı atlandı: {job_id}")
+            return None
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._query("SELECT job_id, data FROM jobs ORDER BY created_at")
+        loaded: Dict[str, Dict[str, Any]] = {}
+        for job_id, data in rows:
+            job = self._decode(job_id, data)
+            if job is not None:
+                loaded[job_id] = job
+        return loaded
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM jobs WHERE job_id = ?", (job_id,))
+        return self._decode(job_id, rows[0][0]) if rows else None
+
+    def get_many(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not job_ids:
+            return {}
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._query(f"SELECT job_id, data FROM jobs WHERE job_id IN ({placeholders})", job_ids)
+        found: Dict[str, Dict[str, Any]] = {}
+        for job_id, data in rows:
+            job = self._decode(job_id, data)
+            if job is not None:
+                found[job_id] = job
+        return found
+
+    def insert(self, job_id: str, job: Dict[str, Any]):
+        self._query(
+            "INSERT OR REPLACE INTO jobs (job_id, status, created_at, queued_at, data) VALUES (?, ?, ?, ?, ?)",
+            (job_id, job.get("status", "unknown"), job.get("created_at"), job.get("queued_at"),
+             json.dumps(dict(job), default=str)),
+        )
+
+    def _write_batch(self, updates: Dict[str, Dict[str, Any]], deletions: Set[str]):
+        rows = [
+            (job.get("status", "unknown"), job.get("queued_at"), json.dumps(dict(job), default=str), job_id)
+            for job_id, job in updates.items()
+        ]
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE jobs SET status = ?, queued_at = ?, data = ? WHERE job_id = ?", rows
+                    )
+                if deletions:
+                    self._conn.executemany(
+                        "DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in deletions]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # --- Paylaşımlı kuyruk ---
+    # Kuyruk sırası: istemcinin çalışan iş payı (iş sayısı / ağırlık) en düşük
+    # olan önce, sonra öncelik ve geliş sırası. Ertelenen işler (not_before)
+    # süresi dolana kadar alınmaz. Süreçler arası sanal zaman
+    # tutulmadığından bu, bellekteki adil kuyruğun (fair_queue) yaklaşığıdır.
+    _PRIORITY_RANK = (
+        "CASE json_extract({t}.data, '$.priority') WHEN 'high' THEN 0 WHEN 'low' THEN 2 ELSE 1 END"
+    )
+    _CLIENT_SHARE = """(
+        SELECT COUNT(*) FROM jobs AS active
+         WHERE active.status IN ('starting', 'downloading', 'processing')
+           AND json_extract(active.data, '$.client') IS json_extract({t}.data, '$.client')
+    ) / COALESCE(json_extract({t}.data, '$.client_weight'), 1.0)"""
+
+    def claim_next(self, owner: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Kuyruktaki sıradaki işi bu sürece ata (atomik)"""
+        rows = self._query(
+            f"""
+            UPDATE jobs
+               SET status = 'starting', owner = ?,
+                   data = json_set(data, '$.status', 'starting',
+                                   '$.version', COALESCE(json_extract(data, '$.version'), 0) + 1)
+             WHERE job_id = (
+                    SELECT job_id FROM jobs AS queued
+                     WHERE status = 'queued' AND COALESCE(json_extract(data, '$.not_before'), 0) <= ?
+                     ORDER BY {self._CLIENT_SHARE.format(t="queued")},
+                              {self._PRIORITY_RANK.format(t="queued")}, queued_at, rowid
+                     LIMIT 1
+                   )
+               AND status = 'queued'
+            RETURNING job_id, data
+            """,
+            (owner, time.time()),
+        )
+        if not rows:
+            return None
+        job_id, data = rows[0]
+        job = self._decode(job_id, data)
+        return (job_id, job) if job is not None else None
+
+    def count_queued(self) -> int:
+        return self._query("SELECT COUNT(*) FROM jobs WHERE status = 'queued'")[0][0]
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Tahmini sıra: öncelik ve geliş sırasına göre (istemci payı anlık değişir)"""
+        rows = self._query(
+            f"""
+            SELECT COUNT(*) FROM jobs AS other, jobs AS me
+             WHERE me.job_id = ? AND me.status = 'queued' AND other.status = 'queued'
+               AND ({self._PRIORITY_RANK.format(t="other")} < {self._PRIORITY_RANK.format(t="me")}
+                    OR ({self._PRIORITY_RANK.format(t="other")} = {self._PRIORITY_RANK.format(t="me")}
+                        AND (other.queued_at < me.queued_at
+                             OR (other.queued_at = me.queued_at AND other.rowid <= me.rowid))))
+            """,
+            (job_id,),
+        )
+        return rows[0][0] or None
+
+    def count_by_status(self) -> Dict[str, int]:
+        return dict(self._query(
+            "SELECT status, COUNT(*) FROM jobs WHERE json_extract(data, '$.detached') IS NULL GROUP BY status"
+        ))
+
+    def count_by_platform(self) -> Dict[str, int]:
+        return dict(self._query(
+            "SELECT COALESCE(json_extract(data, '$.platform'), 'unknown'), COUNT(*) FROM jobs"
+            " WHERE json_extract(data, '$.detached') IS NULL GROUP BY 1"
+        ))
+
+    def page(self, status: Optional[str] = None, platform: Optional[str] = None,
+             since: Optional[float] = None, after: Optional[Tuple[float, str]] = None,
+             limit: int = 100) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[Tuple[float, str]], Optional[int]]:
+        """Oluşturma sırasına göre filtreli sayfa: (kayıtlar, sonraki imleç, toplam eşleşen).
+
+        since verilince toplam sayılmaz (None).
+        """
+        where = ["json_extract(data, '$.detached') IS NULL"]
+        params: List[Any] = []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if platform is not None:
+            where.append("json_extract(data, '$.platform') = ?")
+            params.append(platform)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        total = None if since is not None else self._query(
+            f"SELECT COUNT(*) FROM jobs WHERE {' AND '.join(where)}", params)[0][0]
+        if after is not None:
+            where.append("(created_at, job_id) > (?, ?)")
+            params.extend(after)
+        rows = self._query(
+            f"""
+            SELECT job_id, created_at, data FROM jobs
+             WHERE {' AND '.join(where)}
+             ORDER BY created_at, job_id
+             LIMIT ?
+            """,
+            params + [limit + 1],
+        )
+        found: List[Tuple[str, Dict[str, Any]]] = []
+        for job_id, _, data in rows[:limit]:
+            job = self._decode(job_id, data)
+            if job is not None:
+                found.append((job_id, job))
+        next_key = (rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return found, next_key, total
+
+    # --- Tekrarlanan içerik ---
+    def find_completed(self, keys: List[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """İçerik anahtarlarından biriyle eşleşen tamamlanmış işi bul"""
+        if not keys:
+            return None
+        placeholders = ",".join("?" * len(keys))
+        rows = self._query(
+            f"""
+            SELECT job_id, data FROM jobs
+             WHERE status = 'completed'
+               AND (json_extract(data, '$.url_key') IN ({placeholders})
+                    OR json_extract(data, '$.video_key') IN ({placeholders}))
+             ORDER BY created_at DESC
+            """,
+            list(keys) * 2,
+        )
+        for job_id, data in rows:
+            job = self._decode(job_id, data)
+            if job is not None:
+                return job_id, job
+        return None
+
+    def find_refs(self, holder_id: str) -> List[str]:
+        """Dosyası holder_id'ye ait olan işler (kendisi dahil)"""
+        rows = self._query(
+            "SELECT job_id FROM jobs WHERE job_id = ? OR json_extract(data, '$.source_job') = ?",
+            (holder_id, holder_id),
+        )
+        return [row[0] for row in rows]
+
+    # --- Idempotency anahtarları ---
+    def claim_idempotency_key(self, key: str, job_id: str, fingerprint: str,
+                              expires_at: float) -> Tuple[str, str, float]:
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM idempotency_keys WHERE key = ? AND expires_at <= ?", (key, time.time())
+                )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO idempotency_keys (key, job_id, fingerprint, expires_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, job_id, fingerprint, expires_at),
+                )
+                owner = self._conn.execute(
+                    "SELECT job_id, fingerprint, expires_at FROM idempotency_keys WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return owner
+
+    def release_idempotency_keys(self, job_id: str):
+        self._query("DELETE FROM idempotency_keys WHERE job_id = ?", (job_id,))
+
+    def expire_idempotency_keys(self, now: float) -> int:
+        with self._db_lock:
+            return self._conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,)).rowcount
+
+    def heartbeat(self, owner: str):
+        self._query(
+            "INSERT INTO workers (owner, heartbeat) VALUES (?, ?) "
+            "ON CONFLICT(owner) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (owner, time.time()),
+        )
+
+    def unregister(self, owner: str):
+        self._query("DELETE FROM workers WHERE owner = ?", (owner,))
+
+    def recover_orphans(self, stale_after: float) -> int:
+        """Heartbeat'i kesilmiş süreçlerin yarım işlerini kuyruğa geri al"""
+        now = time.time()
+        statuses = ",".join(f"'{status}'" for status in self.ACTIVE_STATUSES)
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM workers WHERE heartbeat < ?", (now - stale_after,))
+                cursor = self._conn.execute(
+                    f"""
+                    UPDATE jobs
+                       SET status = 'queued', owner = NULL, queued_at = ?,
+                           data = json_set(data, '$.status', 'queued', '$.progress', 0,
+                                           '$.queued_at', ?, '$.started_at', NULL,
+                                           '$.recovered', json('true'),
+                                           '$.version', COALESCE(json_extract(data, '$.version'), 0) + 1)
+                     WHERE status IN ({statuses})
+                       AND (owner IS NULL OR owner NOT IN (SELECT owner FROM workers))
+                    """,
+                    (now, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def close(self):
+        super().close()
+        with self._db_lock:
+            self._conn.close()
+
+
+def create_job_store(kind: str, path: Path, flush_interval: float = 1.0) -> JobStore:
+    """JOB_STORE ayarına göre depo oluştur ("sqlite" veya "memory")"""
+    kind = (kind or "sqlite").lower()
+    if kind == "memory":
+        return MemoryJobStore(flush_interval)
+    if kind == "sqlite":
+        return SQLiteJobStore(path, flush_interval)
+    raise ValueError(f"Bilinmeyen JOB_STORE türü: {kind}")
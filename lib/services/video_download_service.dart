@@ -8,6 +8,7 @@ import 'package:gal/gal.dart';
 import 'package:flutter/foundation.dart';
 import 'package:device_info_plus/device_info_plus.dart';
 import 'package:hive_flutter/hive_flutter.dart';
+import 'package:uuid/uuid.dart';
 
 class VideoDownloadService {
   // 🎯 PYTHON API İLE ENTEGRE VİDEO İNDİRME SİSTEMİ
@@ -18,6 +19,9 @@ class VideoDownloadService {
       '45541d717524a99df5f994bb9f6cbce825269852be079594b8e35f7752d6f1bd';
   static const int _timeoutSeconds = 120;
   static const int _pollIntervalMs = 2000; // 2 saniyede bir durum kontrol et
+  // Zaman aşımı / bağlantı hatasında indirme isteği aynı Idempotency-Key ile
+  // tekrarlanır; sunucu ikinci bir iş açmaz, ilk işi döndürür
+  static const int _startRetries = 2;
 
   static bool _isDebugMode = kDebugMode;
 
@@ -282,25 +286,38 @@ class VideoDownloadService {
   // 1️⃣ İndirme işini başlat
   static Future<Map<String, dynamic>> _startDownload(
       String videoUrl, String platform, String format, String quality) async {
+    final idempotencyKey = const Uuid().v4();
     try {
       _debugPrint('📤 Python API\'ye indirme isteği gönderiliyor...');
 
-      final response = await http
-          .post(
-            Uri.parse('$_baseUrl/download'),
-            headers: {
-              'Authorization': 'Bearer $_apiKey',
-              'Content-Type': 'application/json',
-            },
-            body: jsonEncode({
-              'url': videoUrl,
-              'format': format,
-              'quality': quality,
-              'platform': platform,
-              'extract_audio': format == 'mp3',
-            }),
-          )
-          .timeout(Duration(seconds: _timeoutSeconds));
+      http.Response? response;
+      for (int attempt = 0; response == null; attempt++) {
+        try {
+          response = await http
+              .post(
+                Uri.parse('$_baseUrl/download'),
+                headers: {
+                  'Authorization': 'Bearer $_apiKey',
+                  'Content-Type': 'application/json',
+                  'Idempotency-Key': idempotencyKey,
+                },
+                body: jsonEncode({
+                  'url': videoUrl,
+                  'format': format,
+                  'quality': quality,
+                  'platform': platform,
+                  'extract_audio': format == 'mp3',
+                }),
+              )
+              .timeout(Duration(seconds: _timeoutSeconds));
+        } on TimeoutException {
+          if (attempt >= _startRetries) rethrow;
+          _debugPrint('🔁 İndirme isteği zaman aşımı, tekrar deneniyor...');
+        } on SocketException {
+          if (attempt >= _startRetries) rethrow;
+          _debugPrint('🔁 Bağlantı hatası, indirme isteği tekrar deneniyor...');
+        }
+      }
 
       if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
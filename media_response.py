@@ -0,0 +1,348 @@
+"""
+İndirilen medya dosyalarının HTTP üzerinden sunulması.
+
+`MediaFileResponse`, Starlette'in FileResponse'una şunları ekler:
+  * Range / If-Range ile kısmi yanıt (206) ve 416; kopan mobil bağlantı
+    kaldığı yerden sürer, oynatıcılar ileri-geri sarabilir
+  * ETag / Last-Modified ile koşullu istekler (If-None-Match,
+    If-Modified-Since -> 304)
+  * Uzantıdan doğru medya türü (video/mp4, audio/mp4 ...)
+  * Sıfır kopya gönderim: reverse proxy (nginx X-Accel-Redirect) veya
+    sunucunun desteklediği ASGI zerocopysend / pathsend eklentileri;
+    hiçbiri yoksa dosya büyük parçalarla okunur
+
+`iter_growing_file` ise hâlâ yazılmakta olan (yt-dlp .part) dosyayı
+yazıldıkça okuyarak ilerlemeli (progressive) gönderim sağlar.
+
+`iter_zip` birden fazla dosyayı diskte ikinci bir kopya oluşturmadan,
+gönderirken oluşturulan bir ZIP arşivi olarak akıtır.
+"""
+
+import mimetypes
+import os
+import stat
+import time
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+# mimetypes modülü platforma göre bazılarını bilmez (örn. .mkv, .m4a)
+MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".m4v": "video/mp4",
+    ".webm": "video/webm",
+    ".mkv": "video/x-matroska",
+    ".mov": "video/quicktime",
+    ".avi": "video/x-msvideo",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".opus": "audio/ogg",
+    ".ogg": "audio/ogg",
+    ".flac": "audio/flac",
+    ".wav": "audio/wav",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+
+class RangeNotSatisfiable(Exception):
+    """İstenen aralık dosyanın dışında (416)"""
+
+
+class GrowingFileAborted(Exception):
+    """Okunan dosyanın yazımı yarıda kaldı (indirme başarısız/silindi)"""
+
+
+def media_type_for(path) -> str:
+    suffix = Path(path).suffix.lower()
+    return MEDIA_TYPES.get(suffix) or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def content_disposition(filename: str, disposition_type: str = "attachment") -> str:
+    """ASCII dışı adlar için RFC 5987 (filename*=) biçimi"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition_type}; filename*=utf-8''{quoted}"
+    return f'{disposition_type}; filename="{filename}"'
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """Güçlü ETag: dosya değişirse (yeniden indirme) değişir"""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """'bytes=a-b' / 'bytes=a-' / 'bytes=-n' -> (başlangıç, bitiş) dahil.
+
+    Geçersiz veya çoklu aralıkta None döner (tam dosya gönderilir);
+    dosyanın dışındaki aralıkta RangeNotSatisfiable fırlatır.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_str, sep, end_str = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else max(start, size - 1)
+            if end < start:
+                return None
+        else:
+            suffix = int(end_str)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            start, end = max(0, size - suffix), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def parse_http_date(value: str) -> Optional[int]:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def etag_in(header: str, etag: str) -> bool:
+    """If-None-Match karşılaştırması (zayıf: W/ öneki yok sayılır)"""
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+class MediaFileResponse(FileResponse):
+    """Range, koşullu istek ve sıfır kopya destekli dosya yanıtı.
+
+    accel_redirect verilirse gövde gönderilmez; reverse proxy (nginx
+    `X-Accel-Redirect`) dosyayı sendfile ile ve Range desteğiyle kendisi sunar.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path, *, filename: Optional[str] = None, media_type: Optional[str] = None,
+                 content_disposition_type: str = "attachment", accel_redirect: Optional[str] = None,
+                 **kwargs):
+        super().__init__(
+            path,
+            filename=filename,
+            media_type=media_type or media_type_for(path),
+            content_disposition_type=content_disposition_type,
+            **kwargs,
+        )
+        self.accel_redirect = accel_redirect
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        self.headers.setdefault("etag", make_etag(stat_result))
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat_result = self.stat_result
+        if stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(stat_result)
+
+        if self.accel_redirect:
+            # Range/koşullu istekleri proxy değerlendirir
+            self.headers["x-accel-redirect"] = self.accel_redirect
+            await self._send_empty(send, 200)
+            return
+
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        etag = self.headers["etag"]
+
+        if self._not_modified(request_headers, etag, stat_result):
+            for name in ("content-type", "content-disposition"):
+                if name in self.headers:
+                    del self.headers[name]
+            await self._send_empty(send, 304)
+            return
+
+        status_code, start, end = self.status_code, 0, size - 1
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers.get("if-range"), etag, stat_result):
+            try:
+                byte_range = parse_byte_range(range_header, size)
+            except RangeNotSatisfiable:
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                await self._send_empty(send, 416)
+                return
+            if byte_range is not None:
+                status_code, (start, end) = 206, byte_range
+                self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        length = max(0, end - start + 1)
+        self.headers["content-length"] = str(length)
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+
+        extensions = scope.get("extensions") or {}
+        if scope["method"].upper() == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in extensions:
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            with file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": start,
+                    "count": length,
+                    "more_body": False,
+                })
+        elif "http.response.pathsend" in extensions and status_code == 200:
+            path = await anyio.to_thread.run_sync(Path(self.path).resolve)
+            await send({"type": "http.response.pathsend", "path": str(path)})
+        else:
+            await self._send_chunks(send, start, length)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_empty(self, send: Send, status_code: int):
+        if status_code == 304 and "content-length" in self.headers:
+            del self.headers["content-length"]
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_chunks(self, send: Send, start: int, length: int):
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    # Dosya gönderim sırasında kısaldı
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    def _not_modified(headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_in(if_none_match, etag)
+        since = parse_http_date(headers.get("if-modified-since", ""))
+        return since is not None and int(stat_result.st_mtime) <= since
+
+    @staticmethod
+    def _if_range_matches(value: Optional[str], etag: str, stat_result: os.stat_result) -> bool:
+        """If-Range yoksa veya dosya değişmediyse aralık uygulanır"""
+        if value is None:
+            return True
+        value = value.strip()
+        if value.startswith('"') or value.startswith("W/"):
+            # If-Range güçlü karşılaştırma ister
+            return value == etag
+        return parse_http_date(value) == int(stat_result.st_mtime)
+
+
+async def iter_growing_file(path, still_writing: Callable[[], Awaitable[Optional[bool]]],
+                            chunk_size: int = 256 * 1024, poll_interval: float = 0.2) -> AsyncIterator[bytes]:
+    """Yazılmakta olan dosyayı yazıldıkça oku.
+
+    Dosya sonuna gelindiğinde still_writing() sorulur: True ise yeni veri
+    beklenir, False ise kalan baytlar okunup bitirilir, None ise yazım
+    yarıda kalmıştır (GrowingFileAborted). Dosya açık tutulduğu için yazıcı
+    onu yeniden adlandırsa da (.part -> son ad) okuma aynı dosyadan sürer.
+    """
+    async with await anyio.open_file(path, mode="rb") as file:
+        position = 0
+        while True:
+            chunk = await file.read(chunk_size)
+            if chunk:
+                position += len(chunk)
+                yield chunk
+                continue
+            state = await still_writing()
+            if state is None:
+                raise GrowingFileAborted(str(path))
+            if state is False:
+                # Son kontrolden sonra yazılmış olabilecek baytlar
+                while chunk := await file.read(chunk_size):
+                    yield chunk
+                return
+            size = (await anyio.to_thread.run_sync(os.fstat, file.wrapped.fileno())).st_size
+            if size < position:
+                # Yazıcı dosyayı baştan yazmaya başladı; gönderilen baytlar geçersiz
+                raise GrowingFileAborted(str(path))
+            await anyio.sleep(poll_interval)
+
+
+class _ZipSink:
+    """zipfile'ın yazdığı baytları biriktiren, konum desteklemeyen hedef.
+
+    tell()/seek() olmadığı için zipfile yerel başlıkları geri dönüp
+    düzeltmez; boyut ve CRC her dosyanın ardından veri tanımlayıcısıyla
+    (data descriptor) yazılır, arşiv baştan sona tek geçişte akar.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(files: Iterable[Tuple[str, str]], chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """(dosya yolu, arşivdeki ad) çiftlerinden sıkıştırmasız ZIP akışı üret.
+
+    Medya zaten sıkıştırılmış olduğu için dosyalar ZIP_STORED ile eklenir;
+    bellekte en fazla bir okuma parçası tutulur. 4 GB'ı aşan dosyalar ve
+    arşivler için ZIP64 kullanılır. Senkron üreteçtir (StreamingResponse
+    onu thread havuzunda okur).
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, arcname in files:
+            try:
+                source = open(path, "rb")
+            except FileNotFoundError:
+                # Arşiv hazırlanırken silinmiş dosya atlanır
+                continue
+            with source:
+                stat_result = os.fstat(source.fileno())
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime(stat_result.st_mtime)[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                # Boyut önceden bilinirse zipfile ZIP64 gerekip gerekmediğine karar verebilir
+                info.file_size = stat_result.st_size
+                with archive.open(info, mode="w") as entry:
+                    while chunk := source.read(chunk_size):
+                        entry.write(chunk)
+                        yield sink.drain()
+            # Veri tanımlayıcısı
+            yield sink.drain()
+    # Merkezi dizin kapanışta yazılır
+    yield sink.drain()
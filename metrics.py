@@ -0,0 +1,174 @@
+"""
+Prometheus metrikleri (/metrics).
+
+İş aşaması süreleri, platform bazında indirme hızı, önbellek isabetleri ve
+rota gecikmeleri burada tanımlanır. Birden fazla API süreci çalışırken
+(uvicorn --workers N) prometheus_client'ın multiprocess modu kullanılır:
+her süreç değerlerini ortak bir klasöre yazar, /metrics hepsini toplar.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# prometheus_client içe aktarılmadan önce ayarlanmalı. uvicorn'un worker
+# süreçleri aynı ana süreçten doğar; klasör ana sürecin pid'iyle adlanır
+if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(Path(tempfile.gettempdir()) / f"linkcim-metrics-{os.getppid()}")
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+if MULTIPROCESS:
+    Path(os.environ["PROMETHEUS_MULTIPROC_DIR"]).mkdir(parents=True, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily, Metric  # noqa: E402
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# 64 KB/sn ... 128 MB/sn
+SPEED_BUCKETS = tuple(64 * 1024 * 2 ** n for n in range(12))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+JOB_STAGE_SECONDS = Histogram(
+    "linkcim_job_stage_seconds",
+    "Tamamlanan işlerin aşama süreleri (queue, extract, download, postprocess, total)",
+    ["stage", "platform"],
+    buckets=STAGE_BUCKETS,
+)
+DOWNLOAD_SPEED = Histogram(
+    "linkcim_download_speed_bytes_per_second",
+    "İş başına ortalama indirme hızı",
+    ["platform"],
+    buckets=SPEED_BUCKETS,
+)
+DOWNLOAD_BYTES = Counter("linkcim_download_bytes", "İndirilen toplam bayt", ["platform"])
+JOBS_FINISHED = Counter("linkcim_jobs_finished", "Biten indirme işleri", ["platform", "status"])
+CACHE_LOOKUPS = Counter("linkcim_cache_lookups", "Önbellek aramaları (hit, miss, coalesced)", ["cache", "result"])
+ACTIVE_WORKERS = Gauge("linkcim_active_workers", "İndirme yapan worker sayısı", multiprocess_mode="livesum")
+EVENT_LOOP_LAG = Histogram(
+    "linkcim_event_loop_lag_seconds",
+    "Event loop'un zamanlanmış uyanmaya geç kalma süresi",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "linkcim_http_request_duration_seconds",
+    "Rota başına yanıt başlangıcına kadar geçen süre",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def observe_completed_job(platform: str, timings: Dict[str, float], file_size: int):
+    for stage, seconds in timings.items():
+        JOB_STAGE_SECONDS.labels(stage, platform).observe(seconds)
+    DOWNLOAD_BYTES.labels(platform).inc(file_size)
+    if timings.get("download", 0) > 0:
+        DOWNLOAD_SPEED.labels(platform).observe(file_size / timings["download"])
+    JOBS_FINISHED.labels(platform, "completed").inc()
+
+
+class RequestLatencyMiddleware:
+    """Rota şablonu (/status/{job_id}) bazında gecikme; SSE gibi uzun
+    akışlarda süre, yanıt başlığı gönderilene kadar ölçülür"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: int):
+            nonlocal observed
+            observed = True
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and not observed:
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not observed:
+                observe(500)
+
+
+class _Snapshot:
+    """Bir kez toplanmış metrikleri generate_latest'e vermek için"""
+
+    def __init__(self, families: List[Metric]):
+        self.families = families
+
+    def collect(self) -> Iterable[Metric]:
+        return iter(self.families)
+
+
+def _cache_ratios(families: List[Metric]) -> GaugeMetricFamily:
+    totals: Dict[str, Dict[str, float]] = {}
+    for family in families:
+        if family.name != "linkcim_cache_lookups":
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_total"):
+                counts = totals.setdefault(sample.labels["cache"], {})
+                counts[sample.labels["result"]] = counts.get(sample.labels["result"], 0) + sample.value
+    ratio = GaugeMetricFamily("linkcim_cache_hit_ratio", "Önbellek isabet oranı (hit + coalesced) / toplam",
+                              labels=["cache"])
+    for cache, counts in sorted(totals.items()):
+        lookups = sum(counts.values())
+        hits = counts.get("hit", 0) + counts.get("coalesced", 0)
+        ratio.add_metric([cache], hits / lookups if lookups else 0.0)
+    return ratio
+
+
+def _state_families(state: Dict[str, Any]) -> List[Metric]:
+    queue_depth = GaugeMetricFamily("linkcim_queue_depth", "Kuyrukta bekleyen iş sayısı")
+    queue_depth.add_metric([], state["queue_depth"])
+    max_workers = GaugeMetricFamily("linkcim_max_workers", "Süreç başına indirme worker sayısı")
+    max_workers.add_metric([], state["max_workers"])
+    jobs = GaugeMetricFamily("linkcim_jobs", "Duruma göre iş sayısı", labels=["status"])
+    for status, count in sorted(state["jobs"].items()):
+        jobs.add_metric([status], count)
+    uptime = GaugeMetricFamily("linkcim_uptime_seconds", "Bu API sürecinin çalışma süresi")
+    uptime.add_metric([], state["uptime"])
+    http_requests = GaugeMetricFamily("linkcim_http_pool_requests", "Paylaşılan havuzlardan yapılan HTTP istekleri",
+                                      labels=["platform"])
+    http_connections = GaugeMetricFamily("linkcim_http_pool_new_connections", "Açılan yeni HTTP bağlantıları",
+                                         labels=["platform"])
+    for platform, pool in state["http_pools"].items():
+        http_requests.add_metric([platform], pool["requests"])
+        http_connections.add_metric([platform], pool["new_connections"])
+    startup = GaugeMetricFamily("linkcim_startup_seconds",
+                                "Açılış aşamalarının süresi (import, startup, serving, engine_load, extractor_warm, ready)",
+                                labels=["phase"])
+    for phase, seconds in state["startup"].items():
+        startup.add_metric([phase], seconds)
+    return [queue_depth, max_workers, jobs, uptime, http_requests, http_connections, startup]
+
+
+def render_metrics(state: Callable[[], Dict[str, Any]]) -> Tuple[bytes, str]:
+    """Prometheus metin biçimi; state() kuyruk/iş sayılarını anlık döndürür"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    families = list(registry.collect())
+    families.append(_cache_ratios(families))
+    families.extend(_state_families(state()))
+    return generate_latest(_Snapshot(families)), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    """Süreç kapanırken livesum gauge'larını bırak (multiprocess)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
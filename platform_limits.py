@@ -0,0 +1,305 @@
+"""
+Platform başına hız sınırı, yeniden deneme ve devre kesici.
+
+Instagram/TikTok gibi platformlar 429 veya giriş duvarı döndürmeye
+başladığında o platformun kuyruktaki her işi yavaşça başarısız olur ve
+worker'ları meşgul eder. Bu modül, get_platform_from_url anahtarıyla:
+
+  * Token bucket: dakikadaki sayfa çıkarma (extraction) sayısını sınırlar
+  * Eş zamanlı çıkarma sınırı: aynı anda en fazla N çıkarma
+  * Devre kesici: son isteklerde hata oranı eşiği aşınca platform bir süre
+    kapatılır (istekler beklemeden reddedilir); süre dolunca tek deneme
+    isteğine izin verilir, başarılıysa devre kapanır
+  * Geçici hatalar (429, 5xx, zaman aşımı) için üstel bekleme + jitter
+
+Limitler süreç başınadır (uvicorn --workers N ile N katı).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+# platform -> (dakikada çıkarma, eş zamanlı çıkarma)
+DEFAULT_LIMITS: Dict[str, Tuple[float, int]] = {
+    "youtube": (60, 4),
+    "instagram": (12, 2),
+    "tiktok": (20, 2),
+    "twitter": (30, 3),
+    "facebook": (20, 2),
+    "unknown": (120, 8),
+}
+
+# yt-dlp hata metinlerinde aranır (küçük harf)
+TRANSIENT_MARKERS = (
+    "http error 429", "too many requests", "rate-limit", "rate limit",
+    "http error 500", "http error 502", "http error 503", "http error 504",
+    "timed out", "timeout", "connection reset", "connection refused",
+    "remote end closed", "temporarily unavailable", "temporary failure",
+)
+# Platformun istekleri engellediğini gösterir; yeniden denemek işe yaramaz
+BLOCKED_MARKERS = (
+    "login required", "log in", "sign in to confirm", "checkpoint_required",
+    "use --cookies", "not a bot",
+)
+
+
+class PlatformUnavailable(Exception):
+    """Devre açık: platform geçici olarak devre dışı"""
+
+    def __init__(self, platform: str, retry_after: float):
+        super().__init__(f"{platform} geçici olarak devre dışı (çok fazla hata), "
+                         f"{retry_after:.0f} sn sonra tekrar deneyin")
+        self.platform = platform
+        self.retry_after = retry_after
+
+
+class RateLimited(Exception):
+    """Hız sınırı nedeniyle çıkarma izni süresinde alınamadı"""
+
+    def __init__(self, platform: str, retry_after: float):
+        super().__init__(f"{platform} hız sınırına takıldı")
+        self.platform = platform
+        self.retry_after = retry_after
+
+
+def parse_limits(value: str) -> Dict[str, Tuple[float, int]]:
+    """'instagram=10/2,tiktok=15/2' -> varsayılanların üzerine yazılmış limitler"""
+    limits = dict(DEFAULT_LIMITS)
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        platform, _, spec = entry.partition("=")
+        per_minute, _, concurrent = spec.partition("/")
+        try:
+            default_rate, default_concurrent = limits.get(platform.strip(), DEFAULT_LIMITS["unknown"])
+            limits[platform.strip()] = (
+                float(per_minute) if per_minute else default_rate,
+                int(concurrent) if concurrent else default_concurrent,
+            )
+        except ValueError:
+            raise ValueError(f"PLATFORM_LIMITS geçersiz kayıt: {entry}")
+    return limits
+
+
+def classify_error(error: BaseException) -> str:
+    """'limited', 'unavailable', 'transient', 'blocked' veya 'permanent'"""
+    if isinstance(error, RateLimited):
+        return "limited"
+    if isinstance(error, PlatformUnavailable):
+        return "unavailable"
+    if isinstance(error, TimeoutError):
+        # Çıkarma süreci zaman aşımı (extractor_pool)
+        return "transient"
+    message = str(error).lower()
+    if any(marker in message for marker in BLOCKED_MARKERS):
+        return "blocked"
+    if any(marker in message for marker in TRANSIENT_MARKERS):
+        return "transient"
+    return "permanent"
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Üstel bekleme, yarısı rastgele (equal jitter): aynı anda düşen işler dağılır"""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        # En fazla ~10 saniyelik patlama
+        self.capacity = max(1.0, per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0 if self.tokens >= 1 else float("inf")
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class CircuitBreaker:
+    """Kayan pencerede hata oranı eşiği aşınca açılan devre"""
+
+    def __init__(self, threshold: float, min_requests: int, window: float, cooldown: float):
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.outcomes: Deque[Tuple[float, bool]] = deque()
+        self.opened_count = 0
+
+    def _trim(self, now: float):
+        while self.outcomes and self.outcomes[0][0] < now - self.window:
+            self.outcomes.popleft()
+
+    def error_rate(self, now: float) -> float:
+        self._trim(now)
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def retry_after(self, now: float) -> Optional[float]:
+        """İstek reddedilecekse kalan süre, geçebilecekse None"""
+        if self.state == "open":
+            remaining = self.opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self.state = "half_open"
+            self.trial_running = False
+        if self.state == "half_open" and self.trial_running:
+            # Deneme isteğinin sonucu bekleniyor
+            return max(1.0, self.cooldown / 10)
+        return None
+
+    def begin(self, now: float):
+        if self.state == "half_open":
+            self.trial_running = True
+
+    def abandon(self):
+        """Deneme isteği sonuçsuz bitti (iptal); sıradaki istek yeniden deneyebilir"""
+        if self.state == "half_open":
+            self.trial_running = False
+
+    def record(self, ok: bool, now: float):
+        if self.state == "half_open":
+            self.trial_running = False
+            if ok:
+                self.state = "closed"
+                self.outcomes.clear()
+            else:
+                self._open(now)
+            return
+        self.outcomes.append((now, ok))
+        self._trim(now)
+        if (self.state == "closed" and len(self.outcomes) >= self.min_requests
+                and self.error_rate(now) >= self.threshold):
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened_at = now
+        self.opened_count += 1
+        self.outcomes.clear()
+
+
+class PlatformGuard:
+    """Platform başına token bucket, eş zamanlılık sınırı ve devre kesici"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]], *, error_threshold: float = 0.5,
+                 min_requests: int = 5, window: float = 300, cooldown: float = 60):
+        self.limits = limits
+        self._breaker_settings = (error_threshold, min_requests, window, cooldown)
+        self._cond = threading.Condition()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._active: Dict[str, int] = {}
+
+    def _limits_for(self, platform: str) -> Tuple[float, int]:
+        return self.limits.get(platform) or self.limits.get("unknown") or DEFAULT_LIMITS["unknown"]
+
+    def _bucket(self, platform: str) -> TokenBucket:
+        bucket = self._buckets.get(platform)
+        if bucket is None:
+            bucket = self._buckets[platform] = TokenBucket(self._limits_for(platform)[0])
+        return bucket
+
+    def _breaker(self, platform: str) -> CircuitBreaker:
+        breaker = self._breakers.get(platform)
+        if breaker is None:
+            breaker = self._breakers[platform] = CircuitBreaker(*self._breaker_settings)
+        return breaker
+
+    def _wait_time(self, platform: str, now: float) -> float:
+        """Çıkarma izni için beklenecek süre (devre açıksa PlatformUnavailable)"""
+        retry_after = self._breaker(platform).retry_after(now)
+        if retry_after is not None:
+            raise PlatformUnavailable(platform, retry_after)
+        if self._active.get(platform, 0) >= self._limits_for(platform)[1]:
+            # Süren bir çıkarmanın bitmesi beklenir
+            return max(0.5, 60.0 / max(self._limits_for(platform)[0], 1))
+        return self._bucket(platform).wait_time(now)
+
+    def check(self, platform: str) -> float:
+        """İzin tüketmeden: şimdi çıkarma yapılabilir mi (0) ya da kaç sn sonra"""
+        with self._cond:
+            return self._wait_time(platform, time.monotonic())
+
+    def ensure_available(self, platform: str):
+        """Devre açıksa PlatformUnavailable"""
+        with self._cond:
+            retry_after = self._breaker(platform).retry_after(time.monotonic())
+        if retry_after is not None:
+            raise PlatformUnavailable(platform, retry_after)
+
+    @contextmanager
+    def extraction(self, platform: str, timeout: float) -> Iterator[None]:
+        """Token ve eş zamanlılık izni al; süresinde alınamazsa RateLimited"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(platform, now)
+                if wait <= 0:
+                    break
+                if now + wait > deadline:
+                    raise RateLimited(platform, wait)
+                self._cond.wait(wait)
+            self._bucket(platform).take()
+            self._breaker(platform).begin(now)
+            self._active[platform] = self._active.get(platform, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active[platform] -= 1
+                self._cond.notify_all()
+
+    def record(self, platform: str, error: Optional[BaseException] = None) -> str:
+        """İşlem sonucunu devre kesiciye bildir; hatanın sınıfını döndür"""
+        kind = "ok" if error is None else classify_error(error)
+        if kind in ("ok", "transient", "blocked"):
+            with self._cond:
+                self._breaker(platform).record(kind == "ok", time.monotonic())
+        return kind
+
+    def abandon(self, platform: str):
+        """Sonucu bildirilmeyecek çıkarma (iş iptal edildi)"""
+        with self._cond:
+            self._breaker(platform).abandon()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """/health ve /platforms için platform durumları"""
+        now = time.monotonic()
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._cond:
+            for platform in sorted(set(self.limits) | set(self._breakers)):
+                breaker = self._breaker(platform)
+                bucket = self._bucket(platform)
+                bucket.wait_time(now)
+                retry_after = breaker.retry_after(now)
+                per_minute, concurrent = self._limits_for(platform)
+                result[platform] = {
+                    "state": breaker.state,
+                    "retry_after": round(retry_after, 1) if retry_after is not None else None,
+                    "error_rate": round(breaker.error_rate(now), 3),
+                    "recent_requests": len(breaker.outcomes),
+                    "times_opened": breaker.opened_count,
+                    "rate_per_minute": per_minute,
+                    "max_concurrent": concurrent,
+                    "active_extractions": self._active.get(platform, 0),
+                    "tokens": round(bucket.tokens, 2),
+                }
+        return result
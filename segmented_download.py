@@ -0,0 +1,262 @@
+"""
+Büyük tek dosyalık medya için çok bağlantılı (segmentli) HTTP indirme.
+
+Boyutu bilinen ve Range destekleyen doğrudan (http/https) formatlar bayt
+aralıklarına bölünür; aralıklar paralel bağlantılarla çekilip önceden
+ayrılmış .part dosyasında kendi konumlarına yazılır. Böylece kaynağın
+bağlantı başına hız sınırı (Facebook, Twitter, YouTube progressive) aşılır.
+
+Her aralık ayrı ayrı yeniden denenir; kopan bağlantı yalnızca kendi
+aralığının kalanını yeniden ister. Tamamlanan aralıklar yan dosyada
+(<dosya>.part.segments) tutulur, yarıda kalan indirme yeniden başladığında
+yalnızca eksik aralıklar çekilir. Uygun olmayan indirmeler (boyut bilinmiyor,
+Range yok, dosya küçük) yt-dlp'nin normal HttpFD yoluna düşer.
+
+yt-dlp seçenekleri (get_ydl_options):
+    segmented_connections:  Paralel bağlantı sayısı (1 = kapalı)
+    segmented_min_size:     Bu boyutun altındaki dosyalar tek bağlantıyla iner
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Set, Tuple
+
+import yt_dlp
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import HTTPError, RequestError
+from yt_dlp.utils import ContentTooShortError, DownloadCancelled, DownloadError, RetryManager
+from yt_dlp.utils.networking import HTTPHeaderDict
+
+# Aralık boyutu: bağlantı başına ~4 aralık, 1 MB ile 16 MB arasında
+MIN_SEGMENT_BYTES = 1024 * 1024
+MAX_SEGMENT_BYTES = 16 * 1024 * 1024
+SEGMENTS_PER_CONNECTION = 4
+READ_SIZE = 256 * 1024
+PROGRESS_INTERVAL = 0.5
+# Bu HTTP hataları aralık yeniden denenerek düzelebilir
+RETRYABLE_HTTP_STATUSES = {408, 429}
+
+
+class DownloadAborted(DownloadCancelled):
+    """İş silindi; ilerleme/son işlem kancalarından fırlatılır. yt-dlp aralık,
+    parça ve son işlem adımları arasında bu hatayla çıkar"""
+    msg = "İndirme iptal edildi"
+
+
+class RangeNotHonored(Exception):
+    """Kaynak aralık isteğine tam dosyayla (200) yanıt verdi"""
+
+
+class _Cancelled(Exception):
+    """Başka bir aralık kalıcı olarak başarısız oldu; kalanlar durur"""
+
+
+class _Progress:
+    """Aralık thread'lerinin ortak ilerleme sayacı"""
+
+    def __init__(self, total: int, resumed: int):
+        self.lock = threading.Lock()
+        self.total = total
+        self.resumed = resumed
+        self.downloaded = resumed
+        self.started = time.time()
+        self.last_report = 0.0
+
+    def add(self, count: int):
+        with self.lock:
+            self.downloaded += count
+
+
+class SegmentedHttpFD(HttpFD):
+    """Range destekleyen doğrudan indirmeleri paralel aralıklarla yapan HttpFD"""
+
+    def real_download(self, filename, info_dict):
+        connections = int(self.params.get("segmented_connections") or 1)
+        min_size = int(self.params.get("segmented_min_size") or 0)
+        headers = HTTPHeaderDict({"Accept-Encoding": "identity"}, info_dict.get("http_headers"))
+        known_size = info_dict.get("filesize") or info_dict.get("filesize_approx")
+        eligible = (
+            connections > 1
+            and not self.params.get("test")
+            and info_dict.get("protocol") in ("http", "https")
+            and not info_dict.get("request_data")
+            and "Range" not in headers
+            # Boyutu bildirilmiş ve küçükse yoklama isteğine gerek yok
+            and not (known_size and known_size < min_size)
+        )
+        if eligible:
+            size = self._probe_size(info_dict["url"], headers)
+            if size and size >= max(min_size, 2 * MIN_SEGMENT_BYTES):
+                return self._segmented_download(filename, info_dict, headers, size, connections)
+        return super().real_download(filename, info_dict)
+
+    def _probe_size(self, url: str, headers: HTTPHeaderDict) -> Optional[int]:
+        """'Range: bytes=0-0' ile Range desteğini ve toplam boyutu öğren"""
+        try:
+            with self.ydl.urlopen(Request(url, None, HTTPHeaderDict(headers, {"Range": "bytes=0-0"}))) as response:
+                content_range = response.headers.get("Content-Range") or ""
+                if response.status != 206 or not content_range.startswith("bytes 0-0/"):
+                    return None
+                total = content_range.rpartition("/")[2]
+                return int(total) if total.isdigit() else None
+        except (RequestError, ValueError):
+            # Hata yönetimini normal HttpFD yolu yapsın
+            return None
+
+    def _segment_ranges(self, size: int, connections: int, info_dict) -> List[Tuple[int, int]]:
+        piece = -(-size // (connections * SEGMENTS_PER_CONNECTION))
+        # Bazı kaynaklar (YouTube) büyük aralıkları kısıtlar; format bir sınır bildiriyorsa uy
+        limit = (info_dict.get("downloader_options") or {}).get("http_chunk_size") or MAX_SEGMENT_BYTES
+        piece = max(MIN_SEGMENT_BYTES, min(piece, limit, MAX_SEGMENT_BYTES))
+        return [(start, min(start + piece, size) - 1) for start in range(0, size, piece)]
+
+    @staticmethod
+    def _load_state(state_path: str, size: int, ranges: List[Tuple[int, int]]) -> Set[int]:
+        """Önceki denemede tamamlanan aralıklar (boyut/bölümleme değiştiyse hiçbiri)"""
+        try:
+            with open(state_path, encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return set()
+        if state.get("size") != size or state.get("ranges") != [list(r) for r in ranges]:
+            return set()
+        return {index for index in state.get("done", []) if 0 <= index < len(ranges)}
+
+    @staticmethod
+    def _save_state(state_path: str, size: int, ranges: List[Tuple[int, int]], done: Set[int]):
+        with open(state_path, "w", encoding="utf-8") as file:
+            json.dump({"size": size, "ranges": ranges, "done": sorted(done)}, file)
+
+    def _segmented_download(self, filename, info_dict, headers, size: int, connections: int) -> bool:
+        tmpfilename = self.temp_name(filename)
+        state_path = f"{tmpfilename}.segments"
+        ranges = self._segment_ranges(size, connections, info_dict)
+        done: Set[int] = set()
+        if self.params.get("continuedl", True) and os.path.exists(tmpfilename):
+            done = self._load_state(state_path, size, ranges)
+        # Dosya sırayla yazılmadığı için indirme sürerken okunamaz (/stream)
+        info_dict["segmented"] = True
+
+        self.report_destination(filename)
+        self.to_screen(f"[download] {len(ranges)} aralık, {connections} bağlantı"
+                       + (f" ({len(done)} aralık önceki denemeden)" if done else ""))
+        # Önceden ayır: aralıklar dosyanın herhangi bir konumuna yazılabilsin
+        with open(tmpfilename, "r+b" if os.path.exists(tmpfilename) else "w+b") as file:
+            if not done or os.fstat(file.fileno()).st_size != size:
+                done = set()
+                file.truncate(size)
+
+        progress = _Progress(size, sum(ranges[i][1] - ranges[i][0] + 1 for i in done))
+        self._report_progress(progress, filename, tmpfilename, info_dict, force=True)
+        cancel = threading.Event()
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="segment") as pool:
+            futures = [
+                pool.submit(self._fetch_range, tmpfilename, info_dict["url"], headers, index, start, end,
+                            progress, cancel, filename, info_dict)
+                for index, (start, end) in enumerate(ranges) if index not in done
+            ]
+            try:
+                for future in as_completed(futures):
+                    done.add(future.result())
+                    self._save_state(state_path, size, ranges, done)
+            except BaseException:
+                cancel.set()
+                raise
+
+        try:
+            os.remove(state_path)
+        except FileNotFoundError:
+            pass
+        self.try_rename(tmpfilename, filename)
+        elapsed = time.time() - progress.started
+        self._hook_progress({
+            "status": "finished",
+            "downloaded_bytes": size,
+            "total_bytes": size,
+            "filename": filename,
+            "elapsed": elapsed,
+            "ctx_id": info_dict.get("ctx_id"),
+        }, info_dict)
+        return True
+
+    def _fetch_range(self, tmpfilename, url, headers, index: int, start: int, end: int,
+                     progress: _Progress, cancel: threading.Event, filename, info_dict) -> int:
+        """Tek aralığı indir; bağlantı koparsa kaldığı yerden yeniden dene"""
+        position = start
+        retries = self.params.get("fragment_retries", 10)
+        with open(tmpfilename, "r+b") as file:
+            for retry in RetryManager(retries, self.report_retry, frag_index=index + 1):
+                try:
+                    request = Request(url, None, HTTPHeaderDict(headers, {"Range": f"bytes={position}-{end}"}))
+                    with self.ydl.urlopen(request) as response:
+                        if response.status != 206:
+                            raise RangeNotHonored(f"Aralık isteğine {response.status} yanıtı geldi")
+                        file.seek(position)
+                        while position <= end:
+                            if cancel.is_set():
+                                raise _Cancelled()
+                            chunk = response.read(min(READ_SIZE, end - position + 1))
+                            if not chunk:
+                                raise ContentTooShortError(position - start, end - start + 1)
+                            file.write(chunk)
+                            position += len(chunk)
+                            progress.add(len(chunk))
+                            self._report_progress(progress, filename, tmpfilename, info_dict)
+                    file.flush()
+                    return index
+                except HTTPError as err:
+                    if err.status < 500 and err.status not in RETRYABLE_HTTP_STATUSES:
+                        raise
+                    retry.error = err
+                except (RequestError, ContentTooShortError) as err:
+                    retry.error = err
+        # ignoreerrors açıkken report_retry hata fırlatmaz
+        raise DownloadError(f"Aralık {index + 1} indirilemedi ({start}-{end})")
+
+    def _report_progress(self, progress: _Progress, filename, tmpfilename, info_dict, force: bool = False):
+        """Aralık thread'lerinden gelen ilerlemeyi seyrelterek tek kanaldan bildir"""
+        with progress.lock:
+            now = time.time()
+            if not force and now - progress.last_report < PROGRESS_INTERVAL:
+                return
+            progress.last_report = now
+            downloaded = progress.downloaded
+            elapsed = now - progress.started
+            speed = self.calc_speed(progress.started, now, downloaded - progress.resumed)
+            self._hook_progress({
+                "status": "downloading",
+                "downloaded_bytes": downloaded,
+                "total_bytes": progress.total,
+                "tmpfilename": tmpfilename,
+                "filename": filename,
+                "eta": self.calc_eta(speed, progress.total - downloaded),
+                "speed": speed,
+                "elapsed": elapsed,
+                "ctx_id": info_dict.get("ctx_id"),
+            }, info_dict)
+
+
+class SegmentedYoutubeDL(yt_dlp.YoutubeDL):
+    """Doğrudan HTTP formatlarını SegmentedHttpFD ile indiren YoutubeDL.
+
+    HLS/DASH gibi parçalı protokoller yt-dlp'nin kendi indiricilerinde kalır;
+    onların paralelliği concurrent_fragment_downloads ile ayarlanır.
+    """
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if test or subtitle or name == "-" or not info.get("url"):
+            return super().dl(name, info, subtitle, test)
+        if get_suitable_downloader(info, self.params) is not HttpFD:
+            return super().dl(name, info, subtitle, test)
+        fd = SegmentedHttpFD(self, self.params)
+        for hook in self._progress_hooks:
+            fd.add_progress_hook(hook)
+        new_info = self._copy_infodict(info)
+        if new_info.get("http_headers") is None:
+            new_info["http_headers"] = self._calc_headers(new_info)
+        return fd.download(name, new_info, subtitle)
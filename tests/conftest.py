@@ -0,0 +1,30 @@
+"""
+Testler depo kökündeki modülleri (api.py'nin yanındaki yardımcılar) doğrudan
+içe aktarır; pytest hangi klasörden çalıştırılırsa çalıştırılsın kök sys.path'te olsun.
+"""
+
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """api modülü geçici klasörde, bellek deposuyla içe aktarılır (downloads/ orada oluşur)"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("api"))
+    previous = os.environ.get("JOB_STORE")
+    os.environ["JOB_STORE"] = "memory"
+    try:
+        yield importlib.import_module("api")
+    finally:
+        os.chdir(cwd)
+        if previous is None:
+            os.environ.pop("JOB_STORE", None)
+        else:
+            os.environ["JOB_STORE"] = previous
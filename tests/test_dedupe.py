@@ -0,0 +1,105 @@
+import itertools
+
+import pytest
+
+counter = itertools.count()
+
+
+@pytest.fixture
+def submit(api):
+    """Aynı içerik için iş oluşturan fonksiyon (her testte farklı URL)"""
+    url = f"https://www.youtube.com/watch?v=dedupe{next(counter)}"
+
+    def submit():
+        job_id, job, _ = api.submit_job(url, "mp4", "high", "youtube", ("test", 1.0), api.DEFAULT_PRIORITY)
+        return job_id, job
+
+    return submit
+
+
+def complete(api, job_id, body=b"video"):
+    directory = api.job_dir(job_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    media = directory / f"{job_id}.mp4"
+    media.write_bytes(body)
+    api.update_job(job_id, {"status": "completed", "progress": 100, "file_path": str(media),
+                            "file_size": len(body)})
+    return media
+
+
+def test_repeat_request_follows_running_holder(api, submit):
+    holder_id, _ = submit()
+    follower_id, follower = submit()
+    assert follower["source_job"] == holder_id
+    assert follower["deduplicated"] is True
+    assert api.job_refs(holder_id) == {holder_id, follower_id}
+    # Sahibin ilerlemesi bağlı işe yansır, kimlik alanları yansımaz
+    api.update_job(holder_id, {"status": "downloading", "progress": 40, "client": "other"})
+    assert api.jobs[follower_id]["progress"] == 40
+    assert api.jobs[follower_id]["client"] == "test"
+
+
+def test_repeat_request_reuses_completed_file(api, submit):
+    holder_id, _ = submit()
+    media = complete(api, holder_id)
+    follower_id, follower = submit()
+    assert follower["source_job"] == holder_id
+    assert follower["status"] == "completed"
+    assert follower["file_path"] == str(media)
+
+
+def test_missing_or_failed_holder_is_not_reused(api, submit):
+    holder_id, _ = submit()
+    complete(api, holder_id).unlink()
+    second_id, second = submit()
+    assert "source_job" not in second
+    api.update_job(second_id, {"status": "failed"})
+    third_id, third = submit()
+    assert "source_job" not in third
+    assert api.find_reusable_job(api.content_keys_for(third["url"], "mp4", "high"))[0] == third_id
+
+
+def test_deleting_follower_keeps_holder_file(api, submit):
+    holder_id, _ = submit()
+    media = complete(api, holder_id)
+    follower_id, follower = submit()
+    api.purge_job(follower_id, follower)
+    assert api.get_job(follower_id) is None
+    assert api.job_refs(holder_id) == {holder_id}
+    assert media.exists()
+    assert api.get_job(holder_id)["status"] == "completed"
+
+
+def test_deleting_holder_with_followers_detaches_it(api, submit):
+    holder_id, holder = submit()
+    media = complete(api, holder_id)
+    first_id, first = submit()
+    second_id, second = submit()
+
+    api.purge_job(holder_id, holder)
+    # Sahip kaydı gizlenir; dosya bağlı işler için kalır
+    assert api.get_job(holder_id) is None
+    assert api.jobs[holder_id]["detached"] is True
+    assert media.exists()
+    assert api.get_job(first_id)["file_path"] == str(media)
+
+    api.purge_job(first_id, first)
+    assert media.exists()
+
+    # Son referans: dosya, gizlenmiş sahip kaydı ve içerik anahtarları silinir
+    api.purge_job(second_id, second)
+    assert not media.exists()
+    assert not api.job_dir(holder_id).exists()
+    assert holder_id not in api.jobs
+    assert holder_id not in api.content_index.values()
+    assert holder_id not in api.file_refs
+    new_id, new = submit()
+    assert "source_job" not in new
+
+
+def test_deleting_only_holder_removes_files(api, submit):
+    holder_id, holder = submit()
+    media = complete(api, holder_id)
+    assert api.purge_job(holder_id, holder) == len(b"video")
+    assert not media.exists()
+    assert holder_id not in api.jobs
@@ -0,0 +1,93 @@
+from fair_queue import FairQueue
+
+
+def drain(queue: FairQueue):
+    order = []
+    while True:
+        item = queue.pop()
+        if item is None:
+            return order
+        order.append(item)
+
+
+def test_single_client_is_fifo_within_priority():
+    queue = FairQueue()
+    for item in ("a", "b", "c"):
+        queue.push(item, "mobil")
+    assert drain(queue) == ["a", "b", "c"]
+    assert queue.pop() is None
+    assert len(queue) == 0
+
+
+def test_priority_orders_within_client():
+    queue = FairQueue()
+    queue.push("low", "mobil", priority="low")
+    queue.push("normal", "mobil")
+    queue.push("high", "mobil", priority="high")
+    # Bilinmeyen öncelik normal sayılır
+    queue.push("unknown", "mobil", priority="urgent")
+    assert drain(queue) == ["high", "normal", "unknown", "low"]
+
+
+def test_client_with_many_jobs_does_not_starve_others():
+    queue = FairQueue()
+    for index in range(50):
+        queue.push(f"bulk-{index}", "partner")
+    queue.push("single", "mobil")
+    order = drain(queue)
+    assert order.index("single") <= 1
+    assert [item for item in order if item.startswith("bulk")] == [f"bulk-{index}" for index in range(50)]
+
+
+def test_weight_sets_share():
+    queue = FairQueue()
+    for index in range(6):
+        queue.push(f"heavy-{index}", "heavy", weight=2)
+        queue.push(f"light-{index}", "light", weight=1)
+    first = drain(queue)[:6]
+    assert sum(item.startswith("heavy") for item in first) == 4
+    assert sum(item.startswith("light") for item in first) == 2
+
+
+def test_position_matches_pop_order():
+    queue = FairQueue()
+    for index in range(4):
+        queue.push(f"a-{index}", "a")
+    queue.push("b-0", "b", priority="low")
+    queue.push("b-1", "b", priority="high")
+    queue.push("c-0", "c", weight=3)
+    expected = {item: queue.position(item) for item in list(queue._owners)}
+    order = drain(queue)
+    assert {item: index + 1 for index, item in enumerate(order)} == expected
+
+
+def test_position_updates_after_remove_and_pop():
+    queue = FairQueue()
+    for item in ("a", "b", "c"):
+        queue.push(item, "mobil")
+    assert queue.position("c") == 3
+    assert queue.remove("b") is True
+    assert queue.remove("b") is False
+    assert "b" not in queue
+    assert queue.position("b") is None
+    assert queue.position("c") == 2
+    assert queue.pop() == "a"
+    assert queue.position("c") == 1
+    assert queue.position("missing") is None
+
+
+def test_idle_client_does_not_bank_credit():
+    queue = FairQueue()
+    # "a" tek başına uzun süre çalışır; "b" sonradan gelince birikmiş hakla
+    # a'nın önüne art arda geçmez, sırayla paylaşırlar
+    for index in range(10):
+        queue.push(f"a-{index}", "a")
+    for _ in range(8):
+        queue.pop()
+    for index in range(4):
+        queue.push(f"a-late-{index}", "a")
+        queue.push(f"b-{index}", "b")
+    order = drain(queue)
+    b_positions = [index for index, item in enumerate(order) if item.startswith("b")]
+    assert b_positions == sorted(b_positions)
+    assert max(b_positions) - min(b_positions) >= len(b_positions)
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from job_store import MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemoryJobStore() if request.param == "memory" else SQLiteJobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
+
+
+def claim(store, key, job_id, fingerprint="f1", ttl=60.0):
+    return store.claim_idempotency_key(key, job_id, fingerprint, time.time() + ttl)[:2]
+
+
+def test_first_claim_wins_and_replays(store):
+    assert claim(store, "mobil:k1", "job-a") == ("job-a", "f1")
+    # Tekrar istek: sahip ve ilk isteğin parmak izi döner (anahtar devralınmaz)
+    assert claim(store, "mobil:k1", "job-b", fingerprint="f2") == ("job-a", "f1")
+    assert claim(store, "partner:k1", "job-c") == ("job-c", "f1")
+
+
+def test_expired_key_is_taken_over(store):
+    claim(store, "mobil:k1", "job-a", ttl=-1)
+    assert claim(store, "mobil:k1", "job-b") == ("job-b", "f1")
+
+
+def test_release_frees_only_that_jobs_keys(store):
+    claim(store, "mobil:k1", "job-a")
+    claim(store, "mobil:k2", "job-a")
+    claim(store, "mobil:k3", "job-b")
+    store.release_idempotency_keys("job-a")
+    assert claim(store, "mobil:k1", "job-c") == ("job-c", "f1")
+    assert claim(store, "mobil:k2", "job-c") == ("job-c", "f1")
+    assert claim(store, "mobil:k3", "job-c") == ("job-b", "f1")
+
+
+def test_expire_removes_only_expired(store):
+    claim(store, "old", "job-a", ttl=-1)
+    claim(store, "new", "job-b")
+    assert store.expire_idempotency_keys(time.time()) == 1
+    assert claim(store, "new", "job-c") == ("job-b", "f1")
+
+
+def test_concurrent_claims_have_one_winner(store):
+    owners = []
+    barrier = threading.Barrier(8)
+
+    def worker(index):
+        barrier.wait()
+        owners.append(claim(store, "mobil:k1", f"job-{index}")[0])
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(owners)) == 1
+
+
+def test_sqlite_claim_is_shared_between_connections(tmp_path):
+    first, second = SQLiteJobStore(tmp_path / "jobs.db"), SQLiteJobStore(tmp_path / "jobs.db")
+    try:
+        assert claim(first, "mobil:k1", "job-a") == ("job-a", "f1")
+        assert claim(second, "mobil:k1", "job-b") == ("job-a", "f1")
+        second.release_idempotency_keys("job-a")
+        assert claim(first, "mobil:k1", "job-b") == ("job-b", "f1")
+    finally:
+        first.close()
+        second.close()
+
+
+# --- POST /download birleştirme (api.claim_idempotency_key) ---
+def add_job(api, job_id):
+    api.jobs[job_id] = api.new_job("https://example.com/v", "mp4", "best", "unknown")
+
+
+def test_replay_returns_existing_job(api):
+    assert asyncio.run(api.claim_idempotency_key("mobil:replay", "job-1", "f")) is None
+    add_job(api, "job-1")
+    owner_id, owner = asyncio.run(api.claim_idempotency_key("mobil:replay", "job-2", "f"))
+    assert owner_id == "job-1"
+    assert owner["status"] == "queued"
+
+
+def test_reused_key_with_different_body_is_rejected(api):
+    asyncio.run(api.claim_idempotency_key("mobil:conflict", "job-3", "f"))
+    add_job(api, "job-3")
+    with pytest.raises(api.HTTPException) as error:
+        asyncio.run(api.claim_idempotency_key("mobil:conflict", "job-4", "other"))
+    assert error.value.status_code == 422
+
+
+def test_concurrent_request_waits_for_first(api):
+    async def scenario():
+        assert await api.claim_idempotency_key("mobil:wait", "job-5", "f") is None
+        waiting = asyncio.create_task(api.claim_idempotency_key("mobil:wait", "job-6", "f"))
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+        add_job(api, "job-5")
+        return await waiting
+
+    owner_id, _ = asyncio.run(scenario())
+    assert owner_id == "job-5"
+
+
+def test_waiter_takes_over_when_first_request_fails(api):
+    async def scenario():
+        await api.claim_idempotency_key("mobil:fail", "job-7", "f")
+        waiting = asyncio.create_task(api.claim_idempotency_key("mobil:fail", "job-8", "f"))
+        await asyncio.sleep(0.1)
+        api.job_store.release_idempotency_keys("job-7")
+        return await waiting
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_stale_reservation_is_released(api, monkeypatch):
+    monkeypatch.setattr(api, "IDEMPOTENCY_WAIT", 0.2)
+    asyncio.run(api.claim_idempotency_key("mobil:stale", "job-9", "f"))
+    started = time.monotonic()
+    assert asyncio.run(api.claim_idempotency_key("mobil:stale", "job-10", "f")) is None
+    assert time.monotonic() - started < 2
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from job_store import SQLiteJobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteJobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
+
+
+def queue(store, job_id, queued_at, **fields):
+    job = {"status": "queued", "created_at": queued_at, "queued_at": queued_at,
+           "client": "mobil", "priority": "normal", "version": 1, **fields}
+    store.insert(job_id, job)
+
+
+def drain(store, owner="w1"):
+    claimed = []
+    while True:
+        result = store.claim_next(owner)
+        if result is None:
+            return claimed
+        claimed.append(result[0])
+
+
+def test_claim_order_priority_then_arrival(store):
+    queue(store, "b", 2)
+    queue(store, "a", 1)
+    queue(store, "low", 0, priority="low")
+    queue(store, "high", 3, priority="high")
+    assert drain(store) == ["high", "a", "b", "low"]
+
+
+def test_claim_prefers_client_with_smaller_share(store):
+    queue(store, "m1", 1)
+    queue(store, "m2", 2)
+    queue(store, "p1", 3, client="partner")
+    # m1 çalışırken mobil'in payı 1, partner'ın 0: p1 öne geçer
+    assert store.claim_next("w1")[0] == "m1"
+    assert store.claim_next("w1")[0] == "p1"
+    assert store.claim_next("w1")[0] == "m2"
+
+
+def test_claim_skips_deferred_jobs(store):
+    queue(store, "later", 1, not_before=time.time() + 60)
+    queue(store, "now", 2)
+    assert drain(store) == ["now"]
+    assert store.count_queued() == 1
+
+
+def test_claim_marks_starting_and_bumps_version(store):
+    queue(store, "a", 1)
+    job_id, job = store.claim_next("w1")
+    assert job["status"] == "starting"
+    assert job["version"] == 2
+    assert store.get("a")["status"] == "starting"
+    assert store.count_queued() == 0
+
+
+def test_claim_is_exclusive_across_processes(tmp_path):
+    stores = [SQLiteJobStore(tmp_path / "jobs.db") for _ in range(4)]
+    try:
+        for index in range(20):
+            queue(stores[0], f"job-{index}", index)
+        claimed = []
+        barrier = threading.Barrier(len(stores))
+
+        def worker(store, owner):
+            barrier.wait()
+            claimed.extend(drain(store, owner))
+
+        threads = [threading.Thread(target=worker, args=(store, f"w{index}"))
+                   for index, store in enumerate(stores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(claimed) == sorted(f"job-{index}" for index in range(20))
+    finally:
+        for store in stores:
+            store.close()
+
+
+def test_queue_position_follows_claim_order(store):
+    queue(store, "a", 1)
+    queue(store, "b", 2)
+    queue(store, "high", 3, priority="high")
+    assert [store.queue_position(job_id) for job_id in ("high", "a", "b")] == [1, 2, 3]
+    store.claim_next("w1")
+    assert store.queue_position("high") is None
+    assert store.queue_position("b") == 2
+
+
+def test_recover_orphans_requeues_jobs_of_dead_workers(store):
+    store.heartbeat("alive")
+    store.heartbeat("dead")
+    queue(store, "a", 1)
+    queue(store, "b", 2)
+    assert store.claim_next("alive")[0] == "a"
+    assert store.claim_next("dead")[0] == "b"
+    # dead süreci heartbeat göndermeyi bıraktı
+    store._query("UPDATE workers SET heartbeat = ? WHERE owner = 'dead'", (time.time() - 120,))
+    assert store.recover_orphans(stale_after=30) == 1
+    recovered = store.get("b")
+    assert recovered["status"] == "queued"
+    assert recovered["progress"] == 0
+    assert recovered["recovered"] is True
+    assert recovered["version"] == 3
+    assert store.get("a")["status"] == "starting"
+    assert store.claim_next("alive")[0] == "b"
+
+
+def test_recover_orphans_requeues_unregistered_and_ownerless(store):
+    store.heartbeat("w1")
+    queue(store, "a", 1)
+    store.claim_next("w1")
+    store.insert("b", {"status": "downloading", "created_at": 2, "version": 1})
+    store.unregister("w1")
+    assert store.recover_orphans(stale_after=30) == 2
+    assert drain(store) == ["a", "b"]
+    assert store.recover_orphans(stale_after=30) == 2
@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import pytest
+
+from job_records import JobTable
+from job_store import SQLiteJobStore
+
+
+def make_job(created_at: float, status: str = "queued", platform: str = "youtube", **extra):
+    return {"status": status, "platform": platform, "created_at": created_at, **extra}
+
+
+def all_pages(table, limit: int, **filters):
+    pages, after = [], None
+    while True:
+        found, after, total = table.page(after=after, limit=limit, **filters)
+        pages.append([job_id for job_id, _ in found])
+        if after is None:
+            return pages, total
+
+
+@pytest.fixture
+def table() -> JobTable:
+    table = JobTable()
+    for index in range(10):
+        table[f"job-{index:02d}"] = make_job(
+            100 + index,
+            status="completed" if index % 3 == 0 else "queued",
+            platform="tiktok" if index % 2 else "youtube",
+        )
+    return table
+
+
+def test_cursor_walks_every_job_once_in_creation_order(table):
+    pages, total = all_pages(table, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert sum(pages, []) == [f"job-{index:02d}" for index in range(10)]
+    assert total == 10
+
+
+def test_exact_multiple_of_limit_has_no_empty_trailing_page(table):
+    pages, _ = all_pages(table, limit=5)
+    assert [len(page) for page in pages] == [5, 5]
+
+
+def test_filters_and_totals(table):
+    pages, total = all_pages(table, limit=2, status="completed")
+    assert sum(pages, []) == ["job-00", "job-03", "job-06", "job-09"]
+    assert total == 4
+    pages, total = all_pages(table, limit=2, status="queued", platform="tiktok")
+    assert sum(pages, []) == ["job-01", "job-05", "job-07"]
+    assert total == 3
+    found, after, total = table.page(status="missing")
+    assert (found, after, total) == ([], None, 0)
+
+
+def test_since_filter(table):
+    pages, total = all_pages(table, limit=4, since=105)
+    assert sum(pages, []) == [f"job-{index:02d}" for index in range(5, 10)]
+    # since ile toplam sayılmaz (tablo taranmaz)
+    assert total is None
+
+
+def test_status_change_moves_job_between_indexes(table):
+    table["job-01"].update({"status": "completed"})
+    assert "job-01" in sum(all_pages(table, limit=10, status="completed")[0], [])
+    assert "job-01" not in sum(all_pages(table, limit=10, status="queued")[0], [])
+    assert table.count_by_status() == {"completed": 5, "queued": 5}
+
+
+def test_detached_jobs_are_hidden(table):
+    table["job-02"].update({"detached": True})
+    pages, total = all_pages(table, limit=4)
+    assert "job-02" not in sum(pages, [])
+    assert total == 9
+    assert sum(table.count_by_status().values()) == 9
+
+
+def test_cursor_survives_deleting_the_cursor_job(table):
+    found, after, _ = table.page(limit=3)
+    assert after == (102.0, "job-02")
+    del table["job-02"]
+    found, _, _ = table.page(after=after, limit=3)
+    assert [job_id for job_id, _ in found] == ["job-03", "job-04", "job-05"]
+
+
+def test_equal_created_at_is_ordered_by_job_id():
+    table = JobTable()
+    for job_id in ("c", "a", "b"):
+        table[job_id] = make_job(5)
+    pages, _ = all_pages(table, limit=1)
+    assert sum(pages, []) == ["a", "b", "c"]
+
+
+def test_page_returns_copies(table):
+    found, _, _ = table.page(limit=1)
+    found[0][1]["status"] = "failed"
+    assert table["job-00"]["status"] == "completed"
+
+
+def test_sqlite_store_pages_like_job_table(table, tmp_path: Path):
+    store = SQLiteJobStore(tmp_path / "jobs.db")
+    try:
+        for job_id, job in table.items():
+            store.insert(job_id, job.copy())
+        for filters in ({}, {"status": "queued"}, {"platform": "tiktok"}, {"since": 104}):
+            assert all_pages(store, limit=3, **filters) == all_pages(table, limit=3, **filters)
+    finally:
+        store.close()
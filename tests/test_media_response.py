@@ -0,0 +1,175 @@
+import asyncio
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from media_response import (
+    GrowingFileAborted, MediaFileResponse, RangeNotSatisfiable, etag_in, iter_growing_file, parse_byte_range,
+)
+
+BODY = bytes(range(256)) * 4  # 1024 bayt
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),          # bitiş dosya sonuna kırpılır
+    ("bytes=-100", (924, 1023)),                # son 100 bayt
+    ("bytes=-5000", (0, 1023)),                 # dosyadan uzun sonek: tamamı
+    ("BYTES = 5-9", (5, 9)),
+    ("bytes=0-99,200-299", None),               # çoklu aralık: tam dosya
+    ("bytes=9-5", None),                        # ters aralık yok sayılır
+    ("bytes=5", None),
+    ("bytes=a-b", None),
+    ("items=0-5", None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, len(BODY)) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1024-", 1024),
+    ("bytes=5000-6000", 1024),
+    ("bytes=-0", 1024),
+    ("bytes=0-", 0),
+    ("bytes=-10", 0),
+])
+def test_parse_byte_range_unsatisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range(header, size)
+
+
+def test_etag_in_ignores_weak_prefix():
+    assert etag_in('W/"abc", "def"', '"abc"')
+    assert etag_in("*", '"abc"')
+    assert not etag_in('"abd"', '"abc"')
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(BODY)
+
+    async def serve(request):
+        return MediaFileResponse(path, filename="video.mp4")
+
+    return TestClient(Starlette(routes=[Route("/file", serve, methods=["GET", "HEAD"])]))
+
+
+def test_full_response_advertises_ranges(client):
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "video/mp4"
+
+
+def test_partial_response(client):
+    response = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.headers["content-length"] == "10"
+
+
+def test_suffix_range(client):
+    response = client.get("/file", headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.content == BODY[-24:]
+    assert response.headers["content-range"] == "bytes 1000-1023/1024"
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/file", headers={"Range": "bytes=2048-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    assert response.content == b""
+
+
+def test_multi_range_falls_back_to_full_file(client):
+    response = client.get("/file", headers={"Range": "bytes=0-1,5-6"})
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert "content-range" not in response.headers
+
+
+def test_if_range_with_stale_etag_sends_full_file(client):
+    etag = client.get("/file").headers["etag"]
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+def test_conditional_get(client):
+    etag = client.get("/file").headers["etag"]
+    response = client.get("/file", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert "content-length" not in response.headers
+
+
+def test_head_with_range_has_no_body(client):
+    response = client.head("/file", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+
+def test_zerocopysend_extension(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(BODY)
+    sent = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            # Sunucu tanımlayıcıyı gönderim sırasında okur
+            message = {**message, "data": os.pread(message["file"], message["count"], message["offset"])}
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {"type": "http", "method": "GET", "path": "/file", "headers": [(b"range", b"bytes=10-19")],
+             "extensions": {"http.response.zerocopysend": {}}}
+    asyncio.run(MediaFileResponse(path, filename="video.mp4")(scope, receive, send))
+    assert sent[0]["status"] == 206
+    assert sent[1]["type"] == "http.response.zerocopysend"
+    assert (sent[1]["offset"], sent[1]["count"]) == (10, 10)
+    assert sent[1]["data"] == BODY[10:20]
+
+
+@pytest.mark.parametrize("job, state", [
+    ({"status": "downloading"}, True),
+    ({"status": "processing"}, True),
+    ({"status": "completed"}, False),
+    # Geçici hatayla ertelenen iş: eksik dosya temiz biten gövde olmamalı
+    ({"status": "queued"}, None),
+    ({"status": "starting"}, None),
+    ({"status": "failed"}, None),
+    (None, None),
+])
+def test_stream_write_state(api, job, state):
+    assert api.stream_write_state(job) is state
+
+
+def test_growing_file_aborts_when_job_is_requeued(tmp_path, api):
+    path = tmp_path / "video.mp4.part"
+    path.write_bytes(b"x" * 1000)
+    states = iter([{"status": "downloading"}, {"status": "queued"}])
+
+    async def still_writing():
+        return api.stream_write_state(next(states))
+
+    async def read():
+        received = b""
+        async for chunk in iter_growing_file(path, still_writing, chunk_size=400, poll_interval=0):
+            received += chunk
+        return received
+
+    with pytest.raises(GrowingFileAborted):
+        asyncio.run(read())
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+URL = "https://www.youtube.com/watch?v=abc"
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "zaman aşımı"
+        time.sleep(0.01)
+
+
+class Owner:
+    """İlk çağıran: sahip olduğu çıkarma release ile bitirilir"""
+
+    def __init__(self, cache, error):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+        self.result = None
+        self.error = None
+
+        def extract():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            raise error
+
+        def run():
+            try:
+                self.result = cache.get_or_extract(URL, extract)
+            except BaseException as e:
+                self.error = e
+
+        self.thread = threading.Thread(target=run)
+        self.thread.start()
+        self.started.wait(5)
+
+
+def test_cancelled_owner_does_not_fail_waiters(api):
+    cache = api.MetadataCache(10, 60)
+    owner = Owner(cache, api.ExtractionAbandoned())
+    results = []
+
+    def waiter():
+        results.append(cache.get_or_extract(URL, lambda: ({"title": "video"}, [])))
+
+    threads = [threading.Thread(target=waiter) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache.coalesced == 2)
+    owner.release.set()
+    for thread in [owner.thread, *threads]:
+        thread.join(5)
+
+    assert isinstance(owner.error, api.ExtractionAbandoned)
+    # Bekleyenlerden biri çıkarmayı üstlenir, diğeri onun sonucunu alır
+    assert sorted(cached for _, cached in results) == [False, True]
+    assert all(metadata["title"] == "video" for metadata, _ in results)
+    assert cache.get(api.normalize_url(URL))["title"] == "video"
+
+
+def test_async_waiter_retries_after_cancelled_owner(api):
+    cache = api.MetadataCache(10, 60)
+    owner = Owner(cache, api.ExtractionAbandoned())
+
+    async def scenario():
+        with ThreadPoolExecutor(1) as executor:
+            waiting = asyncio.ensure_future(
+                cache.aget_or_extract(URL, lambda: ({"title": "video"}, []), executor))
+            while cache.coalesced == 0:
+                await asyncio.sleep(0.01)
+            owner.release.set()
+            return await waiting
+
+    assert asyncio.run(scenario())["title"] == "video"
+    owner.thread.join(5)
+    assert isinstance(owner.error, api.ExtractionAbandoned)
+
+
+def test_extraction_error_is_shared_with_waiters(api):
+    cache = api.MetadataCache(10, 60)
+    owner = Owner(cache, RuntimeError("HTTP Error 429"))
+    errors = []
+
+    def waiter():
+        try:
+            cache.get_or_extract(URL, lambda: pytest.fail("çıkarma tekrarlanmamalı"))
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_until(lambda: cache.coalesced == 1)
+    owner.release.set()
+    for running in (owner.thread, thread):
+        running.join(5)
+
+    assert owner.calls == 1
+    assert errors == [owner.error]
+    assert cache.get(api.normalize_url(URL)) is None
@@ -0,0 +1,109 @@
+import pytest
+
+from platform_limits import CircuitBreaker, PlatformGuard, PlatformUnavailable, RateLimited, classify_error
+
+
+def breaker():
+    return CircuitBreaker(threshold=0.5, min_requests=4, window=300, cooldown=60)
+
+
+def test_opens_at_threshold_after_min_requests():
+    cb = breaker()
+    for now in range(3):
+        cb.record(False, now)
+    # Az istekte hata oranı ne olursa olsun açılmaz
+    assert cb.state == "closed"
+    cb.record(True, 3)
+    assert cb.state == "open"
+    assert cb.retry_after(4) == pytest.approx(59)
+
+
+def test_stays_closed_below_threshold():
+    cb = breaker()
+    for now, ok in enumerate([True, True, False, True, True, False]):
+        cb.record(ok, now)
+    assert cb.state == "closed"
+
+
+def test_old_outcomes_leave_the_window():
+    cb = breaker()
+    for now in range(3):
+        cb.record(False, now)
+    cb.record(False, 400)
+    assert cb.state == "closed"
+    assert len(cb.outcomes) == 1
+
+
+def open_breaker(cb):
+    for now in range(4):
+        cb.record(False, now)
+    assert cb.state == "open"
+    return cb.opened_at
+
+
+def test_half_open_allows_a_single_trial():
+    cb = breaker()
+    opened = open_breaker(cb)
+    assert cb.retry_after(opened + 61) is None
+    assert cb.state == "half_open"
+    cb.begin(opened + 61)
+    # Deneme sürerken diğer istekler reddedilir
+    assert cb.retry_after(opened + 62) is not None
+
+
+def test_successful_trial_closes():
+    cb = breaker()
+    opened = open_breaker(cb)
+    cb.retry_after(opened + 61)
+    cb.begin(opened + 61)
+    cb.record(True, opened + 62)
+    assert cb.state == "closed"
+    assert not cb.outcomes
+    assert cb.retry_after(opened + 62) is None
+
+
+def test_failed_trial_reopens():
+    cb = breaker()
+    opened = open_breaker(cb)
+    cb.retry_after(opened + 61)
+    cb.begin(opened + 61)
+    cb.record(False, opened + 62)
+    assert cb.state == "open"
+    assert cb.opened_count == 2
+    assert cb.retry_after(opened + 63) == pytest.approx(59)
+
+
+def test_abandoned_trial_lets_the_next_request_try():
+    cb = breaker()
+    opened = open_breaker(cb)
+    cb.retry_after(opened + 61)
+    cb.begin(opened + 61)
+    cb.abandon()
+    assert cb.retry_after(opened + 62) is None
+    assert cb.state == "half_open"
+
+
+@pytest.mark.parametrize("error, kind", [
+    (Exception("HTTP Error 429: Too Many Requests"), "transient"),
+    (TimeoutError(), "transient"),
+    (Exception("Sign in to confirm you're not a bot"), "blocked"),
+    (Exception("Unsupported URL"), "permanent"),
+    (RateLimited("tiktok", 3), "limited"),
+    (PlatformUnavailable("tiktok", 30), "unavailable"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_guard_counts_only_platform_failures():
+    guard = PlatformGuard({"tiktok": (600, 4)}, min_requests=2, cooldown=60)
+    # Kalıcı hatalar ve kendi hız sınırımız devreyi etkilemez
+    guard.record("tiktok", Exception("Unsupported URL"))
+    guard.record("tiktok", RateLimited("tiktok", 1))
+    assert guard.snapshot()["tiktok"]["recent_requests"] == 0
+    guard.record("tiktok", Exception("HTTP Error 429"))
+    guard.record("tiktok", Exception("HTTP Error 503"))
+    assert guard.snapshot()["tiktok"]["state"] == "open"
+    with pytest.raises(PlatformUnavailable):
+        with guard.extraction("tiktok", timeout=0):
+            pass
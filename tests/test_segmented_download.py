@@ -0,0 +1,158 @@
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("yt_dlp")
+import yt_dlp  # noqa: E402
+
+import segmented_download  # noqa: E402
+from segmented_download import SegmentedHttpFD  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+from fake_origin import PATTERN, FakeOriginHandler, media_url  # noqa: E402
+
+SEGMENT = 64 * 1024
+SIZE = 10 * SEGMENT + 1000  # son aralık kısa
+
+
+def expected(size):
+    return (PATTERN * (size // len(PATTERN) + 1))[:size]
+
+
+class RecordingHandler(FakeOriginHandler):
+    """Gelen Range başlıklarını kaydeder; ayarlanırsa Range'i yok sayar veya bağlantıyı keser"""
+    ranges = []
+    ignore_range = False
+    # Bu başlangıç konumlarına gelen ilk istek yarıda kesilir
+    drop_once = set()
+
+    def _send_headers(self, size, content_type):
+        header = self.headers.get("Range")
+        type(self).ranges.append(header)
+        if self.ignore_range:
+            del self.headers["Range"]
+        return super()._send_headers(size, content_type)
+
+    def _write_body(self, start, end):
+        if self.headers.get("Range") and start in self.drop_once:
+            type(self).drop_once = self.drop_once - {start}
+            self.wfile.write(PATTERN[:(end - start + 1) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        super()._write_body(start, end)
+
+
+@pytest.fixture
+def origin(monkeypatch):
+    monkeypatch.setattr(segmented_download, "MIN_SEGMENT_BYTES", SEGMENT)
+    handler = type("Handler", (RecordingHandler,), {"ranges": [], "drop_once": set()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def download(url, filename, connections=4, min_size=0):
+    params = {"quiet": True, "noprogress": True, "fragment_retries": 3, "retry_sleep_functions": {},
+              "segmented_connections": connections, "segmented_min_size": min_size}
+    with yt_dlp.YoutubeDL(params) as ydl:
+        fd = SegmentedHttpFD(ydl, ydl.params)
+        info = {"url": url, "protocol": "http", "ext": "mp4", "http_headers": {}}
+        return fd.download(str(filename), info), info
+
+
+def data_ranges(handler):
+    """Yoklama (bytes=0-0) dışındaki aralık istekleri"""
+    return sorted(r for r in handler.ranges if r and r != "bytes=0-0")
+
+
+def test_full_download_in_parallel_ranges(origin, tmp_path):
+    handler, base = origin
+    target = tmp_path / "video.mp4"
+    ok, info = download(media_url(base, SIZE), target)
+    assert ok
+    assert info["segmented"] is True
+    assert target.read_bytes() == expected(SIZE)
+    # 11 aralık: 10 tam, 1 kısa; ara dosyalar kalmaz
+    assert len(data_ranges(handler)) == 11
+    assert f"bytes={10 * SEGMENT}-{SIZE - 1}" in handler.ranges
+    assert not (tmp_path / "video.mp4.part").exists()
+    assert not (tmp_path / "video.mp4.part.segments").exists()
+
+
+def test_resume_fetches_only_missing_ranges(origin, tmp_path):
+    handler, base = origin
+    target = tmp_path / "video.mp4"
+    part = tmp_path / "video.mp4.part"
+    body = expected(SIZE)
+    ranges = [[start, min(start + SEGMENT, SIZE) - 1] for start in range(0, SIZE, SEGMENT)]
+    done = [0, 1, 2, 5, 10]
+    # Önceki denemede biten aralıklar yazılı, diğerleri sıfır
+    partial = bytearray(SIZE)
+    for index in done:
+        start, end = ranges[index]
+        partial[start:end + 1] = body[start:end + 1]
+    part.write_bytes(bytes(partial))
+    (tmp_path / "video.mp4.part.segments").write_text(json.dumps({"size": SIZE, "ranges": ranges, "done": done}))
+
+    ok, _ = download(media_url(base, SIZE), target)
+    assert ok
+    assert target.read_bytes() == body
+    assert data_ranges(handler) == sorted(
+        f"bytes={start}-{end}" for index, (start, end) in enumerate(ranges) if index not in done)
+
+
+def test_stale_state_is_ignored(origin, tmp_path):
+    handler, base = origin
+    target = tmp_path / "video.mp4"
+    (tmp_path / "video.mp4.part").write_bytes(b"\0" * SIZE)
+    # Farklı boyut için yazılmış durum dosyası: tüm aralıklar yeniden çekilir
+    (tmp_path / "video.mp4.part.segments").write_text(
+        json.dumps({"size": SIZE + 1, "ranges": [[0, SIZE]], "done": [0]}))
+    assert download(media_url(base, SIZE), target)[0]
+    assert target.read_bytes() == expected(SIZE)
+    assert len(data_ranges(handler)) == 11
+
+
+def test_dropped_connection_retries_only_its_range(origin, tmp_path):
+    handler, base = origin
+    handler.drop_once = {3 * SEGMENT}
+    target = tmp_path / "video.mp4"
+    assert download(media_url(base, SIZE), target)[0]
+    assert target.read_bytes() == expected(SIZE)
+    requests = data_ranges(handler)
+    # Yalnızca kopan aralık yeniden istenir (okunan kısmın sonrasından ya da baştan)
+    retried = [r for r in requests if 3 * SEGMENT <= int(r[6:].partition("-")[0]) < 4 * SEGMENT]
+    assert len(retried) == 2
+    assert all(r.endswith(f"-{4 * SEGMENT - 1}") for r in retried)
+    assert len(requests) == 12
+
+
+def test_origin_without_range_falls_back_to_single_connection(origin, tmp_path):
+    handler, base = origin
+    handler.ignore_range = True
+    target = tmp_path / "video.mp4"
+    ok, info = download(media_url(base, SIZE), target)
+    assert ok
+    assert "segmented" not in info
+    assert target.read_bytes() == expected(SIZE)
+    assert not (tmp_path / "video.mp4.part.segments").exists()
+    # Yoklama + tek tam istek
+    assert len(handler.ranges) == 2
+
+
+def test_small_file_uses_single_connection(origin, tmp_path):
+    handler, base = origin
+    target = tmp_path / "video.mp4"
+    ok, info = download(media_url(base, SEGMENT), target)
+    assert ok
+    assert "segmented" not in info
+    assert target.read_bytes() == expected(SEGMENT)
+    assert data_ranges(handler) == []